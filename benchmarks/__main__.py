@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+
+# the context has to configure pyglet before anything creates a window
+from benchmarks import context
+from benchmarks import harness
+from benchmarks import bench_animation, bench_cache, bench_layout, bench_memory, bench_model, bench_search, \
+    bench_table, bench_text, bench_window
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="gluipy headless benchmarks")
+    parser.add_argument("-k", dest="selected", default=None, help="only run benchmarks containing this string")
+    parser.add_argument("-o", "--output", default=None, help="write the results as JSON to this path")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown of the median relative to the baseline")
+    args = parser.parse_args(argv)
+
+    results = harness.run(args.selected)
+    if args.output:
+        harness.save(results, args.output)
+    if args.save_baseline:
+        harness.save(results, args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    regressions = harness.compare(results, harness.load(args.baseline), args.tolerance)
+    for name, reference, current in regressions:
+        print(f"REGRESSION {name}: {reference * 1000:.3f} ms -> {current * 1000:.3f} ms", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
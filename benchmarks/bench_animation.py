@@ -0,0 +1,53 @@
+from pyglet import gl
+
+from benchmarks import context
+from benchmarks.harness import benchmark
+from gluipy.animation import Animator
+from gluipy.backend import Backend
+from gluipy.container import VContainer, HContainer
+from gluipy.profiler import Profiler
+from gluipy.text import Label
+
+
+@benchmark("animation.frame", rounds=60, params={"tweens": [10, 200]})
+def animation_frame(tweens):
+    # the labels fade and slide in from their captures, frames neither measure nor draw the content of a label
+    window = context.window()
+    rows = [HContainer([Label(f"Label {r}.{c}", f"anim-{tweens}|{r}.{c}", font_size=16) for c in range(10)],
+                       f"anim-row-{tweens}|{r}") for r in range(20)]
+    root = VContainer(rows, f"anim-root-{tweens}")
+    root.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    labels = [label for row in rows for label in row.elements][:tweens]
+
+    def frame():
+        backend.begin_frame(window)
+        root.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+
+    # the first frame captures every label
+    enabled, Profiler.enabled = Profiler.enabled, True
+    frame()
+    Profiler.enabled = enabled
+
+    def step():
+        Animator.scheduled = True
+        for label in labels:
+            Animator.animate(label, 1.0, opacity=0, x=40, scale=0.5)
+        Animator.tick(0.5)
+        enabled, Profiler.enabled = Profiler.enabled, True
+        misses = sum(Profiler.elements[label.cache_id].misses for label in labels)
+        frame()
+        gl.glFinish()
+        Profiler.enabled = enabled
+        drawn = sum(Profiler.elements[label.cache_id].misses for label in labels) - misses
+        for label in labels:
+            Animator.reset(label.cache_id)
+        Animator.tweens = {}
+        Animator.scheduled = None
+        return {"animated": len(labels), "content_drawn": drawn}
+
+    return step
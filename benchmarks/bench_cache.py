@@ -0,0 +1,43 @@
+from benchmarks.harness import benchmark
+from gluipy.backend import Backend, NullBackend
+from gluipy.cache import Cache
+
+
+class _Sprite:
+    x = 0
+    y = 0
+    batch = None
+
+    def draw(self):
+        pass
+
+
+@benchmark("cache.hit", rounds=200, params={"entries": [100, 10_000]})
+def cache_hit(entries):
+    Cache.object_cache, Cache.state_cache = {}, {}
+    for i in range(entries):
+        Cache.save_cache(f"element|{i}", f"state|{i}", 0, 0, 100, 20, _Sprite())
+    keys = [(f"element|{i}", f"state|{i}") for i in range(entries)]
+
+    def step():
+        for object_id, state in keys:
+            Cache.get_cached_uielement(object_id, state)
+
+    return step
+
+
+@benchmark("cache.miss", rounds=200, params={"entries": [100, 10_000]})
+def cache_miss(entries):
+    # evicted captures are released through the backend, the stand-in sprites hold no GL objects
+    Backend.use(NullBackend())
+    keys = [(f"element|{i}", f"state|{i}") for i in range(entries)]
+
+    def step():
+        # every lookup misses on a changed state, which also evicts the entry, so it is refilled each round
+        Cache.object_cache, Cache.state_cache = {}, {}
+        for object_id, state in keys:
+            Cache.save_cache(object_id, state, 0, 0, 100, 20, _Sprite())
+        for object_id, _ in keys:
+            Cache.get_cached_uielement(object_id, "changed")
+
+    return step
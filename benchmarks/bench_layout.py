@@ -0,0 +1,52 @@
+from benchmarks import context
+from benchmarks.harness import benchmark
+from gluipy.backend import Backend, NullBackend
+from gluipy.container import VContainer, HContainer
+from gluipy.layout import Space
+from gluipy.text import Label
+
+
+@benchmark("view.layout_rebuild", rounds=30)
+def layout_rebuild():
+    view = context.view()
+
+    def step():
+        view.redraw = True
+        view.layout()
+
+    return step
+
+
+@benchmark("view.layout_rebuild_null_backend", rounds=30)
+def layout_rebuild_null_backend():
+    import tableview
+    backend = NullBackend()
+    view = tableview.MyView(backend=backend)
+    view.register_model(tableview.mymodel)
+
+    def step():
+        # the benchmarks share the backend registry, the windowed ones switch back to pyglet
+        Backend.use(backend)
+        view.redraw = True
+        view.draw(0, 0, 1600, 1200)
+
+    return step
+
+
+@benchmark("container.draw_content", rounds=30, params={"children": [10, 100, 1000]})
+def container_draw_content(children):
+    context.window()
+    batch = context.batch()
+    rows = [HContainer([Label(f"row {i}", cache_id=f"bench-label|{i}", font_size=20), Space()], f"bench-row|{i}")
+            for i in range(children)]
+    container = VContainer(rows, "bench-container", gutter=0)
+    w, h = container.size_requested()
+
+    def step():
+        container._w, container._h = None, None
+        for row in rows:
+            row._w, row._h = None, None
+        container.size_requested()
+        container.draw_content(0, 0, w, h, batch)
+
+    return step
@@ -0,0 +1,65 @@
+import gc
+import tracemalloc
+
+from benchmarks.harness import benchmark
+from gluipy.backend import Backend, NullBackend
+
+
+def _count(element) -> int:
+    return 1 + sum(_count(e) for e in getattr(element, "elements", ()))
+
+
+def _cells(rows: int, template=False) -> list:
+    # built and measured like the rows of a table, measuring and hashing set the attributes a layout leaves behind
+    import tableview
+    people = tableview.mymodel
+    cell = tableview.cell_template if template else tableview.Cell
+    cells = [cell(people[i % len(people)], i) for i in range(rows)]
+    for cell in cells:
+        cell.size_requested()
+        cell._state_hash()
+    return cells
+
+
+@benchmark("element.memory", rounds=5, params={"rows": [500]})
+def element_memory(rows):
+    # what the elements of a rebuilt table cost, including their cache ids and padding tuples
+    Backend.use(NullBackend())
+
+    def step():
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        cells = _cells(rows)
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        elements = sum(map(_count, cells))
+        return {"elements": elements, "bytes_per_element": round(allocated / elements)}
+
+    return step
+
+
+@benchmark("element.rebuild", rounds=20, params={"rows": [500]})
+def element_rebuild(rows):
+    # the trees of consecutive layouts, the previous one is released while the next one is built
+    Backend.use(NullBackend())
+    cells = _cells(rows)
+
+    def step():
+        nonlocal cells
+        collections = sum(stat["collections"] for stat in gc.get_stats())
+        cells = _cells(rows)
+        return {"gc_collections": sum(stat["collections"] for stat in gc.get_stats()) - collections}
+
+    return step
+
+
+@benchmark("element.rows", rounds=20, params={"cells": ["constructor", "template"]})
+def element_rows(cells):
+    # 500 rows the way a table materializes them, running the cell's constructors or stamped from its template
+    Backend.use(NullBackend())
+    template = cells == "template"
+
+    def step():
+        _cells(500, template)
+
+    return step
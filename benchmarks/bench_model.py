@@ -0,0 +1,65 @@
+import random
+from time import perf_counter
+
+from benchmarks.harness import benchmark
+from gluipy.tablemodel import SortFilterTableModel
+
+
+def _model(rows: int) -> SortFilterTableModel:
+    rng = random.Random(rows)
+    data = [(rng.random(), rng.randrange(1000), f"name {rng.randrange(rows)}") for _ in range(rows)]
+    return SortFilterTableModel(data, {"score": lambda r: r[0], "group": lambda r: r[1], "name": lambda r: r[2]})
+
+
+@benchmark("model.resort", rounds=20, params={"rows": [10_000, 1_000_000]})
+def model_resort(rows):
+    # switching between orders that were sorted before, with a filter active, only swaps index arrays. The first
+    # sort of every order is measured by model.sort_cold
+    model = _model(rows)
+    model.set_filter("group", lambda r: r[1] < 500)
+    orders = [("score",), (("score", True),), (("group", True), "name")]
+    for keys in orders:
+        model.sort(*keys)
+
+    def step():
+        for keys in orders:
+            model.sort(*keys)
+            model[len(model) // 2]
+
+    return step
+
+
+@benchmark("model.sort_cold", rounds=3, params={"keys": ["score", "score_desc", "desc_after_asc", "group_name"]})
+def model_sort_cold(keys):
+    # every round sorts a model without cached orders, desc_after_asc only measures the descending order derived from
+    # the ascending one that was sorted before
+    model = _model(1_000_000)
+    rows = model.rows
+    orders = {"score": [("score",)], "score_desc": [(("score", True),)],
+              "desc_after_asc": [("score",), (("score", True),)], "group_name": [("group", "name")]}[keys]
+
+    def step():
+        # the rows are set again unsorted, otherwise set_rows would already sort them by the last keys
+        model.sort()
+        model.set_rows(rows)
+        for order in orders:
+            started = perf_counter()
+            model.sort(*order)
+            model[len(model) // 2]
+        return {"last_sort_ms": round((perf_counter() - started) * 1000, 1)}
+
+    return step
+
+
+@benchmark("model.filter", rounds=10, params={"rows": [10_000, 1_000_000]})
+def model_filter(rows):
+    # a new filter mask combined with an existing one and applied to a cached sort order
+    model = _model(rows)
+    model.sort("score")
+    model.set_filter("group", lambda r: r[1] < 500)
+    mask = model.filter_mask(lambda r: r[0] < 0.5)
+
+    def step():
+        model.set_filter("score", mask=mask)
+
+    return step
@@ -0,0 +1,43 @@
+import os
+
+from benchmarks.harness import benchmark
+from benchmarks.context import EXAMPLES_PATH
+from peopledb import Model
+
+CSV_PATH = os.path.join(EXAMPLES_PATH, "us-500.csv")
+
+
+@benchmark("peopledb.search_keystroke", rounds=20)
+def search_keystroke():
+    model = Model(CSV_PATH)
+    query = "Blue Gum"
+
+    def step():
+        # typing the query one character at a time, as the search TextInput does
+        for i in range(1, len(query) + 1):
+            model.search = query[:i]
+        model.search = ""
+
+    return step
+
+
+@benchmark("binding.search_burst", rounds=20)
+def search_burst():
+    from gluipy.backend import Backend, NullBackend
+    from gluipy.binding import Binding
+    backend = NullBackend()
+    model = Model(CSV_PATH)
+    binding = Binding(model, "search", debounce=0.15, compute=model.query, apply=model.apply_query)
+    query = "Blue Gum"
+
+    def step():
+        # the same typing as above through a debounced binding, only the final value reaches the model
+        Backend.use(backend)
+        for i in range(1, len(query) + 1):
+            binding.set(query[:i])
+            backend.clock.advance(0.05)
+        backend.clock.advance(0.15)
+        binding.set("")
+        backend.clock.advance(0.15)
+
+    return step
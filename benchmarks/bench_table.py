@@ -0,0 +1,200 @@
+import math
+import statistics
+from time import perf_counter
+from typing import Optional
+
+from pyglet import gl
+
+from benchmarks import context
+from benchmarks.harness import benchmark
+from gluipy.backend import Backend
+from gluipy.base import BaseUIElement
+from gluipy.idle import IdleScheduler
+from gluipy.grid import Grid, GridColumn
+from gluipy.table import Table, TableDelegate
+
+
+class SyntheticModel:
+    # repeats the example people over an arbitrary number of rows without materializing them
+
+    def __init__(self, rows: int):
+        import tableview
+        self.people = tableview.mymodel.data
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, item):
+        return self.people[item % len(self.people)]
+
+    def __iter__(self):
+        for i in range(self.rows):
+            yield self[i]
+
+    def __contains__(self, item):
+        return item in self.people
+
+    def need_redraw(self) -> bool:
+        return False
+
+    def request_update(self):
+        pass
+
+    def model_state(self) -> str:
+        return str(self.rows)
+
+    def get_scroll(self) -> Optional[int]:
+        return None
+
+    def invalidate_scroll(self):
+        pass
+
+    def set_table_delegate(self, table: TableDelegate):
+        pass
+
+
+@benchmark("table.scroll_frame", rounds=60, params={"rows": [10_000, 100_000, 1_000_000]})
+def table_scroll_frame(rows):
+    window = context.window()
+    import tableview
+    table = Table(tableview.Cell, SyntheticModel(rows), f"bench-table-{rows}")
+    table.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    # start in the middle of the model, every frame scrolls by a third of a row
+    table.offset = (rows // 2) * (table.cell_height + table.row_gap)
+    step_size = (table.cell_height + table.row_gap) // 3
+
+    def step():
+        backend.begin_frame(window)
+        table.offset += step_size
+        table.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+
+    return step
+
+
+@benchmark("table.scroll_idle", rounds=60, params={"idle_ms": [0, 8]})
+def table_scroll_idle(idle_ms):
+    # every frame scrolls a whole row into view, in between the idle scheduler gets idle_ms to render the rows ahead.
+    # The step includes the idle work, the metrics only the frames
+    window = context.window()
+    import tableview
+    table = Table(tableview.cell_template, SyntheticModel(100_000), f"bench-idle-{idle_ms}")
+    table.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    table.offset = 50_000 * (table.cell_height + table.row_gap)
+    frames = []
+
+    def step():
+        # full rows in every frame, however slow
+        velocity, Table.placeholder_velocity = Table.placeholder_velocity, math.inf
+        if idle_ms:
+            IdleScheduler.run(budget=idle_ms / 1000)
+        started = perf_counter()
+        backend.begin_frame(window)
+        table.offset += table.cell_height + table.row_gap
+        table.invalidate_hash()
+        table.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+        frames.append(perf_counter() - started)
+        Table.placeholder_velocity = velocity
+        return {"frame_median_ms": statistics.median(frames) * 1000, "frame_max_ms": max(frames) * 1000}
+
+    return step
+
+
+@benchmark("table.fling", rounds=60, params={"placeholders": ["off", "on"]})
+def table_fling(placeholders):
+    # three rows per frame, fast enough for placeholders unless they are turned off
+    window = context.window()
+    import tableview
+    table = Table(tableview.cell_template, SyntheticModel(100_000), f"bench-fling-{placeholders}")
+    table.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    table.offset = 50_000 * (table.cell_height + table.row_gap)
+    fling_velocity = 10 if placeholders == "on" else math.inf
+
+    def step():
+        velocity, Table.placeholder_velocity = Table.placeholder_velocity, fling_velocity
+        backend.begin_frame(window)
+        table.offset += 3 * (table.cell_height + table.row_gap)
+        table.invalidate_hash()
+        table.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+        Table.placeholder_velocity = velocity
+
+    return step
+
+
+@benchmark("table.primitives", rounds=30, params={"caching": ["on", "off"]})
+def table_primitives(caching):
+    # shapes and the draw calls they take per frame. Every capture draws the shapes queued before it, without the
+    # cache the backgrounds of all rows share one call
+    window = context.window()
+    import tableview
+    table = Table(tableview.cell_template, SyntheticModel(100_000), f"bench-primitives-{caching}")
+    table.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    table.offset = 50_000 * (table.cell_height + table.row_gap)
+
+    def step():
+        velocity, Table.placeholder_velocity = Table.placeholder_velocity, math.inf
+        enabled, BaseUIElement.caching = BaseUIElement.caching, caching == "on"
+        primitives = backend.primitives
+        shapes, flushes = primitives.shapes, primitives.flushes
+        backend.begin_frame(window)
+        table.offset += table.cell_height + table.row_gap
+        table.invalidate_hash()
+        table.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+        Table.placeholder_velocity, BaseUIElement.caching = velocity, enabled
+        return {"shapes": primitives.shapes - shapes, "draw_calls": primitives.flushes - flushes}
+
+    return step
+
+
+@benchmark("grid.scroll_frame", rounds=60, params={"columns": [12, 200]})
+def grid_scroll_frame(columns):
+    # frame time depends on the cells in view, not on the number of columns
+    window = context.window()
+    attributes = ("last_name", "first_name", "company_name", "address", "city", "county", "state", "zip", "phone1",
+                  "phone2", "email", "web")
+    grid_columns = [GridColumn(f"{attributes[i % len(attributes)]} {i}",
+                               lambda p, a=attributes[i % len(attributes)]: getattr(p, a), frozen=i < 1)
+                    for i in range(columns)]
+    grid = Grid(grid_columns, SyntheticModel(100_000), f"bench-grid-{columns}")
+    grid.size_requested()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    w, h = window.width * 2, window.height * 2
+    steps = [0]
+
+    def step():
+        backend.begin_frame(window)
+        steps[0] += 1
+        # diagonal scrolling, every frame brings new rows and columns into view
+        grid.offset = steps[0] * 17 % (grid.row_count() * grid.line_height)
+        grid.h_offset = steps[0] * 23 % max(grid.max_h_offset(w), 1)
+        grid.draw(0, 0, w, h, batch, False)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+
+    return step
@@ -0,0 +1,72 @@
+from pyglet import gl
+
+from benchmarks import context
+from benchmarks.harness import benchmark
+from gluipy.backend import Backend
+from gluipy.text import TextInput
+
+
+class SearchModel:
+    search = "Chicago"
+
+
+@benchmark("text_input.active_frame", rounds=60, params={"frames": [10, 1000]})
+def text_input_active_frame(frames):
+    # an active text field redraws every frame into a long-lived batch, frame time must not grow with the
+    # number of frames already drawn
+    window = context.window()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    text_input = TextInput(model=SearchModel(), model_attribute="search", cache_id="bench-search")
+    text_input.size_requested()
+    text_input.active = True
+
+    def frame():
+        backend.begin_frame(window)
+        text_input.draw(10, 10, 600, 40, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+
+    for _ in range(frames):
+        frame()
+
+    def step():
+        frame()
+        gl.glFinish()
+
+    return step
+
+
+@benchmark("text_area.scroll_frame", rounds=60, params={"lines": [1000, 100_000]})
+def text_area_scroll_frame(lines):
+    from gluipy.textarea import LineDocument, TextArea
+    window = context.window()
+    backend = Backend.current()
+    batch = backend.new_batch()
+    document = LineDocument("\n".join(f"{i:07d} log line with some text" for i in range(lines)))
+    text_area = TextArea(document=document, cache_id=f"bench-text-area-{lines}", lines=40)
+    w, h = text_area.size_requested()
+    text_area.scroll_to(lines // 2 * text_area.line_height, h)
+
+    def step():
+        backend.begin_frame(window)
+        text_area.scroll_to(text_area.offset + text_area.line_height // 3, h)
+        text_area.draw(0, 0, w, h, batch)
+        backend.draw_batch(batch)
+        backend.end_frame()
+        gl.glFinish()
+
+    return step
+
+
+@benchmark("text_area.keystroke", rounds=200, params={"lines": [1000, 100_000]})
+def text_area_keystroke(lines):
+    from gluipy.textarea import LineDocument, TextAreaCaret
+    document = LineDocument("\n".join(f"{i:07d} log line with some text" for i in range(lines)))
+    caret = TextAreaCaret(document)
+    caret.line = lines // 2
+
+    def step():
+        caret.on_text("a")
+
+    return step
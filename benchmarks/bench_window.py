@@ -0,0 +1,38 @@
+from time import perf_counter
+
+import pyglet
+
+from benchmarks import context
+from benchmarks.harness import benchmark
+from gluipy.table import Table
+
+
+@benchmark("view.second_window", rounds=5, params={"gl_context": ["shared", "separate"]})
+def second_window(gl_context):
+    # the first frame of another window showing the same view. With a shared GL context it draws from the captures,
+    # metrics and glyphs of the first window, a separate context renders everything again
+    import tableview
+    first = context.view()
+    # rows left behind by the null backend benchmarks hold no pyglet objects to release
+    Table.drawn.clear()
+    first.draw()
+
+    def step():
+        share = first.window.context if gl_context == "shared" else None
+        window = pyglet.window.Window(width=800, height=600, visible=False,
+                                      context=first.window.context.config.create_context(share))
+        window.switch_to()
+        window.on_resize(window.width, window.height)
+        view = tableview.MyView(window)
+        view.register_model(tableview.mymodel)
+        started = perf_counter()
+        view.draw()
+        pyglet.gl.glFinish()
+        first_frame = perf_counter() - started
+        view.on_close()
+        view.remove_model(tableview.mymodel)
+        window.close()
+        context.window()
+        return {"first_frame_ms": round(first_frame * 1000, 1)}
+
+    return step
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pyglet
+
+# benchmarks never open a visible window, pyglet renders into an offscreen EGL surface
+pyglet.options['headless'] = True
+pyglet.options['shadow_window'] = False
+
+from gluipy.backend import Backend
+from gluipy.pyglet_backend import PygletBackend
+
+# the examples import each other as top level modules
+EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "examples")
+if EXAMPLES_PATH not in sys.path:
+    sys.path.insert(0, EXAMPLES_PATH)
+
+_window = None
+_view = None
+_backend = None
+
+
+def window(width=800, height=600) -> pyglet.window.Window:
+    global _window, _backend
+    if _backend is None:
+        _backend = PygletBackend()
+    # benchmarks running without a window may have switched to another backend
+    Backend.use(_backend)
+    if _window is None:
+        config = pyglet.gl.Config(double_buffer=True, stencil_size=8)
+        _window = pyglet.window.Window(config=config, width=width, height=height, visible=False)
+        _window.switch_to()
+        # the resize event is only dispatched by the event loop, which the benchmarks do not run
+        _window.on_resize(width, height)
+    _window.switch_to()
+    return _window
+
+
+def batch() -> pyglet.graphics.Batch:
+    return Backend.current().new_batch()
+
+
+def view():
+    global _view
+    if _view is None:
+        import tableview
+        _view = tableview.MyView(window())
+        _view.register_model(tableview.mymodel)
+    window()
+    return _view
@@ -0,0 +1,97 @@
+import json
+import platform
+import statistics
+import sys
+from time import perf_counter
+from typing import Callable, Optional
+
+benchmarks: {str: "Benchmark"} = {}
+
+
+class Benchmark:
+
+    def __init__(self, name: str, setup: Callable[..., Callable[[], None]], rounds: int, params: Optional[dict]):
+        self.name = name
+        self.setup = setup
+        self.rounds = rounds
+        self.params = params or {}
+
+    def cases(self):
+        if not self.params:
+            yield self.name, {}
+            return
+        (key, values), = self.params.items()
+        for value in values:
+            yield f"{self.name}[{key}={value}]", {key: value}
+
+    def run(self, name: str, kwargs: dict) -> dict:
+        step = self.setup(**kwargs)
+        # warm up caches and lazily created GL objects before measuring
+        step()
+        timings = []
+        # a step may return counters besides its timing, e.g. bytes or collections, the last round's are reported
+        metrics = None
+        for _ in range(self.rounds):
+            started = perf_counter()
+            metrics = step()
+            timings.append(perf_counter() - started)
+        result = {
+            "name": name,
+            "rounds": self.rounds,
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "max": max(timings),
+        }
+        if metrics:
+            result["metrics"] = metrics
+        return result
+
+
+def benchmark(name: str, rounds=20, params: Optional[dict] = None):
+    # the decorated function receives the parameters and returns the callable that is timed
+    def register(setup):
+        benchmarks[name] = Benchmark(name, setup, rounds, params)
+        return setup
+
+    return register
+
+
+def run(selected: Optional[str] = None, out=sys.stdout) -> dict:
+    results = {}
+    for bench in benchmarks.values():
+        for name, kwargs in bench.cases():
+            if selected and selected not in name:
+                continue
+            result = bench.run(name, kwargs)
+            results[name] = result
+            metrics = "".join(f"  {key} {value:g}" for key, value in result.get("metrics", {}).items())
+            print(f"{name:<48} median {result['median'] * 1000:10.3f} ms  min {result['min'] * 1000:10.3f} ms"
+                  f"{metrics}", file=out)
+    return {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+
+
+def save(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> [(str, float, float)]:
+    regressions = []
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        # a slower median alone is mostly another process on the machine, a real slowdown moves the fastest round too
+        if (result["median"] > reference["median"] * (1 + tolerance)
+                and result["min"] > reference["min"] * (1 + tolerance)):
+            regressions.append((name, reference["median"], result["median"]))
+    return regressions
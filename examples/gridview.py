@@ -0,0 +1,41 @@
+import os
+
+import pyglet
+
+from gluipy.base import BaseView
+from gluipy.container import VContainer
+from gluipy.grid import Grid, GridColumn
+from gluipy.interface import UIElement
+
+# needed to initialize the modifiers registry, do not remove import!
+import gluipy.modifier
+
+from peopledb import Model
+
+
+mymodel = Model(os.path.join(os.path.dirname(os.path.abspath(__file__)), "us-500.csv"))
+mymodel.search = ""
+
+columns = [
+    GridColumn("Last name", lambda p: p.last_name, frozen=True),
+    GridColumn("First name", lambda p: p.first_name, frozen=True),
+    *[GridColumn(attribute.replace("_", " ").capitalize(), lambda p, a=attribute: getattr(p, a))
+      for attribute in ("company_name", "address", "city", "county", "state", "zip", "phone1", "phone2", "email",
+                        "web")]
+]
+
+
+class MyView(BaseView):
+    def content(self) -> UIElement:
+        return VContainer([
+            Grid(columns, mymodel, "people_grid")
+        ], cache_id="body")
+
+
+if __name__ == "__main__":
+    config = pyglet.gl.Config(double_buffer=True, stencil_size=8)
+    window = pyglet.window.Window(config=config, width=800, height=600, resizable=True)
+    view = MyView(window)
+    view.register_model(mymodel)
+
+    pyglet.app.run()
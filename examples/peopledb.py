@@ -1,9 +1,8 @@
 import csv
-from abc import ABC
-from typing import Any, Iterator, Optional
+from typing import Optional
 
-from gluipy.interface import ViewModel
-from gluipy.table import TableModel, TableDelegate
+from gluipy.pipeline import Pipeline
+from gluipy.tablemodel import SortFilterTableModel
 
 
 class Person:
@@ -47,36 +46,33 @@ class Person:
         self.web = web
 
 
-class Model(TableModel):
+# the columns the table can be sorted by and the attributes the search looks at
+PERSON_COLUMNS = {
+    "last_name": lambda p: (p.last_name, p.first_name),
+    "first_name": lambda p: p.first_name,
+    "company_name": lambda p: p.company_name,
+    "city": lambda p: p.city,
+    "state": lambda p: p.state,
+    "zip": lambda p: p.zip,
+    "email": lambda p: p.email,
+}
+SEARCHED = ("first_name", "last_name", "address", "city", "state", "zip", "phone1", "phone2", "email")
+
+
+class Model(SortFilterTableModel):
 
     _search: str
-    _data: [Any]
-    _redraw = False
 
     def __init__(self, filepath):
-        self.table_delegate = None
         self.filepath = filepath
-        self.search = None
-        self.index = 0
-
-    def __len__(self) -> int:
-        return len(self._data)
-
-    def __getitem__(self, item):
-        return self._data[item]
-
-    def __iter__(self) -> Iterator[Any]:
-        for e in self._data:
-            yield e
-
-    def __contains__(self, __x: object) -> bool:
-        return __x in self._data
+        self._search = None
+        self.pipeline: Optional[Pipeline] = None
+        # the file is read once, searching and sorting only change the index arrays of the model
+        super(Model, self).__init__(self.read(filepath), PERSON_COLUMNS)
 
     @property
-    def data(self):
-        if self._data is None:
-            self.load_data()
-        return self._data
+    def data(self) -> [Person]:
+        return list(self)
 
     @property
     def search(self):
@@ -84,44 +80,53 @@ class Model(TableModel):
 
     @search.setter
     def search(self, new_value):
-        self._search = new_value
-        self.load_data()
+        self.apply_query(new_value, self.query(new_value))
 
     def scroll(self, increment):
         def wrapped(element):
             if self.index is None:
                 self.index = self.table_delegate.current_item()
             self.index += increment
-            self.index = min(max(self.index, 0), len(self._data))
-            self._redraw = True
+            self.index = min(max(self.index, 0), len(self))
+            self.request_update()
 
         return wrapped
 
     def reset(self):
         def wrapped(element):
             self.index = 0
-            self._redraw = True
+            self.request_update()
+
+        return wrapped
+
+    def sort_by(self, column):
+        # sorts by the column, or reverses the order if it is sorted by it already
+        def wrapped(element):
+            descending = self.sort_keys[:1] == ((column, False),)
+            self.sort((column, descending), pipeline=self.pipeline)
+            self.index = 0
 
         return wrapped
 
-    def load_data(self):
-        self._data = []
-        with open(self.filepath, newline='') as csvfile:
+    def apply_query(self, search, mask):
+        self._search = search
+        self.set_filter("search", mask=mask)
+        self.index = 0
+
+    def query(self, search, job=None) -> Optional[bytes]:
+        # job is set when the query runs on a pipeline worker, a newer search stops it early
+        if search is None or search == "":
+            return None
+        return self.filter_mask(lambda person: any(search in str(getattr(person, attr)) for attr in SEARCHED), job)
+
+    @staticmethod
+    def read(filepath) -> [Person]:
+        data = []
+        with open(filepath, newline='') as csvfile:
             users = csv.reader(csvfile, delimiter=',', quotechar='"')
-            first = True
+            next(users)
             for row in users:
-                if first:
-                    first = False
-                    continue
-                if self._search is not None and self._search != "":
-                    match = False
-                    for attr in (0,1,3,4,6,7,8,9,10):
-                        if self._search in row[attr]:
-                            match = True
-                            break
-                    if not match:
-                        continue
-                self._data.append(Person(
+                data.append(Person(
                     first_name=row[0],
                     last_name=row[1],
                     company_name=row[2],
@@ -135,26 +140,7 @@ class Model(TableModel):
                     email=row[10],
                     web=row[11])
                 )
-        self.index = 0
-        self._redraw = True
-
-    def need_redraw(self) -> bool:
-        if self._redraw:
-            self._redraw = False
-            return True
-        return False
-
-    def request_update(self):
-        self._redraw = True
-
-    def model_state(self) -> str:
-        return f"{self._search}|{self.index}"
-
-    def invalidate_scroll(self):
-        self.index = None
-
-    def set_table_delegate(self, table:TableDelegate):
-        self.table_delegate = table
+        return data
 
     def current_index(self):
         if self.index is not None:
@@ -163,6 +149,3 @@ class Model(TableModel):
             return self.table_delegate.current_item()
 
         return 0
-
-    def get_scroll(self) -> Optional[int]:
-        return self.index
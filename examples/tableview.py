@@ -1,11 +1,16 @@
+import os
+
 import pyglet
 
 from gluipy.base import BaseView
+from gluipy.binding import Binding
 from gluipy.interface import UIElement
 from gluipy.button import Button
 from gluipy.container import VContainer, HContainer
 from gluipy.layout import Space
+from gluipy.pipeline import Pipeline
 from gluipy.table import Table, TableCell
+from gluipy.template import CellTemplate
 from gluipy.text import Label, TextInput
 
 # needed to initialize the modifiers registry, do not remove import!
@@ -15,6 +20,7 @@ from peopledb import Person, Model
 
 
 class Cell(VContainer, TableCell):
+    __slots__ = ("person",)
 
     def __init__(self, model: Person, index: int):
         self.person = model
@@ -41,7 +47,24 @@ class Cell(VContainer, TableCell):
         ], cache_id=f"cell_box|{index}")
 
 
-mymodel = Model("us-500.csv")
+# the visible rows are stamped from the first row of each background color, only the person and the texts are bound
+cell_template = CellTemplate(Cell, {
+    "cell_box.person": lambda person, index: person,
+    "name.text": lambda person, index: f"{person.last_name}, {person.first_name}",
+    "address.text": lambda person, index: person.address,
+    "address2.text": lambda person, index: f"{person.city}, {person.zip} {person.state}",
+    "email.text": lambda person, index: person.email,
+    "phone1.text": lambda person, index: person.phone1,
+    "phone2.text": lambda person, index: person.phone2,
+}, variant=lambda person, index: index % 2)
+
+
+mymodel = Model(os.path.join(os.path.dirname(os.path.abspath(__file__)), "us-500.csv"))
+# sorting by a column for the first time runs on a worker thread
+mymodel.pipeline = Pipeline()
+# the people are only searched once typing pauses, the CSV is read on a worker thread
+search_binding = Binding(mymodel, "search", debounce=0.15, pipeline=mymodel.pipeline,
+                         compute=mymodel.query, apply=mymodel.apply_query)
 
 
 class MyView(BaseView):
@@ -54,21 +77,25 @@ class MyView(BaseView):
                 ],
                 HContainer([
                     Label("search: ", cache_id=f"search-label", font_size=24, padding=(10, 3, 10, 3)),
-                    TextInput(font_size=24, model=mymodel, model_attribute="search", length=15, cache_id="search").padding((10, 0, 10, 21))
+                    TextInput(font_size=24, model=mymodel, model_attribute="search", length=15, cache_id="search",
+                              binding=search_binding).padding((10, 0, 10, 21))
                 ], "searchbox").background((250, 250, 250)).border(radius=0, thickness=2),
                 *[
                     Button(f"+ {i}", cache_id=f"scroll+{i}", font_size=24, radius=10).on_click(mymodel.scroll(i))
-                    for i in range(1, min(10 + 3, len(mymodel.data)- mymodel.current_index()), 9)
+                    for i in range(1, min(10 + 3, len(mymodel) - mymodel.current_index()), 9)
                 ],
+                Button("A-Z", cache_id=f"sort", font_size=24, radius=10).on_click(mymodel.sort_by("last_name")),
                 Button("↻", cache_id=f"reset", font_size=36, radius=10).on_click(mymodel.reset())
             ], cache_id="toolbar").padding((10, 0, 10, 10)),
-            Table(Cell, mymodel, "user_cell")
+            Table(cell_template, mymodel, "user_cell")
         ], cache_id="body")
 
 
-config = pyglet.gl.Config(double_buffer=True, stencil_size=8)
-window = pyglet.window.Window(config=config, width=800, height=600, resizable=True)
-view = MyView(window)
-view.register_model(mymodel)
+if __name__ == "__main__":
+    config = pyglet.gl.Config(double_buffer=True, stencil_size=8)
+    window = pyglet.window.Window(config=config, width=800, height=600, resizable=True)
+    view = MyView(window)
+    view.register_model(mymodel)
+    view.warm_up()
 
-pyglet.app.run()
+    pyglet.app.run()
@@ -0,0 +1,191 @@
+import asyncio
+from typing import Any, Callable, Optional, Iterator
+
+import pyglet
+
+from gluipy.interface import ViewModel
+from gluipy.table import TableModel, TableDelegate
+
+
+class AsyncEventLoop:
+    # drives pyglet input, scheduled functions and redraws from a running asyncio loop instead of pyglet.app.run()
+
+    def __init__(self, fps=60):
+        self.interval = 1 / fps
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frame_requested = False
+
+    def request_frame(self):
+        # safe to call from any thread, any number of requests until the next tick cause a single redraw
+        if self._loop is None:
+            self._frame_requested = True
+        else:
+            self._loop.call_soon_threadsafe(self._request_frame)
+
+    def _request_frame(self):
+        self._frame_requested = True
+
+    def watch(self, model: "AsyncViewModel"):
+        model.add_frame_listener(self.request_frame)
+
+    def exit(self):
+        pyglet.app.exit()
+
+    async def run(self):
+        from pyglet.window import Window
+        # same setup as pyglet.app.run(), events are dispatched right away instead of being queued
+        Window._enable_event_queue = False
+        event_loop = pyglet.app.event_loop
+        event_loop.has_exit = False
+        event_loop.is_running = True
+        self._loop = asyncio.get_running_loop()
+        clock = pyglet.clock.get_default()
+        for window in pyglet.app.windows:
+            window.switch_to()
+            window.dispatch_pending_events()
+        try:
+            while not event_loop.has_exit and pyglet.app.windows:
+                started = self._loop.time()
+                self.tick(clock)
+                await asyncio.sleep(max(self.interval - (self._loop.time() - started), 0))
+        finally:
+            event_loop.is_running = False
+            self._loop = None
+
+    def tick(self, clock):
+        for window in list(pyglet.app.windows):
+            window.dispatch_events()
+        dt = clock.update_time()
+        redraw_all = clock.call_scheduled_functions(dt)
+        requested = self._frame_requested
+        self._frame_requested = False
+        for window in list(pyglet.app.windows):
+            if redraw_all or requested or (window._legacy_invalid and window.invalid):
+                window.switch_to()
+                window.dispatch_event('on_draw')
+                window.flip()
+                window._legacy_invalid = False
+
+
+def run(*models: "AsyncViewModel", fps=60) -> AsyncEventLoop:
+    # blocking convenience entry point, the asyncio equivalent of pyglet.app.run()
+    loop = AsyncEventLoop(fps)
+    for model in models:
+        loop.watch(model)
+    asyncio.run(loop.run())
+    return loop
+
+
+class AsyncViewModel(ViewModel):
+    # notifies the event loop instead of waiting to be polled, a flood of updates still causes one layout per frame
+    # because need_redraw only reports a flag that is read once per frame
+
+    def __init__(self):
+        self._redraw = False
+        self._frame_listeners: [Callable[[], None]] = []
+
+    def add_frame_listener(self, listener: Callable[[], None]):
+        self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener: Callable[[], None]):
+        self._frame_listeners.remove(listener)
+
+    def request_update(self):
+        self._redraw = True
+        for listener in self._frame_listeners:
+            listener()
+
+    def need_redraw(self) -> bool:
+        if self._redraw:
+            self._redraw = False
+            return True
+        return False
+
+    async def refresh(self, awaitable) -> Any:
+        result = await awaitable
+        self.request_update()
+        return result
+
+
+class PagedTableModel(AsyncViewModel, TableModel):
+    # rows are fetched page by page from an async source, rows that are not loaded yet show the placeholder
+
+    def __init__(self, length: int, fetch_page: Callable[[int, int], Any], placeholder: Any, page_size=50):
+        super().__init__()
+        self.length = length
+        self.fetch_page = fetch_page
+        self.placeholder = placeholder
+        self.page_size = page_size
+        self.pages: {int: list} = {}
+        self._loading: {int: asyncio.Task} = {}
+        self.version = 0
+        # changes with invalidate only, version also counts the pages loaded
+        self.generation = 0
+        self.index = 0
+        self.table_delegate: Optional[TableDelegate] = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, item):
+        page, offset = divmod(item, self.page_size)
+        rows = self.pages.get(page)
+        if rows is None:
+            self.load(page)
+            return self.placeholder
+        return rows[offset] if offset < len(rows) else self.placeholder
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self.length):
+            yield self[i]
+
+    def __contains__(self, __x: object) -> bool:
+        return any(__x in rows for rows in self.pages.values())
+
+    def load(self, page: int) -> Optional[asyncio.Task]:
+        # requests are deduplicated per page, without a running loop nothing is fetched
+        if page in self.pages or page in self._loading:
+            return self._loading.get(page)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        task = self._loading[page] = loop.create_task(self._load(page))
+        return task
+
+    async def _load(self, page: int):
+        generation = self.generation
+        try:
+            rows = await self.fetch_page(page * self.page_size, self.page_size)
+        finally:
+            # after an invalidate the page may already be loading again for the new generation
+            if self._loading.get(page) is asyncio.current_task():
+                del self._loading[page]
+        if generation != self.generation:
+            return
+        self.pages[page] = list(rows)
+        self.version += 1
+        self.request_update()
+
+    def invalidate(self, length: Optional[int] = None):
+        for task in self._loading.values():
+            task.cancel()
+        self._loading = {}
+        self.pages = {}
+        if length is not None:
+            self.length = length
+        self.generation += 1
+        self.version += 1
+        self.request_update()
+
+    def model_state(self) -> str:
+        return f"{self.version}|{self.index}"
+
+    def get_scroll(self) -> Optional[int]:
+        return self.index
+
+    def invalidate_scroll(self):
+        self.index = None
+
+    def set_table_delegate(self, table: TableDelegate):
+        self.table_delegate = table
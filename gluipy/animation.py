@@ -0,0 +1,116 @@
+from typing import Any, Callable, Optional
+
+from gluipy.backend import Backend
+
+EASINGS: {str: Callable[[float], float]} = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t * t,
+    "ease_out": lambda t: 1 - (1 - t) ** 3,
+    "ease_in_out": lambda t: 4 * t * t * t if t < 0.5 else 1 - (-2 * t + 2) ** 3 / 2,
+}
+
+
+class Transform:
+    # applied to the capture of an element when it is drawn from the cache, the layout never sees it. Translation is
+    # in layout units, scaling keeps the center of the element in place
+    __slots__ = ("x", "y", "opacity", "scale")
+    identity = (0, 0, 255, 1.0)
+
+    def __init__(self):
+        self.x, self.y, self.opacity, self.scale = Transform.identity
+
+    def values(self) -> tuple:
+        return self.x, self.y, self.opacity, self.scale
+
+
+class Tween:
+    __slots__ = ("cache_id", "name", "start", "end", "duration", "elapsed", "easing", "on_done")
+
+    def __init__(self, cache_id: str, name: str, start: float, end: float, duration: float, easing: str,
+                 on_done: Optional[Callable[[], None]]):
+        self.cache_id = cache_id
+        self.name = name
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.elapsed = 0.0
+        self.easing = EASINGS[easing]
+        self.on_done = on_done
+
+
+class Animator:
+    # tweens of the transforms of cached elements, keyed by cache id. All of them advance in a single pass per clock
+    # tick, the frame that follows draws the animated elements from their captures without layout or draw_content.
+    # The containers around an animated element are drawn again from their cached children but not captured
+    interval = 1 / 60
+    transforms: {str: Transform} = {}
+    tweens: {(str, str): Tween} = {}
+    # the clock callback advancing the tweens, transforms, tweens and callback belong to the active render context
+    scheduled: Optional[Callable[[float], None]] = None
+
+    @staticmethod
+    def animate(element: Any, duration: float, easing="ease_in_out", on_done: Optional[Callable[[], None]] = None,
+                **targets):
+        # targets are x, y, opacity or scale, every tween starts from the current value. A tween of the same
+        # property replaces the running one, the callback runs once all tweens of this call finished
+        cache_id = element if isinstance(element, str) else element.cache_id
+        if not isinstance(element, str):
+            # ancestors that were hashed before the animation started would still be drawn from the cache
+            element.invalidate_hash()
+        transform = Animator.transforms.setdefault(cache_id, Transform())
+        remaining = [len(targets)]
+
+        def done():
+            remaining[0] -= 1
+            if not remaining[0] and on_done is not None:
+                on_done()
+
+        for name, end in targets.items():
+            if name not in Transform.__slots__:
+                raise AttributeError(f"no animatable property {name}")
+            Animator.tweens[(cache_id, name)] = Tween(cache_id, name, getattr(transform, name), end,
+                                                      max(duration, 0.0), easing, done)
+        if not Animator.scheduled:
+            Animator.scheduled = Backend.bind(Animator.tick)
+            Backend.current().schedule_interval(Animator.scheduled, Animator.interval)
+
+    @staticmethod
+    def stop(cache_id: str, name: Optional[str] = None):
+        # the transform keeps the values reached so far
+        for key in [key for key in Animator.tweens if key[0] == cache_id and name in (None, key[1])]:
+            del Animator.tweens[key]
+        transform = Animator.transforms.get(cache_id)
+        if transform is not None and transform.values() == Transform.identity:
+            del Animator.transforms[cache_id]
+
+    @staticmethod
+    def reset(cache_id: str):
+        Animator.stop(cache_id)
+        Animator.transforms.pop(cache_id, None)
+
+    @staticmethod
+    def active(cache_id: str) -> bool:
+        return cache_id in Animator.transforms
+
+    @staticmethod
+    def tick(dt: float):
+        finished = []
+        for key, tween in Animator.tweens.items():
+            tween.elapsed += dt
+            t = min(tween.elapsed / tween.duration, 1.0) if tween.duration > 0 else 1.0
+            value = tween.start + (tween.end - tween.start) * tween.easing(t)
+            setattr(Animator.transforms[tween.cache_id], tween.name, value)
+            if t >= 1.0:
+                finished.append(key)
+        for key in finished:
+            tween = Animator.tweens.pop(key)
+            transform = Animator.transforms[tween.cache_id]
+            # an element back at rest is cached with its parents again
+            if transform.values() == Transform.identity and not any(k[0] == tween.cache_id for k in Animator.tweens):
+                del Animator.transforms[tween.cache_id]
+            if tween.on_done is not None:
+                tween.on_done()
+        if not Animator.tweens:
+            if Animator.scheduled:
+                Backend.current().unschedule(Animator.scheduled)
+            Animator.scheduled = None
@@ -0,0 +1,329 @@
+import threading
+from typing import Optional, Any, Callable
+
+from gluipy.clip import ClipStack
+from gluipy.interface import RenderBackend, TextField
+from gluipy.pipeline import MainThread
+
+
+class Backend:
+    _current: Optional[RenderBackend] = None
+    # set by the render contexts, see RenderContext.bind
+    binder: Optional[Callable[[Callable], Callable]] = None
+
+    @staticmethod
+    def current() -> RenderBackend:
+        if Backend._current is None:
+            # imported here so that the layout core never needs pyglet unless something is actually drawn
+            from gluipy.pyglet_backend import PygletBackend
+            Backend._current = PygletBackend()
+        return Backend._current
+
+    @staticmethod
+    def use(backend: RenderBackend):
+        Backend._current = backend
+
+    @staticmethod
+    def bind(callback: Callable) -> Callable:
+        # a clock callback that works on the state of the active render context
+        return Backend.binder(callback) if Backend.binder is not None else callback
+
+
+class TextMetrics:
+    # text sizes shared by every element, safe to use from layout worker threads
+
+    def __init__(self, measure: Callable[[str, str, int], Any], main_thread_only: bool, max_entries=50000):
+        self._measure = measure
+        self.main_thread_only = main_thread_only
+        self.max_entries = max_entries
+        self._sizes: {tuple: (int, int)} = {}
+        self._lock = threading.Lock()
+
+    def size(self, text: str, font_name: str, font_size: int) -> (int, int):
+        key = (text, font_name, font_size)
+        size = self._sizes.get(key)
+        if size is None:
+            if self.main_thread_only:
+                size = MainThread.call(self._measure, text, font_name, font_size)
+            else:
+                size = self._measure(text, font_name, font_size)
+            with self._lock:
+                if len(self._sizes) >= self.max_entries:
+                    self._sizes.clear()
+                self._sizes[key] = size
+        return size
+
+    def clear(self):
+        with self._lock:
+            self._sizes.clear()
+
+    def items(self) -> [(tuple, (int, int))]:
+        with self._lock:
+            return list(self._sizes.items())
+
+    def preload(self, items):
+        with self._lock:
+            self._sizes.update(items)
+
+
+class ManualClock:
+    # stands in for pyglet.clock when nothing drives an event loop, time only moves with advance
+
+    def __init__(self):
+        self.time = 0.0
+        self._scheduled: [list] = []
+
+    def schedule_once(self, callback, delay):
+        self._scheduled.append([self.time + delay, callback, None])
+
+    def schedule_interval(self, callback, interval):
+        self._scheduled.append([self.time + interval, callback, interval])
+
+    def unschedule(self, callback):
+        self._scheduled = [entry for entry in self._scheduled if entry[1] != callback]
+
+    def advance(self, dt: float):
+        self.time += dt
+        due = [entry for entry in self._scheduled if entry[0] <= self.time]
+        for entry in due:
+            if entry[2] is None:
+                self._scheduled.remove(entry)
+            else:
+                entry[0] = self.time + entry[2]
+            entry[1](dt)
+
+
+class NullText:
+
+    def __init__(self, text, font_name, font_size, color):
+        self.text = text
+        self.font_name = font_name
+        self.font_size = font_size
+        self.color = color
+        self.x = 0
+        self.y = 0
+
+
+class NullDocument:
+
+    def __init__(self, text):
+        self.text = text or ""
+
+
+class NullLayout:
+
+    def __init__(self, document):
+        self.document = document
+        self.x = 0
+        self.y = 0
+        self.width = 0
+        self.height = 0
+        self.batch = None
+
+
+class NullCaret:
+
+    def __init__(self, document):
+        self.document = document
+        self.position = len(document.text)
+
+    def update_batch(self, batch, color):
+        pass
+
+    def on_text(self, text):
+        self.document.text = self.document.text[:self.position] + text + self.document.text[self.position:]
+        self.position += len(text)
+
+    def on_text_motion(self, motion):
+        pass
+
+    def on_text_motion_select(self, motion):
+        pass
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        pass
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        pass
+
+
+class NullTextField(TextField):
+
+    def __init__(self, text):
+        self.document = NullDocument(text)
+        self.layout = NullLayout(self.document)
+        self.caret = NullCaret(self.document)
+
+    def draw(self, x, y, w, h, batch, active):
+        self.layout.x, self.layout.y, self.layout.width, self.layout.height = x, y, w, h
+
+
+class NullBackend(RenderBackend):
+    # measures text with fixed font metrics and draws nothing, layout runs without a window or GL context
+    char_width = 0.6
+    line_height = 1.25
+    units_per_point = 2
+    scale = 1.0
+
+    def __init__(self):
+        self.clip = ClipStack()
+        self.metrics = TextMetrics(self._measure, main_thread_only=False)
+        self.clock = ManualClock()
+
+    def begin_frame(self, window: Any):
+        self.clip.reset(1.0)
+
+    def update_scale(self, window: Any):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def new_batch(self) -> Any:
+        return []
+
+    def draw_batch(self, batch: Any):
+        pass
+
+    def batch_stats(self, batch: Any) -> dict:
+        return {"domains": 0, "vertices": 0, "transient": 0, "commands": len(batch)}
+
+    def warm_up_font(self, font_name, font_size, glyphs):
+        pass
+
+    def text(self, text, font_name, font_size, color) -> NullText:
+        return NullText(text, font_name, font_size, color)
+
+    def set_text(self, handle: NullText, text: str):
+        handle.text = text
+
+    def text_size(self, handle: NullText) -> (int, int):
+        return self.metrics.size(handle.text, handle.font_name, handle.font_size)
+
+    def measure_text(self, text, font_name, font_size) -> (int, int):
+        return self.metrics.size(text, font_name, font_size)
+
+    def _measure(self, text, font_name, font_size) -> (int, int):
+        pixel_size = font_size * 96 / 72
+        return int(pixel_size * self.char_width * len(text)), int(pixel_size * self.line_height)
+
+    def place_text(self, handle: NullText, x, y, batch):
+        handle.x, handle.y = x, y
+
+    def text_field(self, text, font_name, font_size, color) -> TextField:
+        return NullTextField(text)
+
+    def draw_caret(self, x, y0, y1, color):
+        pass
+
+    def draw_rect(self, x, y, w, h, color, opacity=255):
+        pass
+
+    def draw_strip(self, vertices, color):
+        pass
+
+    def draw_rects(self, rects):
+        pass
+
+    def push_clip_rect(self, x, y, w, h):
+        self.clip.push_rect(x, y, w, h)
+
+    def pop_clip_rect(self):
+        self.clip.pop_rect()
+
+    def push_clip_mask(self, x, y, w, h, vertices):
+        self.clip.push_mask(x, y, w, h, vertices)
+
+    def pop_clip_mask(self, vertices):
+        self.clip.pop_mask(vertices)
+
+    def draw_outside_mask(self, vertices, color):
+        pass
+
+    def clip_contains(self, x, y, w, h) -> bool:
+        return self.clip.contains(x, y, w, h)
+
+    def capture(self, x, y, w, h) -> Optional[Any]:
+        return None
+
+    def draw_capture(self, handle, x, y, batch, opacity=255, scale=1.0):
+        pass
+
+    def read_capture(self, handle) -> Optional[tuple]:
+        return None
+
+    def load_capture(self, w, h, data) -> Optional[Any]:
+        return None
+
+    def release(self, handle):
+        pass
+
+    def release_capture(self, handle):
+        pass
+
+    def schedule_once(self, callback, delay):
+        self.clock.schedule_once(callback, delay)
+
+    def schedule_interval(self, callback, interval):
+        self.clock.schedule_interval(callback, interval)
+
+    def unschedule(self, callback):
+        self.clock.unschedule(callback)
+
+    def on_key_press(self, symbol, modifiers):
+        pass
+
+
+class RecordingBackend(NullBackend):
+    # records every draw command of a frame, used for layout regression tests and profiling without GL
+
+    def __init__(self):
+        super().__init__()
+        self.commands: [tuple] = []
+
+    def begin_frame(self, window: Any):
+        super().begin_frame(window)
+        self.commands = []
+
+    def draw_batch(self, batch: Any):
+        self.commands.extend(batch)
+        batch.clear()
+
+    def place_text(self, handle: NullText, x, y, batch):
+        super().place_text(handle, x, y, batch)
+        command = ("text", handle.text, x, y, handle.font_size, handle.color)
+        if batch is None:
+            self.commands.append(command)
+        else:
+            batch.append(command)
+
+    def draw_rect(self, x, y, w, h, color, opacity=255):
+        self.commands.append(("rect", x, y, w, h, tuple(color), opacity))
+
+    def draw_caret(self, x, y0, y1, color):
+        self.commands.append(("caret", x, y0, y1, tuple(color)))
+
+    def draw_strip(self, vertices, color):
+        self.commands.append(("strip", len(vertices) // 2, tuple(color)))
+
+    def draw_rects(self, rects):
+        self.commands.append(("rects", len(rects)))
+
+    def push_clip_rect(self, x, y, w, h):
+        super().push_clip_rect(x, y, w, h)
+        self.commands.append(("push_clip", *self.clip.current()))
+
+    def pop_clip_rect(self):
+        super().pop_clip_rect()
+        self.commands.append(("pop_clip",))
+
+    def push_clip_mask(self, x, y, w, h, vertices):
+        super().push_clip_mask(x, y, w, h, vertices)
+        self.commands.append(("push_mask", *self.clip.current(), self.clip.stencil_level))
+
+    def pop_clip_mask(self, vertices):
+        super().pop_clip_mask(vertices)
+        self.commands.append(("pop_mask",))
+
+    def draw_outside_mask(self, vertices, color):
+        self.commands.append(("outside_mask", len(vertices) // 2, tuple(color)))
@@ -1,17 +1,34 @@
-from typing import Protocol, Optional
-import pyglet
-from pyglet import gl, image, sprite
-
+import re
+import zlib
+from functools import partial
+from time import perf_counter
+from typing import Protocol, Optional, Any, Callable
+
+from gluipy.animation import Animator
+from gluipy.backend import Backend
 from gluipy.cache import Cache
+from gluipy.fonts import Fonts, COMMON_GLYPHS
 from gluipy.interface import UIElement, View, TextInputProtocol, ViewModel
+from gluipy.pipeline import Pipeline, Job, LayoutResult
+from gluipy.profiler import Profiler
+from gluipy.rendercontext import RenderContext
 
 
 class ModifierMeta(type):
-    modifiers = {}
+    # attribute name -> factory(element, *args, **kwargs), both "onclick" and "on_click" are registered up front
+    modifiers: {str: Callable} = {}
+    # set by gluipy.modifier, folds a layer into the element's chain of modifiers
+    decorate: Optional[Callable] = None
 
     def __init__(cls, clsname, bases, methods):
         super().__init__(clsname, bases, methods)
-        ModifierMeta.modifiers[cls.__name__.lower()] = cls
+        if "as_layer" in methods:
+            def factory(element, *args, **kwargs):
+                return ModifierMeta.decorate(element, cls.as_layer(*args, **kwargs))
+        else:
+            factory = cls
+        ModifierMeta.modifiers[cls.__name__.lower()] = factory
+        ModifierMeta.modifiers[camel_to_snake(cls.__name__)] = factory
 
 
 class ModifierProtocolMeta(ModifierMeta, type(Protocol)):
@@ -19,69 +36,140 @@ class ModifierProtocolMeta(ModifierMeta, type(Protocol)):
 
 
 def camel_to_snake(name):
-    return ''.join(word for word in name.split('_'))
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+PRIORITIES = ("h_compression_resistance", "h_hugging_force", "v_compression_resistance", "v_hugging_force")
+
+
+def _priority(i: int) -> property:
+    def get(self) -> int:
+        return self._priorities[i]
+
+    def set(self, value: int):
+        self._priorities = self._priorities[:i] + (value,) + self._priorities[i + 1:]
+
+    return property(get, set)
 
 
 class BaseUIElement(UIElement):
+    # every layout builds a new tree, slots instead of a __dict__ per element keep the trees small and halve the
+    # objects the garbage collector has to track. Subclasses list their own attributes, the ones without __slots__
+    # (e.g. in applications) get a __dict__ as before
+    __slots__ = ("_x", "_y", "_w", "_h", "cache_id", "container", "_structural_hash", "_priorities", "__weakref__")
     caching = True
-    h_compression_resistance = 750
-    h_hugging_force = 750
-    v_compression_resistance = 750
-    v_hugging_force = 750
-    _x = None
-    _y = None
-    _w = None
-    _h = None
+    # compression resistance and hugging force, horizontal then vertical. The elements of a class share the tuple
+    # until one of them changes a value, the four class attributes a subclass declares are folded into it
+    priorities = (750, 750, 750, 750)
+    h_compression_resistance = _priority(0)
+    h_hugging_force = _priority(1)
+    v_compression_resistance = _priority(2)
+    v_hugging_force = _priority(3)
     background_color = None
     background_opacity = 255
-    cache_id = None
 
-    def _state_hash(self) -> Optional[str]:
-        return None
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        declared = [cls.__dict__.get(name) for name in PRIORITIES]
+        if any(value is not None for value in declared):
+            cls.priorities = tuple(p if value is None else value for p, value in zip(cls.priorities, declared))
+            for name, value in zip(PRIORITIES, declared):
+                if value is not None:
+                    delattr(cls, name)
+
+    def __new__(cls, *args, **kwargs):
+        # slots have no defaults, the ones read before they are assigned start out unset here
+        element = super().__new__(cls)
+        element._x = element._y = element._w = element._h = None
+        element.cache_id = element.container = element._structural_hash = None
+        element._priorities = cls.priorities
+        return element
+
+    def _own_state(self) -> tuple:
+        # what this node alone looks like, children contribute their own cached hashes
+        return ()
+
+    def _state_hash(self) -> Optional[int]:
+        if self._structural_hash is None:
+            self._structural_hash = hash((type(self), self._own_state()))
+        return self._structural_hash
+
+    def _stable_hash(self) -> int:
+        # unlike _state_hash the same in every process, keys the snapshots of the disk cache
+        return zlib.crc32(repr((type(self).__qualname__, self._own_state())).encode())
+
+    def _disk_key(self, w, h) -> str:
+        return f"{self.cache_id}|{self._stable_hash():08x}|{w}x{h}|{Cache.scale}"
+
+    def invalidate_hash(self):
+        # a cached hash implies cached hashes all the way down, so the walk stops at the first cleared ancestor
+        node = self
+        while node is not None and node._structural_hash is not None:
+            node._structural_hash = None
+            node = node.container
 
     def request_redraw(self):
         self._x, self._y, self._w, self._h = None, None, None, None
 
-    def __getattr__(self, item):
-        item_name = ''.join(word for word in item.split('_'))
-        if item_name in ModifierMeta.modifiers:
-            cls = ModifierMeta.modifiers[item_name]
+    def mount(self):
+        # called by the view once the element is part of the drawn tree
+        pass
 
-            def func(*args, **kwargs):
-                return cls(self, *args, **kwargs)
+    def unmount(self, replaced: bool):
+        # the element left the drawn tree and releases the GL objects it created. Replaced tells whether an element
+        # with the same cache id took its place, state kept per cache id is only dropped when none did
+        pass
 
-            return func
-        raise AttributeError(f"no attribute {item} found")
+    def __getattr__(self, item):
+        factory = ModifierMeta.modifiers.get(item)
+        if factory is None:
+            raise AttributeError(f"no attribute {item} found")
+        return partial(factory, self)
 
-    def draw_cached(self, x: int, y: int, w: int, h: int, batch: pyglet.graphics.Batch) -> bool:
+    def draw_cached(self, x: int, y: int, w: int, h: int, batch: Any) -> bool:
         object_hash, state_hash = self.cache_id, self._state_hash()
         if object_hash is not None and state_hash is not None:
             cached_element = Cache.get_cached_uielement(object_hash, state_hash)
+            if cached_element is None and Cache.disk is not None:
+                cached_element = Cache.load_disk(object_hash, state_hash, self._disk_key(w, h), x, y, w, h)
             if cached_element is not None:
+                transform = Animator.transforms.get(object_hash) if Animator.transforms else None
+                if transform is not None:
+                    return cached_element.draw_transformed(x, y, w, h, batch, transform)
                 return cached_element.draw(x, y, w, h, batch)
         return False
 
-    def draw(self, x: int, y: int, w: int, h: int, batch: pyglet.graphics.Batch, cached=True) -> bool:
-
+    def draw(self, x: int, y: int, w: int, h: int, batch: Any, cached=True) -> bool:
+        started = Profiler.enabled and perf_counter()
         caching_now = self.cache_id and self.caching and cached
         if caching_now:
+            lookup_started = started and perf_counter()
             was_cached = self.draw_cached(x, y, w, h, batch)
+            if started:
+                Profiler.record("cache_lookup", lookup_started, self.cache_id)
             if was_cached:
                 self._x, self._y, self._w, self._h = x, y, w, h
+                if started:
+                    Profiler.record_element(self.cache_id, started, True)
                 return True
-        draw_batch = pyglet.graphics.Batch() if caching_now else batch
+        backend = Backend.current()
+        draw_batch = backend.new_batch() if caching_now else batch
         self.draw_content(x, y, w, h, draw_batch)
         self._x, self._y, self._w, self._h = x, y, w, h
         if caching_now:
-            draw_batch.draw()
+            backend.draw_batch(draw_batch)
+            save_started = started and perf_counter()
             object_hash, state_hash = self.cache_id, self._state_hash()
-            buffer = image.get_buffer_manager().get_color_buffer()
-            if 0 <= x and x + w <= buffer.width and 0 <= y and y + h <= buffer.height:
-                try:
-                    sprt = sprite.Sprite(img=buffer.get_region(x, y, w, h).get_texture())
-                    Cache.save_cache(object_hash, state_hash, x, y, w, h, sprt)
-                except:
-                    pass
+            # without a state the pixels are transient, e.g. placeholders, and not worth a capture
+            captured = backend.capture(x, y, w, h) if state_hash is not None else None
+            if captured is not None:
+                Cache.save_cache(object_hash, state_hash, x, y, w, h, captured)
+                if Cache.disk is not None:
+                    Cache.disk.put(self.cache_id, self._disk_key(w, h), captured)
+            if started:
+                Profiler.record("cache_save", save_started, self.cache_id)
+        if started and self.cache_id:
+            Profiler.record_element(self.cache_id, started, False if caching_now else None)
         return False
 
     def click(self, x, y, button, modifiers, view):
@@ -95,32 +183,66 @@ class BaseUIElement(UIElement):
         pass
 
 
+def walk(element: Optional[UIElement]):
+    # the element and everything below it, depth first
+    if element is not None:
+        yield element
+        for e in getattr(element, "elements", ()):
+            yield from walk(e)
+
+
+def unmount_tree(element: Optional[UIElement], replaced: bool):
+    for node in walk(element):
+        node.unmount(replaced)
+
+
 class BaseView(View):
     root: Optional[UIElement]
-
-    def __init__(self, window: pyglet.window.Window = None):
+    # in points, the size drawn into without a window unless draw is given one
+    size = (800, 600)
+
+    def __init__(self, window: Any = None, backend: Any = None, pipeline: Optional[Pipeline] = None):
+        # without a window the view can still lay out and draw into a null or recording backend
+        if backend is not None:
+            Backend.use(backend)
+        # windows that share GL objects share the cache, the glyph atlas and the text metrics
+        self.render_context = RenderContext.for_window(window) if window is not None else None
+        if self.render_context is not None:
+            self.render_context.activate()
+        # with a pipeline content() and the measure pass run on a worker thread, the main thread only swaps the
+        # finished tree in and draws it
+        self.pipeline = pipeline
+        self._layout_pending = False
+        self._polling = False
+        self.layout_version = None
         self.redraw = False
-        self.batch = pyglet.graphics.Batch()
+        self.batch = Backend.current().new_batch()
         self.window = window
-        pyglet.gl.glScalef(0.5, 0.5, 0.5)
         self._focus: Optional[TextInputProtocol] = None
         self._models: [ViewModel] = []
         self.root = None
         self.focus_x = None
         self.focus_y = None
+        if window is not None:
+            self._register_events(window)
+
+    def _register_events(self, window):
 
         def on_mouse_scroll(x, y, scroll_x, scroll_y):
-            self.on_mouse_scroll(x * 2, y * 2, scroll_x * 2, scroll_y * 2)
+            u = Backend.current().units_per_point
+            self.on_mouse_scroll(x * u, y * u, scroll_x * u, scroll_y * u)
 
         window.event(on_mouse_scroll)
 
         def on_mouse_motion(x, y, dx, dy):
-            self.on_mouse_motion(x * 2, y * 2, dx * 2, dy * 2)
+            u = Backend.current().units_per_point
+            self.on_mouse_motion(x * u, y * u, dx * u, dy * u)
 
         window.event(on_mouse_motion)
 
         def on_mouse_press(x, y, button, modifiers):
-            self.click(x * 2, y * 2, button, modifiers)
+            u = Backend.current().units_per_point
+            self.click(x * u, y * u, button, modifiers)
 
         window.event(on_mouse_press)
 
@@ -130,7 +252,8 @@ class BaseView(View):
         window.event(on_text)
 
         def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
-            self.on_mouse_drag(x, y, dx, dy, buttons, modifiers)
+            u = Backend.current().units_per_point
+            self.on_mouse_drag(x * u, y * u, dx * u, dy * u, buttons, modifiers)
 
         window.event(on_mouse_drag)
 
@@ -154,15 +277,40 @@ class BaseView(View):
 
         window.event(on_resize)
 
+        def on_close():
+            self.on_close()
+
+        window.event(on_close)
+
     @property
     def focus(self) -> Optional[TextInputProtocol]:
         return self._focus
 
     @focus.setter
     def focus(self, new_value: Optional[TextInputProtocol]):
-        if self._focus is not None:
-            self._focus.active = False
+        old = self._focus
+        if old is not None:
+            old.active = False
         self._focus = new_value
+        # a focused element that was replaced by a layout in the meantime is unmounted now
+        if old is not None and old is not new_value and all(node is not old for node in walk(self.root)):
+            old.unmount(any(node.cache_id == old.cache_id for node in walk(self.root)))
+
+    def warm_up(self, idle=False, glyphs=COMMON_GLYPHS,
+                on_done: Optional[Callable[[], None]] = None) -> {(str, int): float}:
+        # loads the fonts of the view and rasterizes the common glyphs, either right away, e.g. behind a splash
+        # frame, or one font per idle tick. Building the tree once declares the fonts it uses
+        if self.render_context is not None:
+            self.render_context.activate()
+        backend = Backend.current()
+        if self.window is not None:
+            backend.update_scale(self.window)
+        if not Fonts.declared:
+            self.content()
+        if idle:
+            Fonts.warm_up_idle(glyphs=glyphs, on_done=on_done)
+            return {}
+        return Fonts.warm_up(glyphs=glyphs)
 
     def register_model(self, model: ViewModel):
         self._models.append(model)
@@ -171,27 +319,38 @@ class BaseView(View):
         self._models.remove(model)
 
     def draw(self, x=None, y=None, w=None, h=None, batch=None):
-        if self.window is not None:
-            self.window.clear()
-            gl.glEnable(gl.GL_BLEND)
-            gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
-            # gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
-            # gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
-            backdrop = pyglet.shapes.Rectangle(0, 0, self.window.width * 2, self.window.height * 2, (230, 230, 230))
-            backdrop.draw()
+        if Profiler.enabled:
+            Profiler.begin_frame()
+        if self.render_context is not None:
+            self.render_context.activate()
+        backend = Backend.current()
+        backend.begin_frame(self.window)
+        Cache.set_scale(backend.scale)
 
         self.layout()
         own_batch = batch is None
         if not own_batch:
             self.batch = batch
 
-        self.root.draw(x if x else 0, y if y else 0, w if w else self.window.width * 2,
-                       h if h else self.window.height * 2, self.batch)
+        started = Profiler.enabled and perf_counter()
+        if self.root is not None:
+            u = backend.units_per_point
+            width, height = (self.window.width, self.window.height) if self.window is not None else self.size
+            self.root.draw(x if x else 0, y if y else 0, w if w else width * u, h if h else height * u, self.batch)
         if own_batch:
-            self.batch.draw()
+            backend.draw_batch(self.batch)
+        if started:
+            Profiler.record("draw", started)
+            Profiler.end_frame()
+            if Profiler.overlay and self.window is not None:
+                Profiler.draw_overlay(10, self.window.height * backend.units_per_point - 10)
+        backend.end_frame()
 
     def layout(self):
-        if self.root is None:
+        started = Profiler.enabled and perf_counter()
+        if self.pipeline is not None:
+            self.pipeline.poll()
+        if self.root is None and not self._layout_pending:
             self.redraw = True
         if not self.redraw:
             for m in self._models:
@@ -200,15 +359,81 @@ class BaseView(View):
                     break
         if self.redraw:
             self.redraw = False
-            self.root = self.content()
-            self.root.size_requested()
+            if self.pipeline is None:
+                self.set_root(self.content())
+                measure_started = started and perf_counter()
+                self.root.size_requested()
+                if started:
+                    Profiler.record("measure", measure_started)
+            else:
+                # a newer request cancels the layout still running for an older model state
+                self._layout_pending = True
+                self.pipeline.submit("layout", self._build_layout, self._swap_layout)
+                if not self._polling:
+                    self._polling = True
+                    Backend.current().schedule_interval(self._poll_pipeline, 1 / 60)
+        if started:
+            Profiler.record("layout", started)
+
+    def _build_layout(self, job: Job) -> LayoutResult:
+        root = self.content()
+        job.check()
+        size = root.size_requested()
+        return LayoutResult(job.version, root, size)
+
+    def set_root(self, root: Optional[UIElement]):
+        # elements of the old tree that are not part of the new one are unmounted, new ones are mounted. Every
+        # layout builds new elements, most of them are replaced by one with the same cache id
+        old = {id(node): node for node in walk(self.root)}
+        new = {id(node): node for node in walk(root)}
+        cache_ids = {node.cache_id for node in new.values()}
+        focus = self._focus
+        if focus is not None and id(focus) not in new:
+            # typing goes on in the element that took the focused one's place, with its text and caret
+            successor = next((node for node in new.values()
+                              if node.cache_id == focus.cache_id and type(node) is type(focus)), None)
+            if successor is not None:
+                if hasattr(successor, "adopt"):
+                    successor.adopt(focus)
+                successor.active = focus.active
+                self._focus = successor
+        for key, node in old.items():
+            # the focused element keeps receiving text until the focus moves
+            if key not in new and node is not self._focus:
+                node.unmount(node.cache_id in cache_ids)
+        for key, node in new.items():
+            if key not in old:
+                node.mount()
+        self.root = root
+
+    def _swap_layout(self, result: LayoutResult):
+        self.set_root(result.root)
+        self.layout_version = result.version
+        self._layout_pending = False
+
+    def _poll_pipeline(self, dt):
+        # keeps frames coming while workers are busy, the pipeline itself is polled by layout
+        if not self.pipeline.pending:
+            Backend.current().unschedule(self._poll_pipeline)
+            self._polling = False
 
     def on_resize(self, width, height):
         self.redraw = True
 
+    def on_close(self):
+        # the captures are read back and the GL objects deleted while the GL context still exists
+        if self.render_context is not None:
+            self.render_context.activate()
+        Cache.flush()
+        self.focus = None
+        self.set_root(None)
+        if self.render_context is not None:
+            RenderContext.release_window(self.window)
+
     def click(self, x, y, button, modifiers):
         self.focus = None
-        self.root.click(x, y, button, modifiers, self)
+        if self.root is not None:
+            self.root.click(x, y, button, modifiers, self)
 
         if self.focus:
             self.focus.caret.on_mouse_press(x, y, button, modifiers)
@@ -230,13 +455,15 @@ class BaseView(View):
     def on_text_motion_select(self, motion):
         if self.focus:
             self.focus.caret.on_text_motion_select(motion)
+            self.focus.invalidate_hash()
 
     def on_key_press(self, symbol, modifiers):
-        if symbol == pyglet.window.key.ESCAPE:
-            pyglet.app.exit()
+        Backend.current().on_key_press(symbol, modifiers)
 
     def on_mouse_motion(self, x, y, dx, dy):
-        self.root.on_mouse_motion(x, y, dx, dy)
+        if self.root is not None:
+            self.root.on_mouse_motion(x, y, dx, dy)
 
     def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
-        self.root.on_mouse_scroll(x, y, scroll_x, scroll_y)
+        if self.root is not None:
+            self.root.on_mouse_scroll(x, y, scroll_x, scroll_y)
@@ -0,0 +1,117 @@
+from typing import Any, Callable, Optional
+
+from gluipy.backend import Backend
+from gluipy.pipeline import Pipeline, Job
+
+
+class Binding:
+    # sits between an input and a model attribute. Values are coalesced while the debounce window is open, written at
+    # most once per throttle window and never written back when they did not change. With a compute function the
+    # expensive part of the update runs on the pipeline, a newer value cancels the computation of a stale one
+    bindings: {(int, str): "Binding"} = {}
+
+    def __init__(self, model: Any, attribute: str, debounce=0.0, throttle=0.0,
+                 pipeline: Optional[Pipeline] = None,
+                 compute: Optional[Callable[[Any, Job], Any]] = None,
+                 apply: Optional[Callable[[Any, Any], None]] = None):
+        self.model = model
+        self.attribute = attribute
+        self.debounce = debounce
+        self.throttle = throttle
+        self.pipeline = pipeline
+        self.compute = compute
+        self.apply = apply
+        self.written = getattr(model, attribute, None)
+        self.pending = None
+        self.has_pending = False
+        self._debouncing = False
+        self._throttled = False
+        self._polling = False
+        self._job: Optional[Job] = None
+        # inputs are rebuilt with every layout, the binding of a model attribute outlives them
+        Binding.bindings[(id(model), attribute)] = self
+
+    @staticmethod
+    def of(model: Any, attribute: str) -> "Binding":
+        binding = Binding.bindings.get((id(model), attribute))
+        if binding is None or binding.model is not model:
+            binding = Binding(model, attribute)
+        return binding
+
+    @property
+    def value(self) -> Any:
+        return self.pending if self.has_pending else self.written
+
+    def set(self, value: Any):
+        if value == self.value:
+            return
+        self.pending = value
+        self.has_pending = True
+        if self.debounce > 0:
+            backend = Backend.current()
+            backend.unschedule(self._debounced)
+            backend.schedule_once(self._debounced, self.debounce)
+            self._debouncing = True
+        elif not self._throttled:
+            self.flush()
+
+    def flush(self):
+        if not self.has_pending:
+            return
+        value = self.pending
+        self.pending = None
+        self.has_pending = False
+        if value == self.written:
+            return
+        self.written = value
+        self._write(value)
+        if self.throttle > 0:
+            self._throttled = True
+            Backend.current().schedule_once(self._end_throttle, self.throttle)
+
+    def cancel(self):
+        backend = Backend.current()
+        backend.unschedule(self._debounced)
+        backend.unschedule(self._end_throttle)
+        self._debouncing = self._throttled = False
+        self.pending = None
+        self.has_pending = False
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+
+    def _debounced(self, dt):
+        self._debouncing = False
+        if not self._throttled:
+            self.flush()
+
+    def _end_throttle(self, dt):
+        self._throttled = False
+        if not self._debouncing:
+            self.flush()
+
+    def _write(self, value: Any):
+        if self.compute is None:
+            setattr(self.model, self.attribute, value)
+            return
+        if self.pipeline is None:
+            self._apply(value, self.compute(value, Job(self.attribute, 0, None, None)))
+            return
+        self._job = self.pipeline.submit(f"binding|{id(self)}", lambda job: self.compute(value, job),
+                                         lambda result: self._apply(value, result))
+        if not self._polling:
+            self._polling = True
+            Backend.current().schedule_interval(self._poll, 1 / 60)
+
+    def _apply(self, value: Any, result: Any):
+        self._job = None
+        if self.apply is not None:
+            self.apply(value, result)
+        else:
+            setattr(self.model, self.attribute, result)
+
+    def _poll(self, dt):
+        self.pipeline.poll()
+        if not self.pipeline.pending:
+            Backend.current().unschedule(self._poll)
+            self._polling = False
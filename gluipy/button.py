@@ -1,10 +1,11 @@
-from typing import Optional
-
+from gluipy.base import unmount_tree
 from gluipy.modifier import Border
 from gluipy.text import Label
 
 
 class Button(Border):
+    __slots__ = ("label", "not_hover_color", "hover_color", "not_hover_background_color", "hover_background_color",
+                 "hover", "dirty")
 
     def __init__(self, text: str, cache_id=None, font_name='San Francisco, Hevetica Neue, Helvetica, Sans Serif',
                  font_size=24, color=(210, 210, 210, 255), hover_color=(255, 255, 255, 255),
@@ -21,12 +22,17 @@ class Button(Border):
         self.dirty = None
 
     def on_mouse_motion(self, x, y, dx, dy):
-        # print(self._x, x, self._x + self._w, self._y, x,self._y + self._h)
-        self.hover = self._x < x < self._x + self._w and self._y < y < self._y + self._h
-
-    def _state_hash(self) -> Optional[str]:
-        state_dict = super(Button, self)._state_hash() + f"{str(self.hover)}"
-        return state_dict
+        if self._x is None:
+            return
+        hover = self._x < x < self._x + self._w and self._y < y < self._y + self._h
+        if hover != self.hover:
+            self.hover = hover
+            self.invalidate_hash()
+
+    def _own_state(self) -> tuple:
+        # the border color is only picked in draw_content, the state has to be the same before and after drawing
+        return (self.not_hover_color, self.hover_color, self.not_hover_background_color, self.hover_background_color,
+                self.radius, self.thickness, self.hover)
 
     def draw_content(self, x, y, w, h, batch):
         self.color = self.hover_color if self.hover else self.not_hover_color
@@ -35,6 +41,7 @@ class Button(Border):
         old_label = self.elements[0].elements[0]
         padding = list(old_label.padding)
         padding[3] -= int(old_label.font_size/4)
+        unmount_tree(self.elements[0], True)
         self.elements[0] = Label(old_label.text, f"{self.cache_id}-label",
                                  font_name=old_label.font_name,
                                  font_size=old_label.font_size, color=self.color,
@@ -1,8 +1,9 @@
-import json
-
-from pyglet import graphics
+from typing import Any
 
+from gluipy.backend import Backend
+from gluipy.diskcache import DiskCache
 from gluipy.interface import UIElement
+from gluipy.resources import Resources
 
 
 class CachedUIElement(UIElement):
@@ -14,21 +15,34 @@ class CachedUIElement(UIElement):
         self.y = y
         self.x = x
 
-    def draw(self, x: int, y: int, w: int, h: int, batch: graphics.Batch, cached=True):
+    def draw(self, x: int, y: int, w: int, h: int, batch: Any, cached=True):
+        if self.w != w or self.h != h:
+            return False
+        self.x = x
+        self.y = y
+        Backend.current().draw_capture(self.sprite, x, y, batch)
+        return True
+
+    def draw_transformed(self, x: int, y: int, w: int, h: int, batch: Any, transform) -> bool:
         if self.w != w or self.h != h:
             return False
         self.x = x
         self.y = y
-        self.sprite.x = x
-        self.sprite.y = y
-        self.sprite.batch = batch
-        self.sprite.draw()
+        s = transform.scale
+        Backend.current().draw_capture(self.sprite, x + transform.x + w * (1 - s) / 2,
+                                       y + transform.y + h * (1 - s) / 2, batch, round(transform.opacity), s)
         return True
 
 
 class Cache:
     object_cache = {}
     state_cache = {}
+    # captures are device pixels, every pixel ratio has its own entries so that moving a window between displays
+    # renders each element once per ratio instead of on every move
+    scale = 1.0
+    scales = {}
+    # optional second tier, captures survive the process
+    disk: DiskCache = None
 
     @staticmethod
     def get_cached_uielement(object_dict, state_dict):
@@ -40,7 +54,7 @@ class Cache:
             if current_state == state_hash:
                 return Cache.state_cache[state_hash]
             else:
-                del Cache.state_cache[current_state]
+                Cache._release(object_hash, Cache.state_cache.pop(current_state))
                 del Cache.object_cache[object_hash]
                 return None
         #else:
@@ -54,11 +68,45 @@ class Cache:
         if object_hash in Cache.object_cache.keys():
             current_state = Cache.object_cache[object_hash]
             try:
-                del Cache.state_cache[current_state]
+                Cache._release(object_hash, Cache.state_cache.pop(current_state))
             except:
                 pass
+        if state_hash in Cache.state_cache:
+            Cache._release(object_hash, Cache.state_cache[state_hash])
         Cache.object_cache[object_hash] = state_hash
         Cache.state_cache[state_hash] = CachedUIElement(x, y, w, h, sprite)
+        if Resources.debug:
+            Resources.created("Cache")
 
+    @staticmethod
+    def _release(object_dict, cached: CachedUIElement):
+        # nothing refers to the capture once it left the tables, its texture is deleted right away
+        if Cache.disk is not None:
+            Cache.disk.discard(object_dict, cached.sprite)
+        Backend.current().release_capture(cached.sprite)
+        if Resources.debug:
+            Resources.released("Cache")
 
+    @staticmethod
+    def set_scale(scale: float):
+        if scale != Cache.scale:
+            Cache.scales[Cache.scale] = (Cache.object_cache, Cache.state_cache)
+            Cache.object_cache, Cache.state_cache = Cache.scales.pop(scale, ({}, {}))
+            Cache.scale = scale
+
+    @staticmethod
+    def use_disk(path: str, max_bytes=256 * 1024 * 1024, version: str = ""):
+        Cache.disk = DiskCache(path, max_bytes, version)
 
+    @staticmethod
+    def load_disk(object_dict, state_dict, key, x, y, w, h):
+        pixels = Cache.disk.get(key)
+        if pixels is None:
+            return None
+        Cache.save_cache(object_dict, state_dict, x, y, w, h, Backend.current().load_capture(*pixels))
+        return Cache.state_cache[hash(state_dict)]
+
+    @staticmethod
+    def flush():
+        if Cache.disk is not None:
+            Cache.disk.flush()
@@ -0,0 +1,62 @@
+from typing import Optional
+
+
+class ClipStack:
+    # keeps track of the nested clip regions, render backends override the _apply hooks to enforce them
+
+    def __init__(self):
+        # layout units to framebuffer pixels, set by the backend at the beginning of every frame
+        self.scale: float = 1.0
+        self.rects: [(int, int, int, int)] = []
+        self.stencil_level: int = 0
+
+    def reset(self, scale: float):
+        self.scale = scale
+        self.rects = []
+        self.stencil_level = 0
+
+    def current(self) -> Optional[tuple]:
+        return self.rects[-1] if self.rects else None
+
+    def contains(self, x, y, w, h) -> bool:
+        if not self.rects:
+            return True
+        cx, cy, cw, ch = self.rects[-1]
+        return cx <= x and x + w <= cx + cw and cy <= y and y + h <= cy + ch
+
+    def push_rect(self, x, y, w, h):
+        if self.rects:
+            cx, cy, cw, ch = self.rects[-1]
+            nx, ny = max(x, cx), max(y, cy)
+            w = max(min(x + w, cx + cw) - nx, 0)
+            h = max(min(y + h, cy + ch) - ny, 0)
+            x, y = nx, ny
+        self.rects.append((x, y, w, h))
+        self._apply_rect()
+
+    def pop_rect(self):
+        self.rects.pop()
+        self._apply_rect()
+
+    def push_mask(self, x, y, w, h, vertices: [float]):
+        # the mask is confined to its bounding box, every nesting level increments the stencil value
+        # of the pixels it covers so that parent masks stay intact
+        self.push_rect(x, y, w, h)
+        self._write_mask(vertices, True)
+        self.stencil_level += 1
+        self._apply_stencil()
+
+    def pop_mask(self, vertices: [float]):
+        self._write_mask(vertices, False)
+        self.stencil_level -= 1
+        self._apply_stencil()
+        self.pop_rect()
+
+    def _apply_rect(self):
+        pass
+
+    def _apply_stencil(self):
+        pass
+
+    def _write_mask(self, vertices: [float], increment: bool):
+        pass
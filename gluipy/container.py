@@ -1,13 +1,16 @@
+import zlib
 from functools import reduce
+from time import perf_counter
 from typing import Optional
 
-from pyglet import gl
-
+from gluipy.animation import Animator
 from gluipy.base import BaseUIElement
 from gluipy.interface import UIElement, Container
+from gluipy.profiler import Profiler
 
 
 class BaseContainer(Container, BaseUIElement):
+    __slots__ = ("elements", "gutter")
     H = "w"
     V = "h"
     direction: str = H
@@ -27,11 +30,11 @@ class BaseContainer(Container, BaseUIElement):
 
     def pre_layout(self, direction):
         if direction == self.direction == BaseContainer.H:
-            self.h_compression_resistance = min(map(lambda x: x.h_compression_resistance, self.elements))
-            self.h_hugging_force = min(map(lambda x: x.h_hugging_force, self.elements))
+            self._priorities = (min(e._priorities[0] for e in self.elements),
+                                min(e._priorities[1] for e in self.elements), *self._priorities[2:])
         if direction == self.direction == BaseContainer.V:
-            self.v_compression_resistance = min(map(lambda x: x.v_compression_resistance, self.elements))
-            self.v_hugging_force = min(map(lambda x: x.v_hugging_force, self.elements))
+            self._priorities = (*self._priorities[:2], min(e._priorities[2] for e in self.elements),
+                                min(e._priorities[3] for e in self.elements))
 
     def _object_hash(self) -> Optional[dict]:
         hash_dict = {"w": self._w, "h": self._h}
@@ -41,21 +44,53 @@ class BaseContainer(Container, BaseUIElement):
                 hash_dict.update({f"e_{i}": e._object_hash()})
         return hash_dict
 
-    def _state_hash(self) -> Optional[str]:
-        state_dict = "|".join([e._state_hash() for e in self.elements])
-        return state_dict
+    def _state_hash(self) -> Optional[int]:
+        if self._structural_hash is None:
+            hashes = [e._state_hash() for e in self.elements]
+            # an element without a state makes its containers transient as well, so does an animated one, its
+            # capture is drawn with a transform the container's capture would freeze
+            if None in hashes:
+                return None
+            if Animator.transforms and any(e.cache_id in Animator.transforms for e in self.elements):
+                return None
+            self._structural_hash = hash((type(self), self._own_state(), *hashes))
+        return self._structural_hash
+
+    def _stable_hash(self) -> int:
+        return zlib.crc32(repr((type(self).__qualname__, self._own_state(),
+                                [e._stable_hash() for e in self.elements])).encode())
 
     def draw_content(self, x, y, w, h, batch):
+        started = Profiler.enabled and perf_counter()
+        self.arrange(w, h)
+        if started:
+            Profiler.record("arrange", started, self.cache_id)
+
+        # loop through elements and draw them with their allocated space
+        current_x = x
+        current_y = y
+        cached = len(self.elements) > 1
+        for elem in self.elements:
+            this_w = elem._w if self.direction == BaseContainer.H else self._w
+            this_h = elem._h if self.direction == BaseContainer.V else self._h
+            elem.draw(current_x, current_y, this_w, this_h, batch, cached=cached)
+            if self.direction == BaseContainer.H:
+                current_x += elem._w + self.gutter
+            else:
+                current_y += elem._h + self.gutter
+        self._x, self._y, self._w, self._h = x, y, w, h
+
+    def arrange(self, w, h):
         # if direction allocated space is less then requested
         dir_attr = "_w" if self.direction == BaseContainer.H else "_h"
         allocated_space = w if self.direction == BaseContainer.H else h
         desired_space = getattr(self, dir_attr)
         temp_space = desired_space
         # if direction allocated space is less then requested
-        cr_attr = "h_compression_resistance" if self.direction == BaseContainer.H else "v_compression_resistance"
+        cr = 0 if self.direction == BaseContainer.H else 2
         if temp_space > allocated_space:
             # sort elements by compression resistance
-            sorted_els = sorted(self.elements, key=lambda elem: getattr(elem, cr_attr))
+            sorted_els = sorted(self.elements, key=lambda elem: elem._priorities[cr])
             # until we fit into the allocated space
             index = 0
             while temp_space > allocated_space:
@@ -64,9 +99,9 @@ class BaseContainer(Container, BaseUIElement):
                 if index >= len(sorted_els):
                     # we are giving up
                     break
-                compression_resistance = getattr(sorted_els[index], cr_attr)
+                compression_resistance = sorted_els[index]._priorities[cr]
                 for el in sorted_els[index:]:
-                    if getattr(el, cr_attr) > compression_resistance:
+                    if el._priorities[cr] > compression_resistance:
                         break
                     to_update.append(el)
                     index += 1
@@ -82,15 +117,15 @@ class BaseContainer(Container, BaseUIElement):
                     temp_space = self.resize_proportionally(allocated_space, dir_attr, temp_space, to_update)
         # if direction allocated space is more then requested
         if temp_space < allocated_space:
-            hf_attr = "h_hugging_force" if self.direction == BaseContainer.H else "v_hugging_force"
+            hf = 1 if self.direction == BaseContainer.H else 3
             # sort elements by hugging force
-            sorted_els = sorted(self.elements, key=lambda elem: getattr(elem, hf_attr))
+            sorted_els = sorted(self.elements, key=lambda elem: elem._priorities[hf])
             # take the first entries
             to_update = []
 
-            hugging_force = getattr(sorted_els[0], hf_attr)
+            hugging_force = sorted_els[0]._priorities[hf]
             for el in sorted_els:
-                if getattr(el, hf_attr) > hugging_force:
+                if el._priorities[hf] > hugging_force:
                     break
                 to_update.append(el)
             # set their direction size so that it fills the allocated space
@@ -105,20 +140,6 @@ class BaseContainer(Container, BaseUIElement):
         # update own space allocation, and use it later to draw children
         setattr(self, other_attr, other_allocated_space)
 
-        # loop through elements and draw them with their allocated space
-        current_x = x
-        current_y = y
-        cached = len(self.elements) > 1
-        for elem in self.elements:
-            this_w = elem._w if self.direction == BaseContainer.H else self._w
-            this_h = elem._h if self.direction == BaseContainer.V else self._h
-            elem.draw(current_x, current_y, this_w, this_h, batch, cached=cached)
-            if self.direction == BaseContainer.H:
-                current_x += elem._w + self.gutter
-            else:
-                current_y += elem._h + self.gutter
-        self._x, self._y, self._w, self._h = x, y, w, h
-
     def resize_proportionally(self, allocated_space, dir_attr, desired_space, elements):
         space_diff = desired_space - allocated_space
         selected_el_space = reduce(lambda a, b: a+b, map(lambda elem: getattr(elem, dir_attr), elements))
@@ -169,6 +190,7 @@ class BaseContainer(Container, BaseUIElement):
 
 
 class VContainer(BaseContainer):
+    __slots__ = ()
     direction = BaseContainer.V
     h_compression_resistance = 750
     h_hugging_force = 750
@@ -177,6 +199,7 @@ class VContainer(BaseContainer):
 
 
 class HContainer(BaseContainer):
+    __slots__ = ()
     direction = BaseContainer.H
     h_compression_resistance = 700
     h_hugging_force = 700
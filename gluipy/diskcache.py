@@ -0,0 +1,133 @@
+import json
+import math
+import mmap
+import os
+from typing import Any, Optional
+
+from gluipy.backend import Backend
+from gluipy.idle import IdleScheduler
+
+FORMAT = 1
+
+
+class DiskCache:
+    # the pixels of captured elements in a single pack file, located through a JSON index. Entries are written behind
+    # on flush, read through a memory map and only uploaded to a texture when the element is drawn. The stamp
+    # invalidates everything at once, applications pass a version that changes with their data or code
+    pack_name = "pack.bin"
+    index_name = "index.json"
+    # pending captures flushed by the idle scheduler, after the work ahead of the views, and not only on close
+    flush_after = 64
+
+    def __init__(self, path: str, max_bytes=256 * 1024 * 1024, version: str = ""):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stamp = f"{FORMAT}|{version}|{type(Backend.current()).__name__}"
+        # key: [offset, length, w, h, last use]
+        self.entries: {str: list} = {}
+        self.metrics: [list] = []
+        self.tick = 0
+        # newest capture of every cache id, read back from the GPU on flush
+        self.pending: {str: (str, Any)} = {}
+        self._map: Optional[mmap.mmap] = None
+        self._pack = None
+        os.makedirs(path, exist_ok=True)
+        self._load_index()
+        Backend.current().metrics.preload((tuple(m[:3]), tuple(m[3:])) for m in self.metrics)
+
+    def _file(self, name) -> str:
+        return os.path.join(self.path, name)
+
+    def _load_index(self):
+        try:
+            with open(self._file(self.index_name)) as f:
+                index = json.load(f)
+            if index.get("stamp") == self.stamp:
+                self.entries = index["entries"]
+                self.metrics = index.get("metrics", [])
+                self.tick = max((entry[4] for entry in self.entries.values()), default=0)
+        except:
+            self.entries = {}
+        if not self.entries:
+            # a missing, broken or outdated index discards the pack
+            with open(self._file(self.pack_name), "wb"):
+                pass
+
+    def _mapped(self, end: int) -> Optional[mmap.mmap]:
+        if self._map is None or len(self._map) < end:
+            self.close()
+            if os.path.getsize(self._file(self.pack_name)) < end:
+                return None
+            self._pack = open(self._file(self.pack_name), "rb")
+            self._map = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get(self, key: str) -> Optional[tuple]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        offset, length, w, h, _ = entry
+        data = self._mapped(offset + length)
+        if data is None:
+            del self.entries[key]
+            return None
+        self.tick += 1
+        entry[4] = self.tick
+        return w, h, data[offset:offset + length]
+
+    def put(self, cache_id: str, key: str, handle: Any):
+        if key not in self.entries:
+            self.pending[cache_id] = (key, handle)
+            if len(self.pending) == DiskCache.flush_after:
+                IdleScheduler.submit("disk-cache", self.path, math.inf, self.flush)
+
+    def discard(self, cache_id: str, handle: Any):
+        # a capture released before the flush can no longer be read back
+        pending = self.pending.get(cache_id)
+        if pending is not None and pending[1] is handle:
+            del self.pending[cache_id]
+
+    def flush(self):
+        IdleScheduler.cancel("disk-cache", self.path)
+        backend = Backend.current()
+        with open(self._file(self.pack_name), "ab") as pack:
+            for key, handle in self.pending.values():
+                pixels = backend.read_capture(handle)
+                if pixels is None:
+                    continue
+                w, h, data = pixels
+                self.tick += 1
+                self.entries[key] = [pack.tell(), len(data), w, h, self.tick]
+                pack.write(data)
+        self.pending = {}
+        if os.path.getsize(self._file(self.pack_name)) > self.max_bytes:
+            self._evict()
+        self.metrics = [[*key, *size] for key, size in backend.metrics.items()]
+        with open(self._file(self.index_name) + ".tmp", "w") as f:
+            json.dump({"stamp": self.stamp, "entries": self.entries, "metrics": self.metrics}, f)
+        os.replace(self._file(self.index_name) + ".tmp", self._file(self.index_name))
+
+    def _evict(self):
+        # the most recently used entries that fit into half the budget are copied into a new pack
+        kept, size = {}, 0
+        for key, entry in sorted(self.entries.items(), key=lambda item: -item[1][4]):
+            if size + entry[1] > self.max_bytes // 2:
+                break
+            kept[key] = entry
+            size += entry[1]
+        data = self._mapped(max((e[0] + e[1] for e in kept.values()), default=0))
+        with open(self._file(self.pack_name) + ".tmp", "wb") as pack:
+            for entry in kept.values():
+                chunk = data[entry[0]:entry[0] + entry[1]]
+                entry[0] = pack.tell()
+                pack.write(chunk)
+        self.close()
+        os.replace(self._file(self.pack_name) + ".tmp", self._file(self.pack_name))
+        self.entries = kept
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._pack.close()
+            self._map = None
+            self._pack = None
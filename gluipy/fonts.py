@@ -0,0 +1,57 @@
+from time import perf_counter
+from typing import Callable, Optional
+
+from gluipy.backend import Backend
+from gluipy.profiler import Profiler
+
+# printable ASCII and Latin-1, covers what the examples display
+COMMON_GLYPHS = "".join(map(chr, range(32, 127))) + "".join(map(chr, range(161, 256)))
+
+
+class Fonts:
+    # every font and size an element was created with. Warming them up loads the font and rasterizes the common
+    # glyphs into the atlas before the first frame needs them, instead of stalling whichever frame shows them first
+    declared: {(str, int): None} = {}
+    timings: {(str, int): float} = {}
+
+    @staticmethod
+    def declare(font_name: str, font_size: int):
+        Fonts.declared[(font_name, font_size)] = None
+
+    @staticmethod
+    def pending() -> [(str, int)]:
+        return [font for font in Fonts.declared if font not in Fonts.timings]
+
+    @staticmethod
+    def warm_up_font(font_name: str, font_size: int, glyphs=COMMON_GLYPHS) -> float:
+        started = perf_counter()
+        Backend.current().warm_up_font(font_name, font_size, glyphs)
+        seconds = Fonts.timings[(font_name, font_size)] = perf_counter() - started
+        Profiler.record_startup(f"font {font_name} {font_size}", seconds)
+        return seconds
+
+    @staticmethod
+    def warm_up(fonts: Optional[list] = None, glyphs=COMMON_GLYPHS) -> {(str, int): float}:
+        for font_name, font_size in fonts or Fonts.pending():
+            Fonts.warm_up_font(font_name, font_size, glyphs)
+        return dict(Fonts.timings)
+
+    @staticmethod
+    def warm_up_idle(fonts: Optional[list] = None, glyphs=COMMON_GLYPHS,
+                     on_done: Optional[Callable[[], None]] = None):
+        # one font per scheduler tick, frames keep being drawn in between
+        queue = list(fonts or Fonts.pending())
+
+        def step(dt):
+            if queue:
+                Fonts.warm_up_font(*queue.pop(0), glyphs)
+            if queue:
+                Backend.current().schedule_once(step, 0)
+            elif on_done is not None:
+                on_done()
+
+        Backend.current().schedule_once(step, 0)
+
+    @staticmethod
+    def report() -> str:
+        return "\n".join(f"{name} {size}: {seconds * 1000:.1f}ms" for (name, size), seconds in Fonts.timings.items())
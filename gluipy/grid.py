@@ -0,0 +1,208 @@
+import math
+from bisect import bisect_right, bisect_left
+from itertools import accumulate
+from typing import Any, Callable, Optional
+
+from gluipy.backend import Backend
+from gluipy.base import BaseUIElement
+from gluipy.fonts import Fonts
+from gluipy.rendercontext import RenderContext
+from gluipy.scroll import Scrollable
+from gluipy.table import TableModel, TableDelegate
+from gluipy.text import Label
+
+
+class GridColumn:
+
+    def __init__(self, title: str, value: Callable[[Any], Any], width: Optional[int] = None, frozen=False):
+        # without a width the column is as wide as its title or the widest of the sampled values
+        self.title = title
+        self.value = value
+        self.width = width
+        self.frozen = frozen
+
+
+class Grid(Scrollable, BaseUIElement, TableDelegate):
+    __slots__ = ("scroll_id", "grid_id", "model", "font_name", "font_size", "color", "header_color", "padding",
+                 "frozen", "scrolling", "line_height", "frozen_widths", "widths", "frozen_starts", "starts",
+                 "h_offset", "offset", "_used")
+    # only the cells intersecting the viewport are drawn, frozen columns stay on the left while the others scroll
+    # horizontally. The cell labels outlive the element and are reused by the rows and columns scrolled into view
+    cells: {str: {tuple: Label}} = {}
+    h_offsets: {str: int} = {}
+    # the batches of the header and the body outlive the element as well, text that stays in the same batch is only
+    # moved instead of laid out again. Cells that leave the view are parked in a batch that is never drawn
+    batches: {tuple: Any} = {}
+    in_view: {str: set} = {}
+    parking = None
+    row_gap = 2
+    sample_rows = 100
+    v_hugging_force = 200
+    v_compression_resistance = 200
+    h_hugging_force = 200
+    h_compression_resistance = 200
+
+    def __init__(self, columns: [GridColumn], model: TableModel, grid_id: str,
+                 font_name='San Francisco, Hevetica Neue, Helvetica, Sans Serif', font_size=20,
+                 color=(20, 30, 80, 255), header_color=(40, 60, 60, 255), padding=(8, 4, 8, 4)):
+        self.cache_id = grid_id
+        self.scroll_id = grid_id
+        self.grid_id = grid_id
+        self.model = model
+        self.model.set_table_delegate(self)
+        self.font_name = font_name
+        self.font_size = font_size
+        Fonts.declare(font_name, font_size)
+        self.color = color
+        self.header_color = header_color
+        self.padding = padding
+        self.frozen = [c for c in columns if c.frozen]
+        self.scrolling = [c for c in columns if not c.frozen]
+        self.line_height = Backend.current().measure_text("Mg", font_name, font_size)[1] + padding[1] + padding[3]
+        self.frozen_widths = [self._column_width(c) for c in self.frozen]
+        self.widths = [self._column_width(c) for c in self.scrolling]
+        self.frozen_starts = list(accumulate(self.frozen_widths, initial=0))
+        # left edges of the scrolling columns, the visible range is found by bisection
+        self.starts = list(accumulate(self.widths, initial=0))
+        self.h_offset = Grid.h_offsets.get(grid_id, 0)
+        Grid.cells.setdefault(grid_id, {})
+        self.restore_offset()
+
+    def _column_width(self, column: GridColumn) -> int:
+        if column.width is not None:
+            return column.width
+        measure = Backend.current().measure_text
+        width = measure(column.title, self.font_name, self.font_size)[0]
+        for i in range(min(len(self.model), self.sample_rows)):
+            width = max(width, measure(str(column.value(self.model[i])), self.font_name, self.font_size)[0])
+        return width + self.padding[0] + self.padding[2]
+
+    def _own_state(self) -> tuple:
+        return self.model.model_state(), self.offset, self.h_offset
+
+    def row_height(self) -> int:
+        return self.line_height
+
+    def row_count(self) -> int:
+        return len(self.model)
+
+    def viewport_height(self) -> int:
+        return self._h - self.line_height
+
+    def viewport_width(self, w) -> int:
+        return w - self.frozen_starts[-1]
+
+    def max_h_offset(self, w) -> int:
+        return max(self.starts[-1] - self.viewport_width(w), 0)
+
+    def visible_columns(self, w) -> (int, int):
+        first = max(bisect_right(self.starts, self.h_offset) - 1, 0)
+        last = min(bisect_left(self.starts, self.h_offset + self.viewport_width(w)), len(self.scrolling))
+        return first, last
+
+    def scroll_to_column(self, offset, w):
+        offset = min(max(offset, 0), self.max_h_offset(w))
+        if offset != self.h_offset:
+            self.h_offset = offset
+            Grid.h_offsets[self.grid_id] = offset
+            self.invalidate_hash()
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        if self._x is not None and self._x < x < self._x + self._w and self._y < y < self._y + self._h:
+            if scroll_x:
+                self.scroll_to_column(self.h_offset + scroll_x * self.scroll_step, self._w)
+            if scroll_y:
+                self.scroll_to(self.offset + scroll_y * self.scroll_step, self.viewport_height())
+
+    def unmount(self, replaced: bool):
+        if not replaced:
+            for cell in Grid.cells.pop(self.grid_id, {}).values():
+                cell.unmount(False)
+            for key in [key for key in Grid.batches if key[0] == self.grid_id]:
+                del Grid.batches[key]
+            Grid.in_view.pop(self.grid_id, None)
+            Grid.h_offsets.pop(self.grid_id, None)
+            Scrollable.offsets.pop(self.scroll_id, None)
+
+    def size_requested(self) -> (int, int):
+        self._w = self.frozen_starts[-1] + self.starts[-1]
+        self._h = self.line_height * (min(len(self.model), 10) + 1)
+        return self._w, self._h
+
+    def _cell(self, key: tuple, text: str, color) -> Label:
+        # slots are taken modulo the visible rows and columns, a cell scrolled out of view is reused by the one
+        # scrolled in and cells that stay in view keep their text
+        cells = Grid.cells.setdefault(self.grid_id, {})
+        self._used.add(key)
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = Label(text, font_name=self.font_name, font_size=self.font_size, color=color,
+                                      padding=self.padding)
+        elif cell.text != text:
+            cell.text = text
+        return cell
+
+    def _column_slots(self, vw) -> int:
+        # the most scrolling columns that can intersect the viewport at once
+        starts = self.starts
+        return max((bisect_left(starts, starts[i] + vw) - i for i in range(len(self.scrolling))), default=0) + 1
+
+    def _batch(self, *key):
+        batch = Grid.batches.get((self.grid_id, *key))
+        if batch is None:
+            batch = Grid.batches[(self.grid_id, *key)] = Backend.current().new_batch()
+        return batch
+
+    def _draw_columns(self, tag, columns, starts, first, last, x0, area_x, area_w, y, body_h, rows, slots):
+        backend = Backend.current()
+        row_slots = math.ceil(body_h / (self.line_height + self.row_gap)) + 1
+        # the header is clipped to its own row and the body below it, partially scrolled rows never cover the titles
+        backend.push_clip_rect(area_x, y + body_h, area_w, self.line_height)
+        header_batch = self._batch(tag, "header")
+        for c in range(first, last):
+            self._cell((tag, c % slots), columns[c].title, self.header_color) \
+                .draw(x0 + starts[c], y + body_h, starts[c + 1] - starts[c], self.line_height, header_batch, False)
+        backend.draw_batch(header_batch)
+        backend.pop_clip_rect()
+        backend.push_clip_rect(area_x, y, area_w, body_h)
+        body_batch = self._batch(tag, "body")
+        for r in range(*rows):
+            item = self.model[r]
+            top = self.row_top(y, body_h, r)
+            for c in range(first, last):
+                self._cell((tag, c % slots, r % row_slots), str(columns[c].value(item)), self.color) \
+                    .draw(x0 + starts[c], top - self.line_height, starts[c + 1] - starts[c], self.line_height,
+                          body_batch, False)
+        backend.draw_batch(body_batch)
+        backend.pop_clip_rect()
+
+    def draw_content(self, x, y, w, h, batch):
+        backend = Backend.current()
+        self._x, self._y, self._w, self._h = x, y, w, h
+        self._used = set()
+        self.scroll_to(self.offset, self.viewport_height())
+        self.scroll_to_column(self.h_offset, w)
+        body_h = h - self.line_height
+        rows = self.visible_rows(body_h)
+        frozen_w = self.frozen_starts[-1]
+        backend.draw_rect(x, y + body_h, w, self.line_height, (220, 225, 225))
+        first, last = self.visible_columns(w)
+        self._draw_columns("s", self.scrolling, self.starts, first, last, x + frozen_w - self.h_offset,
+                           x + frozen_w, w - frozen_w, y, body_h, rows, self._column_slots(w - frozen_w))
+        if self.frozen:
+            backend.draw_rect(x, y, frozen_w, body_h, (240, 240, 240))
+            self._draw_columns("f", self.frozen, self.frozen_starts, 0, len(self.frozen), x, x, frozen_w, y, body_h,
+                               rows, len(self.frozen))
+        cells = Grid.cells.setdefault(self.grid_id, {})
+        for key in Grid.in_view.get(self.grid_id, set()) - self._used:
+            if cells[key].label is not None:
+                if Grid.parking is None:
+                    Grid.parking = backend.new_batch()
+                backend.place_text(cells[key].label, 0, 0, Grid.parking)
+        Grid.in_view[self.grid_id] = self._used
+
+    def current_item(self) -> int:
+        return self.visible_rows(0)[0]
+
+
+RenderContext.pool(Grid, cells=dict, batches=dict, in_view=dict, parking=lambda: None)
@@ -0,0 +1,78 @@
+import heapq
+from itertools import count
+from time import perf_counter
+from typing import Callable, Hashable, Optional
+
+from gluipy.backend import Backend
+
+
+class IdleScheduler:
+    # work done while the main loop has slack, e.g. rendering rows before they are scrolled into view. Every clock
+    # tick runs the queued tasks with the lowest priority first until the budget is used up, at least one of them.
+    # A task is identified by its group and key, submitting it again replaces it and a group is cancelled at once
+    budget = 0.004
+    interval = 1 / 60
+    # [priority, sequence, group, key, task], cancelled entries stay in the heap without their task
+    queue: [list] = []
+    entries: {(Hashable, Hashable): list} = {}
+    sequence = count()
+    # the clock callback running this queue, queue, entries and callback belong to the active render context
+    scheduled: Optional[Callable[[float], int]] = None
+    stats = {"ran": 0, "cancelled": 0, "ticks": 0, "failed": 0}
+    # a failing task is counted and its error kept, other tasks still run. With debug set the error is raised
+    debug = False
+    error: Optional[BaseException] = None
+
+    @staticmethod
+    def submit(group: Hashable, key: Hashable, priority: float, task: Callable[[], None]):
+        IdleScheduler.cancel(group, key)
+        entry = [priority, next(IdleScheduler.sequence), group, key, task]
+        IdleScheduler.entries[(group, key)] = entry
+        heapq.heappush(IdleScheduler.queue, entry)
+        if not IdleScheduler.scheduled:
+            IdleScheduler.scheduled = Backend.bind(IdleScheduler.run)
+            Backend.current().schedule_interval(IdleScheduler.scheduled, IdleScheduler.interval)
+
+    @staticmethod
+    def cancel(group: Hashable, key: Optional[Hashable] = None):
+        # without a key every task of the group is cancelled
+        if key is None:
+            keys = [k for k in IdleScheduler.entries if k[0] == group]
+        else:
+            keys = [(group, key)] if (group, key) in IdleScheduler.entries else []
+        for k in keys:
+            IdleScheduler.entries.pop(k)[4] = None
+            IdleScheduler.stats["cancelled"] += 1
+
+    @staticmethod
+    def pending() -> int:
+        return len(IdleScheduler.entries)
+
+    @staticmethod
+    def run(dt=0.0, budget: Optional[float] = None) -> int:
+        started = perf_counter()
+        budget = IdleScheduler.budget if budget is None else budget
+        queue = IdleScheduler.queue
+        ran = 0
+        IdleScheduler.stats["ticks"] += 1
+        while queue and (not ran or perf_counter() - started < budget):
+            _, _, group, key, task = heapq.heappop(queue)
+            if task is None:
+                continue
+            del IdleScheduler.entries[(group, key)]
+            ran += 1
+            try:
+                task()
+            except Exception as e:
+                IdleScheduler.stats["failed"] += 1
+                IdleScheduler.error = e
+                if IdleScheduler.debug:
+                    IdleScheduler.stats["ran"] += ran
+                    raise
+        IdleScheduler.stats["ran"] += ran
+        if not IdleScheduler.entries:
+            IdleScheduler.queue = []
+            if IdleScheduler.scheduled:
+                Backend.current().unschedule(IdleScheduler.scheduled)
+            IdleScheduler.scheduled = None
+        return ran
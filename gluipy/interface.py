@@ -1,10 +1,9 @@
-from abc import ABC, abstractmethod
 from typing import Protocol, Optional, Any
 
-import pyglet
-
 
 class UIElement(Protocol):
+    # elements and their mixins declare __slots__, an empty one here keeps the implementations free of a __dict__
+    __slots__ = ()
     container: "Container"
     h_compression_resistance: int
     h_hugging_force: int
@@ -15,7 +14,7 @@ class UIElement(Protocol):
     _w: Optional[int]
     _h: Optional[int]
 
-    def draw(self, x: int, y: int, w: int, h: int, batch: pyglet.graphics.Batch, cached=False) -> bool:
+    def draw(self, x: int, y: int, w: int, h: int, batch: Any, cached=False) -> bool:
         pass
 
     def size_requested(self) -> (int, int):
@@ -30,29 +29,61 @@ class UIElement(Protocol):
     def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
         pass
 
+    def mount(self):
+        pass
+
+    def unmount(self, replaced: bool):
+        pass
+
 
 class Container(UIElement, Protocol):
+    __slots__ = ()
     elements: [UIElement]
     gutter: int
     direction: str
 
 
-class AbstractDynamicCaret(pyglet.text.caret.Caret, ABC):
+class AbstractDynamicCaret(Protocol):
+    position: int
+
+    def update_batch(self, batch: Any, color: (int, int, int)):
+        pass
+
+    def on_text(self, text: str):
+        pass
+
+    def on_text_motion(self, motion):
+        pass
+
+    def on_text_motion_select(self, motion):
+        pass
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        pass
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        pass
+
+
+class TextField(Protocol):
+    document: Any
+    layout: Any
+    caret: AbstractDynamicCaret
 
-    @abstractmethod
-    def update_batch(self, batch: pyglet.graphics.Batch, color: (int, int, int)):
+    def draw(self, x: int, y: int, w: int, h: int, batch: Any, active: bool):
         pass
 
 
 class TextInputProtocol(UIElement, Protocol):
+    __slots__ = ()
     color: (int, int, int, int)
     model: Any
     model_attribute: str
     font_size: int
     font_name: str
     length: int
-    document: pyglet.text.document.UnformattedDocument
-    layout: pyglet.text.layout.IncrementalTextLayout
+    document: Any
+    layout: Any
     caret: AbstractDynamicCaret
 
     @property
@@ -76,9 +107,114 @@ class ViewModel(Protocol):
         pass
 
 
+class RenderBackend(Protocol):
+    # window points to layout units, layout units to device pixels
+    units_per_point: int
+    scale: float
+
+    def begin_frame(self, window: Any):
+        pass
+
+    def update_scale(self, window: Any):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def new_batch(self) -> Any:
+        pass
+
+    def draw_batch(self, batch: Any):
+        pass
+
+    def batch_stats(self, batch: Any) -> dict:
+        pass
+
+    def warm_up_font(self, font_name: str, font_size: int, glyphs: str):
+        pass
+
+    def text(self, text: str, font_name: str, font_size: int, color: (int, int, int, int)) -> Any:
+        pass
+
+    def set_text(self, handle: Any, text: str):
+        pass
+
+    def text_size(self, handle: Any) -> (int, int):
+        pass
+
+    def measure_text(self, text: str, font_name: str, font_size: int) -> (int, int):
+        pass
+
+    def place_text(self, handle: Any, x: float, y: float, batch: Any):
+        pass
+
+    def text_field(self, text: str, font_name: str, font_size: int, color: (int, int, int, int)) -> TextField:
+        pass
+
+    def draw_caret(self, x: int, y0: int, y1: int, color: (int, int, int, int)):
+        pass
+
+    def draw_rect(self, x: int, y: int, w: int, h: int, color: (int, int, int), opacity=255):
+        pass
+
+    def draw_strip(self, vertices: [float], color: (int, int, int)):
+        pass
+
+    def draw_rects(self, rects: [(int, int, int, int, (int, int, int))]):
+        pass
+
+    def push_clip_rect(self, x: int, y: int, w: int, h: int):
+        pass
+
+    def pop_clip_rect(self):
+        pass
+
+    def push_clip_mask(self, x: int, y: int, w: int, h: int, vertices: [float]):
+        pass
+
+    def pop_clip_mask(self, vertices: [float]):
+        pass
+
+    def draw_outside_mask(self, vertices: [float], color: (int, int, int)):
+        pass
+
+    def clip_contains(self, x: int, y: int, w: int, h: int) -> bool:
+        pass
+
+    def capture(self, x: int, y: int, w: int, h: int) -> Optional[Any]:
+        pass
+
+    def read_capture(self, handle: Any) -> Optional[tuple]:
+        pass
+
+    def load_capture(self, w: int, h: int, data: bytes) -> Any:
+        pass
+
+    def draw_capture(self, handle: Any, x: int, y: int, batch: Any, opacity=255, scale=1.0):
+        pass
+
+    def release(self, handle: Any):
+        pass
+
+    def release_capture(self, handle: Any):
+        pass
+
+    def schedule_once(self, callback, delay: float):
+        pass
+
+    def schedule_interval(self, callback, interval: float):
+        pass
+
+    def unschedule(self, callback):
+        pass
+
+    def on_key_press(self, symbol, modifiers):
+        pass
+
+
 class View(Protocol):
-    batch: pyglet.graphics.Batch
-    window: pyglet.window.Window
+    batch: Any
+    window: Any
 
     @property
     def focus(self) -> Optional[TextInputProtocol]:
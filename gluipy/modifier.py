@@ -1,16 +1,15 @@
 import math
 from math import pi, floor, ceil
-from typing import Optional
+from typing import Optional, Any
 
+from gluipy.backend import Backend
 from gluipy.base import ModifierMeta, ModifierProtocolMeta, BaseUIElement
 from gluipy.interface import UIElement
 from gluipy.container import BaseContainer
-from pyglet.graphics import draw, Batch
-from pyglet import gl, shapes, graphics
-from pyglet.shapes import Line, Arc
 
 
 class Border(BaseContainer, metaclass=ModifierProtocolMeta):
+    __slots__ = ("color", "radius", "thickness", "shapes")
     direction = BaseContainer.H
     start_angles = {"sw": pi, "se": - pi / 2, "ne": 0.0, "nw": pi / 2}
 
@@ -21,10 +20,17 @@ class Border(BaseContainer, metaclass=ModifierProtocolMeta):
         self.color = color
         self.radius = radius
         self.thickness = thickness
-        self.h_compression_resistance = element.h_compression_resistance
-        self.h_hugging_force = element.h_hugging_force
-        self.v_compression_resistance = element.v_compression_resistance
-        self.v_hugging_force = element.v_hugging_force
+        self._priorities = element._priorities
+        self.shapes = []
+
+    @staticmethod
+    def as_layer(thickness=2, radius=6, color=(100, 120, 120)) -> tuple:
+        return "border", thickness, radius, color
+
+    def unmount(self, replaced: bool):
+        backend = Backend.current()
+        for shape in self.shapes:
+            backend.release(shape)
         self.shapes = []
 
     def size_requested(self) -> (int, int):
@@ -33,45 +39,17 @@ class Border(BaseContainer, metaclass=ModifierProtocolMeta):
         self._h += self.thickness * 2
         return self._w, self._h
 
-    def _state_hash(self) -> Optional[str]:
-        state_dict = super(Border, self)._state_hash() + f"|{self.color}|{self.radius}|{self.thickness}"
-        return state_dict
+    def _own_state(self) -> tuple:
+        return self.color, self.radius, self.thickness
 
     def draw_content(self, x, y, w, h, batch):
         self.shapes = []
-        gl.glEnable(gl.GL_STENCIL_TEST)
-        gl.glStencilMask(0xFF)
-        gl.glDepthMask(0x00)
-        gl.glClearStencil(0)
-        gl.glClear(gl.GL_STENCIL_BUFFER_BIT)
-        gl.glColorMask(gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE)
-        gl.glStencilFunc(gl.GL_ALWAYS, 1, 0xFF)
-        gl.glStencilOp(gl.GL_KEEP, gl.GL_REPLACE, gl.GL_REPLACE)
-        gl.glColor4f(1, 0, 0, 1.0)
-        self._draw_mask(x + self.thickness,
-                        y + self.thickness,
-                        w - 2 * self.thickness,
-                        h - 2 * self.thickness,
-                        max(self.radius - self.thickness, 0))
-        gl.glColorMask(gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE)
-        gl.glStencilMask(0x00)
-        gl.glDepthMask(0xFF)
-        gl.glStencilFunc(gl.GL_EQUAL, 1, 0xFF)
-        gl.glStencilOp(gl.GL_KEEP, gl.GL_KEEP, gl.GL_KEEP)
-
-        new_batch = Batch()
         # _h _w are use to cache the original requested size, if we do not subtract the thickness super.draw
         # will assume that we got less space and squeeze the content
         self._w -= 2 * self.thickness
         self._h -= 2 * self.thickness
-        self.draw_elements(x, y, w, h, new_batch)
-        new_batch.draw()
-        gl.glStencilFunc(gl.GL_NOTEQUAL, 1, 0xFF)
-        gl.glColor4f(self.color[0]/255, self.color[1]/255, self.color[2]/255, 1.0)
-
-        self._draw_mask(x, y, w, h, self.radius)
-
-        gl.glDisable(gl.GL_STENCIL_TEST)
+        Border.draw_frame(x, y, w, h, self.thickness, self.radius, self.color,
+                          lambda inner_batch: self.draw_elements(x, y, w, h, inner_batch))
 
         # for k in self.start_angles:
         #     self.shapes += list(self._draw_arc(x, y, w, h, k, new_batch))
@@ -84,10 +62,49 @@ class Border(BaseContainer, metaclass=ModifierProtocolMeta):
         self.elements[0].draw(x + self.thickness, y + self.thickness, w - 2 * self.thickness, h - 2 * self.thickness,
                               batch, False)
 
-    def _add(self, v1: (float, float), v2: (float, float)) -> (float, float):
+    @staticmethod
+    def draw_frame(x, y, w, h, thickness, radius, color, draw_inner):
+        # draw_inner receives the batch that is drawn while the content is clipped to the inside of the border
+        backend = Backend.current()
+        inner = (x + thickness, y + thickness, w - 2 * thickness, h - 2 * thickness)
+        # square borders only need a scissor rectangle, the stencil is reserved for rounded corners
+        square = radius < 1
+        inner_mask = None
+
+        if square:
+            backend.push_clip_rect(*inner)
+        else:
+            inner_mask = Border._mask_vertices(*inner, max(radius - thickness, 0))
+            backend.push_clip_mask(x, y, w, h, inner_mask)
+
+        new_batch = backend.new_batch()
+        draw_inner(new_batch)
+        backend.draw_batch(new_batch)
+
+        if square:
+            backend.pop_clip_rect()
+            if thickness > 0:
+                backend.draw_strip(Border._frame_vertices(x, y, w, h, thickness), color)
+        else:
+            if thickness > 0:
+                backend.draw_outside_mask(Border._mask_vertices(x, y, w, h, radius), color)
+            backend.pop_clip_mask(inner_mask)
+
+    @staticmethod
+    def _add(v1: (float, float), v2: (float, float)) -> (float, float):
         return v1[0] + v2[0], v1[1] + v2[1]
 
-    def _draw_mask(self, x, y, w, h, r):
+    @staticmethod
+    def _frame_vertices(x, y, w, h, t) -> [float]:
+        outer = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        inner = [(x + t, y + t), (x + w - t, y + t), (x + w - t, y + h - t), (x + t, y + h - t)]
+        v_list = []
+        for o, i in zip(outer + outer[:1], inner + inner[:1]):
+            v_list += [*o, *i]
+        return v_list
+
+    @staticmethod
+    def _mask_vertices(x, y, w, h, r) -> [float]:
         v_list = []
         center = (x + w / 2, y + h / 2)
         mods = [(-r, 0), (0, r), (r, 0), (0, -r)]
@@ -95,8 +112,8 @@ class Border(BaseContainer, metaclass=ModifierProtocolMeta):
         e_corners = s_corners[1:] + s_corners[:1]
         for section, (c1, c2, mod) in enumerate(zip(s_corners, e_corners, mods)):
             v_list += [
-                *self._add(c1, mod),
-                *self._add(c2, mod),
+                *Border._add(c1, mod),
+                *Border._add(c2, mod),
                 *center
             ]
             if r >= 1.0:
@@ -105,18 +122,19 @@ class Border(BaseContainer, metaclass=ModifierProtocolMeta):
                 theta_offset = - section * pi / 2 - pi
                 for i in range(0, subs):
                     v_list += [
-                        *self._add(c2, (
+                        *Border._add(c2, (
                         r * math.cos(theta_offset - i * theta_sub), r * math.sin(theta_offset - i * theta_sub))),
-                        *self._add(c2, (r * math.cos(theta_offset - (i + 1) * theta_sub),
+                        *Border._add(c2, (r * math.cos(theta_offset - (i + 1) * theta_sub),
                                         r * math.sin(theta_offset - (i + 1) * theta_sub))),
                         *center
                     ]
         # v_list += v_list[-4:-2] + v_list[:2] + v_list[-2:]
         v_list = v_list[:2] + v_list + v_list[-2:]
-        draw(int(len(v_list) / 2), gl.GL_TRIANGLE_STRIP, ('v2f', v_list))
+        return v_list
 
 
 class OnClick(BaseContainer, metaclass=ModifierProtocolMeta):
+    __slots__ = ("_click",)
     direction = BaseContainer.H
 
     def __init__(self, element, clickfunc):
@@ -124,8 +142,13 @@ class OnClick(BaseContainer, metaclass=ModifierProtocolMeta):
         super(OnClick, self).__init__([element], cache_id)
         self._click = clickfunc
 
+    @staticmethod
+    def as_layer(clickfunc) -> tuple:
+        return "onclick", clickfunc
+
 
 class Background(BaseContainer, metaclass=ModifierProtocolMeta):
+    __slots__ = ("background_color",)
     direction = BaseContainer.H
     background_opacity = 255
 
@@ -134,20 +157,22 @@ class Background(BaseContainer, metaclass=ModifierProtocolMeta):
         super(Background, self).__init__([element], cache_id)
         self.background_color = background_color
 
-    def _state_hash(self) -> Optional[str]:
-        state_dict = super(Background, self)._state_hash() + f"|{self.background_color}"
-        return state_dict
+    @staticmethod
+    def as_layer(background_color) -> tuple:
+        return "background", background_color, Background.background_opacity
+
+    def _own_state(self) -> tuple:
+        return self.background_color,
 
     def draw_content(self, x, y, w, h, batch):
         self._x, self._y, self._w, self._h = x, y, w, h
         if self.background_color is not None:
-            self.backdrop = shapes.Rectangle(x, y, w, h, self.background_color)
-            self.backdrop.opacity = self.background_opacity
-            self.backdrop.draw()
+            Backend.current().draw_rect(x, y, w, h, self.background_color, self.background_opacity)
         self.elements[0].draw(x, y, w, h, batch, False)
 
 
 class Padding(BaseContainer, metaclass=ModifierProtocolMeta):
+    __slots__ = ("padding",)
     direction = BaseContainer.H
     background_opacity = 255
 
@@ -156,14 +181,17 @@ class Padding(BaseContainer, metaclass=ModifierProtocolMeta):
         super(Padding, self).__init__([element], cache_id)
         self.padding = padding
 
+    @staticmethod
+    def as_layer(padding) -> tuple:
+        return "padding", padding
+
     def _object_hash(self) -> Optional[dict]:
         hash_dict = super(Padding, self)._object_hash()
         hash_dict.update({"padding_modifier": True})
         return hash_dict
 
-    def _state_hash(self) -> Optional[dict]:
-        state_dict = super(Padding, self)._state_hash() + f"|{self.padding}"
-        return state_dict
+    def _own_state(self) -> tuple:
+        return self.padding,
 
     def size_requested(self) -> (int, int):
         w, h = self.elements[0].size_requested()
@@ -171,7 +199,7 @@ class Padding(BaseContainer, metaclass=ModifierProtocolMeta):
         self._h = h + self.padding[1] + self.padding[3]
         return self._w, self._h
 
-    def draw_content(self, x: int, y: int, w: int, h: int, batch: graphics.Batch):
+    def draw_content(self, x: int, y: int, w: int, h: int, batch: Any):
         self._x, self._y, self._w, self._h = x, y, w, h
         self.elements[0].draw(x + self.padding[0],
                               y + self.padding[1],
@@ -180,3 +208,104 @@ class Padding(BaseContainer, metaclass=ModifierProtocolMeta):
                               batch, False)
 
 
+
+
+class Decorated(BaseContainer):
+    # a chain of modifiers folded into one node. The layers (innermost first) are applied in a single size and draw
+    # step, the node behaves like the outermost wrapper the chain used to build, including its cache id and priorities
+    __slots__ = ("element", "layers")
+    direction = BaseContainer.H
+    cache_suffixes = {"border": "B", "onclick": "C", "background": "P", "padding": "P"}
+
+    def __init__(self, element: UIElement, layers: [tuple]):
+        cache_id = element.cache_id
+        for layer in layers:
+            cache_id = cache_id + Decorated.cache_suffixes[layer[0]]
+        super(Decorated, self).__init__([element], cache_id)
+        self.element = element
+        self.layers = layers
+        # a border takes over the priorities of what it wraps, any other wrapper starts from the defaults
+        if layers[-1][0] == "border":
+            if all(layer[0] == "border" for layer in layers):
+                self._priorities = element._priorities
+            else:
+                self._priorities = element._priorities[:2] + self._priorities[2:]
+
+    @staticmethod
+    def wrap(element: UIElement, layer: tuple) -> "Decorated":
+        if isinstance(element, Decorated):
+            return Decorated(element.element, element.layers + [layer])
+        return Decorated(element, [layer])
+
+    def _own_state(self) -> tuple:
+        # click handlers are rebuilt with every layout and do not change the pixels
+        return tuple(layer if layer[0] != "onclick" else ("onclick",) for layer in self.layers)
+
+    def size_requested(self) -> (int, int):
+        if self._w is None or self._h is None:
+            w, h = self.element.size_requested()
+            for layer in self.layers:
+                if layer[0] == "padding":
+                    padding = layer[1]
+                    w += padding[0] + padding[2]
+                    h += padding[1] + padding[3]
+                elif layer[0] == "border":
+                    w += layer[1] * 2
+                    h += layer[1] * 2
+            self._w, self._h = w, h
+        return self._w, self._h
+
+    def draw_content(self, x, y, w, h, batch):
+        self._draw_layer(len(self.layers) - 1, x, y, w, h, batch)
+        self._x, self._y, self._w, self._h = x, y, w, h
+
+    def _draw_layer(self, i, x, y, w, h, batch):
+        if i < 0:
+            self.element.draw(x, y, w, h, batch, False)
+            return
+        layer = self.layers[i]
+        kind = layer[0]
+        if kind == "padding":
+            padding = layer[1]
+            self._draw_layer(i - 1, x + padding[0], y + padding[1], w - padding[0] - padding[2],
+                             h - padding[1] - padding[3], batch)
+        elif kind == "background":
+            if layer[1] is not None:
+                Backend.current().draw_rect(x, y, w, h, layer[1], layer[2])
+            self._draw_layer(i - 1, x, y, w, h, batch)
+        elif kind == "border":
+            t = layer[1]
+            Border.draw_frame(x, y, w, h, t, layer[2], layer[3],
+                              lambda inner_batch: self._draw_layer(i - 1, x + t, y + t, w - 2 * t, h - 2 * t,
+                                                                   inner_batch))
+        else:
+            self._draw_layer(i - 1, x, y, w, h, batch)
+
+    def _layer_rects(self) -> [tuple]:
+        # outermost first, taken from the bounds of the node. A node drawn from the cache never visited its layers
+        x, y, w, h = self._x, self._y, self._w, self._h
+        rects = []
+        for layer in reversed(self.layers):
+            rects.append((x, y, w, h))
+            if layer[0] == "padding":
+                padding = layer[1]
+                x, y, w, h = x + padding[0], y + padding[1], w - padding[0] - padding[2], h - padding[1] - padding[3]
+            elif layer[0] == "border":
+                t = layer[1]
+                x, y, w, h = x + t, y + t, w - 2 * t, h - 2 * t
+        return rects
+
+    def click(self, x, y, button, modifiers, view):
+        # same order as the nested wrappers: outside of a layer nothing below it is hit, a click layer stops here.
+        # A node that was never drawn has no bounds and hits everywhere, like any other element
+        rects = self._layer_rects() if self._x is not None else [None] * len(self.layers)
+        for layer, rect in zip(reversed(self.layers), rects):
+            if rect is not None and not (rect[0] < x < rect[0] + rect[2] and rect[1] < y < rect[1] + rect[3]):
+                return False
+            if layer[0] == "onclick":
+                layer[1](view)
+                return True
+        return self.element.click(x, y, button, modifiers, view)
+
+
+ModifierMeta.decorate = Decorated.wrap
@@ -0,0 +1,145 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Any, Optional
+
+
+class Cancelled(Exception):
+    pass
+
+
+class MainThread:
+    # work that has to happen on the thread owning the GL context, e.g. glyph rasterization for text metrics
+    thread = threading.main_thread()
+    _calls: queue.SimpleQueue = queue.SimpleQueue()
+
+    @staticmethod
+    def is_current() -> bool:
+        return threading.current_thread() is MainThread.thread
+
+    @staticmethod
+    def call(fn: Callable, *args) -> Any:
+        if MainThread.is_current():
+            return fn(*args)
+        done = threading.Event()
+        outcome = []
+
+        def run():
+            try:
+                outcome.append((fn(*args), None))
+            except Exception as e:
+                outcome.append((None, e))
+            done.set()
+
+        MainThread._calls.put(run)
+        done.wait()
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
+    @staticmethod
+    def run_pending():
+        while True:
+            try:
+                run = MainThread._calls.get_nowait()
+            except queue.Empty:
+                return
+            run()
+
+
+class Job:
+
+    def __init__(self, key: str, version: int, fn: Callable[["Job"], Any], on_done: Callable[[Any], None]):
+        self.key = key
+        self.version = version
+        self.fn = fn
+        self.on_done = on_done
+        self.cancelled = False
+        self.future: Optional[Future] = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        # long running jobs call this between steps so that a superseded job stops early
+        if self.cancelled:
+            raise Cancelled()
+
+
+class LayoutResult:
+    # handed from the worker to the main thread, the tree is not touched by the worker once published
+    __slots__ = ("version", "root", "size")
+
+    def __init__(self, version: int, root: Any, size: (int, int)):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "root", root)
+        object.__setattr__(self, "size", size)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("layout results are immutable")
+
+
+class Pipeline:
+
+    def __init__(self, workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gluipy-pipeline")
+        self._lock = threading.Lock()
+        self._latest: {str: Job} = {}
+        self._finished: queue.SimpleQueue = queue.SimpleQueue()
+
+    def submit(self, key: str, fn: Callable[[Job], Any], on_done: Callable[[Any], None]) -> Job:
+        # a new job for the same key supersedes the previous one, its result is never delivered
+        with self._lock:
+            previous = self._latest.get(key)
+            version = previous.version + 1 if previous is not None else 0
+            if previous is not None:
+                previous.cancel()
+            job = Job(key, version, fn, on_done)
+            self._latest[key] = job
+        job.future = self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job):
+        if job.cancelled:
+            return
+        try:
+            result = job.fn(job)
+        except Cancelled:
+            return
+        except Exception as e:
+            self._finished.put((job, None, e))
+            return
+        self._finished.put((job, result, None))
+
+    def is_current(self, job: Job) -> bool:
+        with self._lock:
+            return self._latest.get(job.key) is job
+
+    @property
+    def pending(self) -> bool:
+        with self._lock:
+            return any(not job.future.done() for job in self._latest.values() if job.future is not None) or \
+                not self._finished.empty()
+
+    def poll(self):
+        # called from the main thread once per frame, only the newest result of every key is delivered
+        MainThread.run_pending()
+        while True:
+            try:
+                job, result, error = self._finished.get_nowait()
+            except queue.Empty:
+                return
+            if job.cancelled or not self.is_current(job):
+                continue
+            if error is not None:
+                raise error
+            job.on_done(result)
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._latest.values():
+                job.cancel()
+        self.executor.shutdown(wait=False)
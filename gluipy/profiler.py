@@ -0,0 +1,177 @@
+import json
+from collections import deque
+from time import perf_counter
+from typing import Optional
+
+from gluipy.backend import Backend
+
+
+class FrameStats:
+    phase_names = ("layout", "measure", "arrange", "draw", "cache_lookup", "cache_save")
+
+    def __init__(self, index: int, start: float):
+        self.index = index
+        self.start = start
+        self.duration = 0.0
+        self.phases = {name: 0.0 for name in FrameStats.phase_names}
+        self.hits = 0
+        self.misses = 0
+        # (name, category, start, duration, cache_id) used for the trace event output
+        self.events = []
+
+    def as_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "start": self.start,
+            "duration": self.duration,
+            "phases": dict(self.phases),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class ElementStats:
+
+    def __init__(self):
+        self.draws = 0
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {"draws": self.draws, "hits": self.hits, "misses": self.misses, "seconds": self.seconds}
+
+
+class Profiler:
+    # call sites check this flag before taking any timestamp, a disabled profiler costs one attribute lookup
+    enabled = False
+    overlay = False
+    frames: deque = deque(maxlen=120)
+    elements: {str: ElementStats} = {}
+    current: Optional[FrameStats] = None
+    _frame_index = 0
+    _overlay_label = None
+    # one-off costs before the first frame, e.g. the warm-up of every font, recorded even while disabled
+    startup: {str: float} = {}
+
+    @staticmethod
+    def enable(history=120, overlay=False):
+        Profiler.frames = deque(Profiler.frames, maxlen=history)
+        Profiler.overlay = overlay
+        Profiler.enabled = True
+
+    @staticmethod
+    def disable():
+        Profiler.enabled = False
+        Profiler.current = None
+
+    @staticmethod
+    def reset():
+        Profiler.frames.clear()
+        Profiler.elements = {}
+        Profiler.current = None
+        Profiler._frame_index = 0
+
+    @staticmethod
+    def begin_frame():
+        Profiler.current = FrameStats(Profiler._frame_index, perf_counter())
+        Profiler._frame_index += 1
+
+    @staticmethod
+    def end_frame():
+        frame = Profiler.current
+        if frame is None:
+            return
+        frame.duration = perf_counter() - frame.start
+        Profiler.frames.append(frame)
+        Profiler.current = None
+
+    @staticmethod
+    def record(phase: str, start: float, cache_id=None):
+        frame = Profiler.current
+        if frame is None:
+            return
+        duration = perf_counter() - start
+        frame.phases[phase] += duration
+        frame.events.append((phase, "phase", start, duration, cache_id))
+
+    @staticmethod
+    def record_startup(name: str, seconds: float):
+        Profiler.startup[name] = seconds
+
+    @staticmethod
+    def record_element(cache_id, start: float, hit: Optional[bool]):
+        duration = perf_counter() - start
+        stats = Profiler.elements.get(cache_id)
+        if stats is None:
+            stats = Profiler.elements[cache_id] = ElementStats()
+        stats.draws += 1
+        stats.seconds += duration
+        frame = Profiler.current
+        if hit is not None:
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+            if frame is not None:
+                if hit:
+                    frame.hits += 1
+                else:
+                    frame.misses += 1
+        if frame is not None:
+            frame.events.append((str(cache_id), "element", start, duration, cache_id))
+
+    @staticmethod
+    def to_dict() -> dict:
+        return {
+            "frames": [f.as_dict() for f in Profiler.frames],
+            "elements": {str(k): v.as_dict() for k, v in Profiler.elements.items()},
+            "startup": dict(Profiler.startup),
+        }
+
+    @staticmethod
+    def to_json(indent=None) -> str:
+        return json.dumps(Profiler.to_dict(), indent=indent)
+
+    @staticmethod
+    def to_chrome_trace() -> str:
+        # complete ("X") events in microseconds, loadable in chrome://tracing or Perfetto
+        events = []
+        origin = Profiler.frames[0].start if Profiler.frames else 0.0
+        for frame in Profiler.frames:
+            events.append({
+                "name": f"frame {frame.index}", "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                "ts": (frame.start - origin) * 1e6, "dur": frame.duration * 1e6,
+                "args": {"hits": frame.hits, "misses": frame.misses},
+            })
+            for name, category, start, duration, cache_id in frame.events:
+                event = {
+                    "name": name, "cat": category, "ph": "X", "pid": 0, "tid": 0,
+                    "ts": (start - origin) * 1e6, "dur": duration * 1e6,
+                }
+                if cache_id is not None:
+                    event["args"] = {"cache_id": str(cache_id)}
+                events.append(event)
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    @staticmethod
+    def summary() -> str:
+        if not Profiler.frames:
+            return "no frames"
+        frames = list(Profiler.frames)
+        n = len(frames)
+        avg = {name: sum(f.phases[name] for f in frames) / n * 1000 for name in FrameStats.phase_names}
+        frame_ms = sum(f.duration for f in frames) / n * 1000
+        last = frames[-1]
+        return f"frame {frame_ms:.1f}ms  " + "  ".join(f"{k} {v:.1f}" for k, v in avg.items()) + \
+            f"  hits {last.hits} misses {last.misses}"
+
+    @staticmethod
+    def draw_overlay(x: int, y: int):
+        backend = Backend.current()
+        if Profiler._overlay_label is None:
+            Profiler._overlay_label = backend.text("", None, 16, (200, 0, 0, 255))
+        label = Profiler._overlay_label
+        backend.set_text(label, Profiler.summary())
+        _, h = backend.text_size(label)
+        backend.place_text(label, x, y - h, None)
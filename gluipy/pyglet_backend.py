@@ -0,0 +1,440 @@
+import math
+import time
+from collections import namedtuple
+from math import floor, ceil
+from typing import Optional, Any
+
+import pyglet
+from pyglet import gl, image, sprite
+from pyglet.graphics import draw, Batch
+
+from gluipy.backend import TextMetrics
+from gluipy.clip import ClipStack
+from gluipy.interface import RenderBackend, AbstractDynamicCaret, TextField
+
+
+class GLClipStack(ClipStack):
+
+    def _apply_rect(self):
+        if not self.rects:
+            gl.glDisable(gl.GL_SCISSOR_TEST)
+            return
+        x, y, w, h = self.rects[-1]
+        s = self.scale
+        x0, y0 = floor(x * s), floor(y * s)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+        gl.glScissor(x0, y0, max(ceil((x + w) * s) - x0, 0), max(ceil((y + h) * s) - y0, 0))
+
+    def to_device(self, vertices: [float]) -> [float]:
+        s = self.scale
+        return [v * s for v in vertices]
+
+    def _apply_stencil(self):
+        if self.stencil_level > 0:
+            gl.glEnable(gl.GL_STENCIL_TEST)
+            gl.glStencilFunc(gl.GL_EQUAL, self.stencil_level, 0xFF)
+        else:
+            gl.glDisable(gl.GL_STENCIL_TEST)
+
+    def _write_mask(self, vertices, increment):
+        gl.glEnable(gl.GL_STENCIL_TEST)
+        gl.glColorMask(gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE)
+        gl.glStencilMask(0xFF)
+        gl.glStencilFunc(gl.GL_EQUAL, self.stencil_level, 0xFF)
+        gl.glStencilOp(gl.GL_KEEP, gl.GL_KEEP, gl.GL_INCR if increment else gl.GL_DECR)
+        draw(len(vertices) // 2, gl.GL_TRIANGLE_STRIP, ('v2f', self.to_device(vertices)))
+        gl.glStencilOp(gl.GL_KEEP, gl.GL_KEEP, gl.GL_KEEP)
+        gl.glStencilMask(0x00)
+        gl.glColorMask(gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE)
+
+    def draw_outside(self, vertices):
+        # draws inside the parent clip region but outside of the topmost mask
+        gl.glStencilFunc(gl.GL_EQUAL, self.stencil_level - 1, 0xFF)
+        draw(len(vertices) // 2, gl.GL_TRIANGLE_STRIP, ('v2f', self.to_device(vertices)))
+        gl.glStencilFunc(gl.GL_EQUAL, self.stencil_level, 0xFF)
+
+
+class FrameArena:
+    # geometry that only lives for one frame, e.g. the blinking caret line, is deleted when the frame ends so that
+    # long-lived batches do not grow, the freed regions are reused by the next frame's allocations
+
+    def __init__(self):
+        self._lists = []
+
+    @property
+    def live(self) -> int:
+        return len(self._lists)
+
+    def add(self, batch: Batch, count: int, mode: int, group, *data):
+        vertex_list = batch.add(count, mode, group, *data)
+        self._lists.append(vertex_list)
+        return vertex_list
+
+    def release(self):
+        for vertex_list in self._lists:
+            vertex_list.delete()
+        self._lists = []
+
+
+# the part of a vertex list a domain draws
+_Span = namedtuple("_Span", "start count")
+
+
+class PrimitiveBuffer:
+    # solid triangles of any colors, e.g. backgrounds and square borders, collected between two changes of the GL
+    # state and drawn in one call. The vertex list is kept across frames and only grows, every flush overwrites its
+    # arrays in place and draws the part it wrote
+
+    def __init__(self):
+        self.vertices: [float] = []
+        self.colors: [int] = []
+        self.vertex_list = None
+        # counters for benchmarks, shapes added and draw calls issued for them
+        self.shapes = 0
+        self.flushes = 0
+
+    def add(self, vertices: [float], colors: [int], shapes=1):
+        self.vertices += vertices
+        self.colors += colors
+        self.shapes += shapes
+
+    def add_rect(self, x0, y0, x1, y1, color: tuple):
+        self.vertices += (x0, y0, x1, y0, x1, y1, x0, y0, x1, y1, x0, y1)
+        self.colors += color * 6
+        self.shapes += 1
+
+    def flush(self):
+        count = len(self.vertices) // 2
+        if not count:
+            return
+        vertex_list = self.vertex_list
+        if vertex_list is None or vertex_list.get_size() < count:
+            if vertex_list is not None:
+                vertex_list.delete()
+            size = max(count, 2 * vertex_list.get_size() if vertex_list is not None else 1024)
+            vertex_list = self.vertex_list = pyglet.graphics.vertex_list(size, 'v2f/stream', 'c4B/stream')
+        vertex_list.vertices[:count * 2] = self.vertices
+        vertex_list.colors[:count * 4] = self.colors
+        vertex_list.domain.draw(gl.GL_TRIANGLES, _Span(vertex_list.start, count))
+        self.vertices = []
+        self.colors = []
+        self.flushes += 1
+
+
+class DynamicCaret(pyglet.text.caret.Caret, AbstractDynamicCaret):
+    _batch = None
+    # mouse positions arrive in layout units, the text layout is in device pixels
+    scale = 1.0
+
+    def update_batch(self, batch: Batch, color: (int, int, int)):
+        # the caret keeps a single vertex list, it is only moved when the batch it is drawn with changes
+        if batch is self._batch:
+            return
+        vertices = list(self._list.vertices)
+        self._list.delete()
+        r, g, b = color
+        colors = (r, g, b, 255, r, g, b, 255)
+        self._list = batch.add(2, gl.GL_LINES, self._layout.background_group, ('v2f', vertices), ('c4B', colors))
+        self._batch = batch
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        return super().on_mouse_press(x * self.scale, y * self.scale, button, modifiers)
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        s = self.scale
+        return super().on_mouse_drag(x * s, y * s, dx * s, dy * s, buttons, modifiers)
+
+
+class PygletTextField(TextField):
+
+    def __init__(self, text, font_name, font_size, color, backend: "PygletBackend"):
+        self.backend = backend
+        self.color = color
+        self.document = pyglet.text.document.UnformattedDocument(text)
+        self.document.styles.setdefault("font_size", font_size)
+        self.document.styles.setdefault("font_name", font_name)
+        self.document.styles.setdefault("color", color)
+        self.layout = pyglet.text.layout.IncrementalTextLayout(self.document, 100, 20, wrap_lines=False,
+                                                               dpi=backend.dpi)
+        self.caret = DynamicCaret(self.layout, color=color[:3])
+        # pyglet's own caret line stays hidden, the blinking line is drawn into the overlay below
+        self.caret.visible = False
+        # what was last pushed to the pyglet layout, every assignment there may re-flow the text
+        self._geometry = None
+        self._caret_key = None
+        self._caret_point = None
+
+    def delete(self):
+        self.caret.delete()
+        self.layout.delete()
+
+    def draw(self, x, y, w, h, batch, active):
+        backend = self.backend
+        s = self.caret.scale = backend.scale
+        self.caret.update_batch(batch, self.color[:3])
+        if self.layout.dpi != backend.dpi:
+            backend.rasterize(self.layout)
+            self._caret_key = None
+        geometry = (round(x * s), round(y * s), round(w * s), round(h * s))
+        if self.layout.batch is not batch or self._geometry != geometry:
+            self.layout.begin_update()
+            self.layout.batch = batch
+            self.layout.x, self.layout.y, self.layout.width, self.layout.height = geometry
+            self.layout.end_update()
+            self._geometry = geometry
+        # drawing the caret
+        # This is a quick hack, should really fix the pyglet caret drawing or reimplement text layouts from scratch
+        if active:
+            caret_key = (self.caret.position, self._geometry, self.document.text)
+            if caret_key != self._caret_key:
+                self._caret_point = self.layout.get_point_from_position(self.caret.position)
+                self._caret_key = caret_key
+            cx, cy = self._caret_point
+            font = self.document.get_font(max(0, self.caret._position - 1))
+            backend.draw_caret(x + cx / s, y - font.descent / s, y + h, self.color)
+
+
+class PygletBackend(RenderBackend):
+    # layout units are independent of the display, the backend maps them to device pixels. Text is rasterized and
+    # captures are read back at the native resolution of the framebuffer, nothing is scaled on the GPU
+    units_per_point = 2
+
+    def __init__(self):
+        # device pixels per layout unit, changes when the window moves to a display with another pixel ratio
+        self.scale = 1.0
+        self.clip = GLClipStack()
+        self.arena = FrameArena()
+        self.overlay = Batch()
+        # shapes are drawn when the GL state changes next, e.g. before text, captures or another clip
+        self.primitives = PrimitiveBuffer()
+        # glyphs are rasterized while measuring, so measurements requested by layout workers run on the main thread
+        self.metrics = TextMetrics(self._measure, main_thread_only=True)
+        self.fonts = []
+
+    def begin_frame(self, window: pyglet.window.Window):
+        if window is None:
+            self.clip.reset(1.0)
+            return
+        window.clear()
+        fb_width, fb_height = self.update_scale(window)
+        # one GL unit is one device pixel
+        gl.glViewport(0, 0, fb_width, fb_height)
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        gl.glLoadIdentity()
+        gl.glOrtho(0, fb_width, 0, fb_height, -1, 1)
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glLoadIdentity()
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        # gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        # gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+        self.primitives.add_rect(0, 0, fb_width, fb_height, (230, 230, 230, 255))
+        self.primitives.flush()
+        self.clip.reset(self.scale)
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+        gl.glDisable(gl.GL_STENCIL_TEST)
+        gl.glStencilMask(0xFF)
+        gl.glClearStencil(0)
+        gl.glClear(gl.GL_STENCIL_BUFFER_BIT)
+        gl.glStencilMask(0x00)
+
+    def update_scale(self, window: pyglet.window.Window) -> (int, int):
+        fb_width, fb_height = window.get_framebuffer_size()
+        self.scale = fb_width / (window.width * self.units_per_point)
+        return fb_width, fb_height
+
+    def end_frame(self):
+        self.primitives.flush()
+        self.overlay.draw()
+        self.arena.release()
+
+    def new_batch(self) -> Batch:
+        return Batch()
+
+    def draw_batch(self, batch: Batch):
+        self.primitives.flush()
+        batch.draw()
+
+    def batch_stats(self, batch: Batch) -> dict:
+        # debug counters, allocated vertices only grow when geometry is added without being deleted again
+        vertices = 0
+        domains = 0
+        for domain_map in batch.group_map.values():
+            for domain in domain_map.values():
+                domains += 1
+                vertices += sum(domain.allocator.get_allocated_regions()[1])
+        return {"domains": domains, "vertices": vertices, "transient": self.arena.live}
+
+    @property
+    def dpi(self) -> int:
+        # freetype only takes whole numbers
+        return round(96 * self.scale)
+
+    def rasterize(self, handle: pyglet.text.layout.TextLayout):
+        # handles outlive a change of the pixel ratio, their glyphs are rendered again the first time they are placed
+        handle._dpi = self.dpi
+        handle._init_document()
+
+    def warm_up_font(self, font_name, font_size, glyphs):
+        # measuring rasterizes at 96 dpi, drawing at the dpi of the display. pyglet only holds fonts weakly, the
+        # warmed up ones are kept alive together with their glyphs
+        for dpi in {96, self.dpi}:
+            font = pyglet.font.load(font_name, font_size, dpi=dpi)
+            font.get_glyphs(glyphs)
+            self.fonts.append(font)
+
+    @staticmethod
+    def _label(text, font_name, font_size, color, dpi) -> pyglet.text.DocumentLabel:
+        # pyglet.text.Label lays the text out in the default font before applying its style, which rasterizes every
+        # glyph twice. The document is styled before the first layout instead
+        document = pyglet.text.decode_text(text)
+        document.set_style(0, len(text), {"font_name": font_name, "font_size": font_size, "color": color,
+                                          "align": "left"})
+        return pyglet.text.DocumentLabel(document, anchor_x='left', anchor_y='bottom', dpi=dpi)
+
+    def text(self, text, font_name, font_size, color) -> pyglet.text.DocumentLabel:
+        return self._label(text, font_name, font_size, color, self.dpi)
+
+    def set_text(self, handle: pyglet.text.DocumentLabel, text: str):
+        handle.text = text
+
+    def text_size(self, handle: pyglet.text.DocumentLabel) -> (int, int):
+        s = handle.dpi / 96
+        return round(handle.content_width / s), round(handle.content_height / s)
+
+    def measure_text(self, text, font_name, font_size) -> (int, int):
+        return self.metrics.size(text, font_name, font_size)
+
+    def _measure(self, text, font_name, font_size) -> (int, int):
+        label = self._label(text, font_name, font_size, (255, 255, 255, 255), 96)
+        size = label.content_width, label.content_height
+        label.delete()
+        return size
+
+    def place_text(self, handle: pyglet.text.DocumentLabel, x, y, batch):
+        if handle.dpi != self.dpi:
+            self.rasterize(handle)
+        # glyphs are snapped to device pixels
+        handle.x = round(x * self.scale)
+        handle.y = round(y * self.scale)
+        if batch is None:
+            self.primitives.flush()
+            handle.draw()
+        else:
+            handle.batch = batch
+
+    def text_field(self, text, font_name, font_size, color) -> PygletTextField:
+        return PygletTextField(text, font_name, font_size, color, self)
+
+    def draw_caret(self, x, y0, y1, color):
+        # the line blinks in the overlay, which is drawn after the frame and never captured into a cached parent
+        ts = time.time_ns() / (10 ** 9)
+        alpha = int((ts - math.floor(ts)) * 255)
+        r, g, b = color[:3]
+        s = self.scale
+        self.arena.add(self.overlay, 2, gl.GL_LINES, None, ('v2f', [x * s, y0 * s, x * s, y1 * s]),
+                       ('c4B', (r, g, b, alpha, r, g, b, alpha)))
+
+    def draw_rect(self, x, y, w, h, color, opacity=255):
+        s = self.scale
+        self.primitives.add_rect(x * s, y * s, (x + w) * s, (y + h) * s, (*color[:3], opacity))
+
+    def draw_strip(self, vertices, color):
+        # the strip is unrolled into triangles so that it joins the other shapes
+        v = self.clip.to_device(vertices)
+        triangles = []
+        for i in range(0, len(v) - 4, 2):
+            triangles += v[i:i + 6]
+        self.primitives.add(triangles, (*color[:3], 255) * (len(triangles) // 2))
+
+    def draw_rects(self, rects):
+        s = self.scale
+        for x, y, w, h, color in rects:
+            self.primitives.add_rect(x * s, y * s, (x + w) * s, (y + h) * s, (*color[:3], 255))
+
+    def push_clip_rect(self, x, y, w, h):
+        self.primitives.flush()
+        self.clip.push_rect(x, y, w, h)
+
+    def pop_clip_rect(self):
+        self.primitives.flush()
+        self.clip.pop_rect()
+
+    def push_clip_mask(self, x, y, w, h, vertices):
+        self.primitives.flush()
+        self.clip.push_mask(x, y, w, h, vertices)
+
+    def pop_clip_mask(self, vertices):
+        self.primitives.flush()
+        self.clip.pop_mask(vertices)
+
+    def draw_outside_mask(self, vertices, color):
+        self.primitives.flush()
+        gl.glColor4f(color[0]/255, color[1]/255, color[2]/255, 1.0)
+        self.clip.draw_outside(vertices)
+
+    def clip_contains(self, x, y, w, h) -> bool:
+        return self.clip.contains(x, y, w, h)
+
+    def capture(self, x, y, w, h) -> Optional[sprite.Sprite]:
+        # partially clipped elements would be cached with their clipped pixels
+        if not self.clip.contains(x, y, w, h):
+            return None
+        self.primitives.flush()
+        buffer = image.get_buffer_manager().get_color_buffer()
+        s = self.scale
+        # the size does not depend on the position, a capture is drawn again wherever the element moves to
+        x, y, w, h = round(x * s), round(y * s), round(w * s), round(h * s)
+        if 0 <= x and x + w <= buffer.width and 0 <= y and y + h <= buffer.height:
+            try:
+                return sprite.Sprite(img=buffer.get_region(x, y, w, h).get_texture())
+            except:
+                pass
+        return None
+
+    def read_capture(self, handle: sprite.Sprite) -> Optional[tuple]:
+        texture = handle.image
+        try:
+            return texture.width, texture.height, texture.get_image_data().get_data('RGBA', texture.width * 4)
+        except:
+            return None
+
+    def load_capture(self, w, h, data) -> sprite.Sprite:
+        return sprite.Sprite(img=image.ImageData(w, h, 'RGBA', data).get_texture())
+
+    def draw_capture(self, handle: sprite.Sprite, x, y, batch, opacity=255, scale=1.0):
+        # captures are shared, the transform of an animation is set again for every draw. The sprite is drawn right
+        # away and kept out of the batch, a capture left in a long-lived batch would be drawn over later frames
+        if handle.opacity != opacity:
+            handle.opacity = opacity
+        if handle.scale != scale:
+            handle.scale = scale
+        handle.x = round(x * self.scale)
+        handle.y = round(y * self.scale)
+        self.primitives.flush()
+        handle.draw()
+
+    def release(self, handle):
+        # text layouts have no finalizer, their vertex lists would stay in a long-lived batch until it is dropped
+        handle.delete()
+
+    def release_capture(self, handle: sprite.Sprite):
+        texture = handle.image
+        texture = getattr(texture, "owner", texture)
+        handle.delete()
+        # the finalizer of the texture frees its id again, by then it may belong to another texture
+        texture_id, texture.id = texture.id, 0
+        texture._context.delete_texture(texture_id)
+
+    def schedule_once(self, callback, delay):
+        pyglet.clock.schedule_once(callback, delay)
+
+    def schedule_interval(self, callback, interval):
+        pyglet.clock.schedule_interval(callback, interval)
+
+    def unschedule(self, callback):
+        pyglet.clock.unschedule(callback)
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == pyglet.window.key.ESCAPE:
+            pyglet.app.exit()
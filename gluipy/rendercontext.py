@@ -0,0 +1,134 @@
+from typing import Any, Callable, Optional
+
+from gluipy.animation import Animator
+from gluipy.backend import Backend
+from gluipy.cache import Cache
+from gluipy.fonts import Fonts
+from gluipy.idle import IdleScheduler
+from gluipy.interface import RenderBackend
+
+
+class RenderContext:
+    # what belongs to the GL objects of one share group: the backend with its text metrics and loaded fonts, the
+    # captures of the cache and the fonts warmed up into the glyph atlas. Windows created with a shared GL context,
+    # the default in pyglet, use one render context and pay only for their own layout and draw. The active context's
+    # tables are swapped into Cache and Fonts, both stay static facades for the elements
+    contexts: {Any: "RenderContext"} = {}
+    current: Optional["RenderContext"] = None
+    # class attributes of the elements and schedulers that hold GL objects or work on them by id, swapped like the
+    # tables of the cache. (owner, name): factory of the value in a new context
+    pooled: {(type, str): Callable[[], Any]} = {}
+
+    def __init__(self, share_group: Any, backend: RenderBackend):
+        self.share_group = share_group
+        self.backend = backend
+        self.object_cache = {}
+        self.state_cache = {}
+        self.scale = 1.0
+        self.scales = {}
+        self.disk = None
+        self.font_timings: {(str, int): float} = {}
+        self.pools: {(type, str): Any} = {}
+        self.windows: [Any] = []
+
+    @staticmethod
+    def pool(owner: type, **factories: Callable[[], Any]):
+        for name, factory in factories.items():
+            RenderContext.pooled[(owner, name)] = factory
+
+    @staticmethod
+    def share_group(window: Any) -> Any:
+        # pyglet contexts that share objects have the same object space
+        context = getattr(window, "context", None)
+        return getattr(context, "object_space", window)
+
+    @staticmethod
+    def for_window(window: Any) -> "RenderContext":
+        key = RenderContext.share_group(window)
+        context = RenderContext.contexts.get(key)
+        if context is None:
+            if RenderContext.current is None:
+                # the first context takes over what was set up before any window, e.g. the disk cache
+                context = RenderContext(key, Backend.current())
+                context._store()
+                RenderContext.current = context
+            else:
+                context = RenderContext(key, RenderContext._backend_like(RenderContext.current.backend))
+            RenderContext.contexts[key] = context
+        context.windows.append(window)
+        return context
+
+    @staticmethod
+    def _backend_like(template: RenderBackend) -> RenderBackend:
+        # the class and settings of the first context's backend, none of its GL objects
+        backend = type(template)()
+        backend.metrics.max_entries = template.metrics.max_entries
+        for setting in ("scale", "clock"):
+            if hasattr(template, setting):
+                setattr(backend, setting, getattr(template, setting))
+        return backend
+
+    @staticmethod
+    def release_window(window: Any):
+        context = RenderContext.contexts.get(RenderContext.share_group(window))
+        if context is not None and window in context.windows:
+            context.windows.remove(window)
+            if context is not RenderContext.current:
+                context._forget()
+
+    def _forget(self):
+        # a share group is forgotten with its last window, the active one only once another is activated, a window
+        # may still be reused after its view was closed
+        if not self.windows and RenderContext.contexts.get(self.share_group) is self:
+            del RenderContext.contexts[self.share_group]
+
+    def activate(self):
+        if RenderContext.current is not self:
+            if RenderContext.current is not None:
+                RenderContext.current._store()
+                RenderContext.current._forget()
+            Cache.object_cache, Cache.state_cache = self.object_cache, self.state_cache
+            Cache.scale, Cache.scales, Cache.disk = self.scale, self.scales, self.disk
+            Fonts.timings = self.font_timings
+            for (owner, name), factory in RenderContext.pooled.items():
+                setattr(owner, name, self.pools[(owner, name)] if (owner, name) in self.pools else factory())
+            RenderContext.current = self
+        if Backend._current is not self.backend:
+            Backend.use(self.backend)
+
+    def _store(self):
+        self.object_cache, self.state_cache = Cache.object_cache, Cache.state_cache
+        self.scale, self.scales, self.disk = Cache.scale, Cache.scales, Cache.disk
+        self.font_timings = Fonts.timings
+        self.pools = {(owner, name): getattr(owner, name) for owner, name in RenderContext.pooled}
+
+    @staticmethod
+    def bind(callback: Callable[[float], Any]) -> Callable[[float], Any]:
+        # clock callbacks of the schedulers run in the context they were scheduled from, with one of its windows'
+        # GL context current, and give the active one back after
+        context = RenderContext.current
+        if context is None:
+            return callback
+
+        def run(dt):
+            previous = RenderContext.current
+            if previous is context:
+                return callback(dt)
+            context._switch_to()
+            try:
+                return callback(dt)
+            finally:
+                if previous is not None and previous.windows:
+                    previous._switch_to()
+
+        return run
+
+    def _switch_to(self):
+        if self.windows and hasattr(self.windows[0], "switch_to"):
+            self.windows[0].switch_to()
+        self.activate()
+
+
+RenderContext.pool(IdleScheduler, queue=list, entries=dict, scheduled=lambda: None)
+RenderContext.pool(Animator, transforms=dict, tweens=dict, scheduled=lambda: None)
+Backend.binder = RenderContext.bind
@@ -0,0 +1,26 @@
+from typing import Any
+
+
+class Resources:
+    # leak counter for debugging, the GL objects created and released on behalf of every owner, an element type or
+    # e.g. the cache. Counting is off unless debug is set, call sites only pay the flag check
+    debug = False
+    live: {str: int} = {}
+
+    @staticmethod
+    def created(owner: Any, count=1):
+        if Resources.debug:
+            key = owner if isinstance(owner, str) else type(owner).__name__
+            Resources.live[key] = Resources.live.get(key, 0) + count
+
+    @staticmethod
+    def released(owner: Any, count=1):
+        Resources.created(owner, -count)
+
+    @staticmethod
+    def reset():
+        Resources.live = {}
+
+    @staticmethod
+    def report() -> str:
+        return "\n".join(f"{owner}: {count}" for owner, count in sorted(Resources.live.items()) if count)
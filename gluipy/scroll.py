@@ -0,0 +1,62 @@
+import math
+
+
+class Scrollable:
+    # vertical scrolling over rows of the same height, shared by Table and TextArea. The offset of every scroll_id
+    # survives the rebuild of the element on the next layout
+    __slots__ = ()
+    offsets: {str: int} = {}
+    row_gap = 8
+    scroll_step = 8
+    scroll_id: str
+    offset = 0
+
+    def row_height(self) -> int:
+        pass
+
+    def row_count(self) -> int:
+        pass
+
+    def max_offset(self, h) -> float:
+        return max(self.row_count() * (self.row_height() + self.row_gap) - h, 0)
+
+    def restore_offset(self):
+        self.offset = Scrollable.offsets.get(self.scroll_id, 0)
+
+    def visible_rows(self, h) -> (int, int):
+        pitch = self.row_height() + self.row_gap
+        count = self.row_count()
+        first = min(math.floor((self.offset + self.row_gap) / pitch), count)
+        last = min(math.ceil((self.offset + h + self.row_gap) / pitch), count)
+        return first, last
+
+    def row_top(self, y, h, row) -> int:
+        # rows are laid out top down, the top edge of the first row sits at y + h when not scrolled
+        return y + h + self.offset - row * (self.row_height() + self.row_gap)
+
+    def scroll_to(self, offset, h):
+        offset = min(max(offset, 0), self.max_offset(h))
+        if offset != self.offset:
+            self.offset = offset
+            Scrollable.offsets[self.scroll_id] = offset
+            self.invalidate_hash()
+
+    def scroll_to_row(self, row, h):
+        # scrolls the least amount that makes the row fully visible
+        pitch = self.row_height() + self.row_gap
+        top = row * pitch
+        if top < self.offset:
+            self.scroll_to(top, h)
+        elif top + pitch - self.row_gap > self.offset + h:
+            self.scroll_to(top + pitch - self.row_gap - h, h)
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        if self._x is not None and self._x < x < self._x + self._w and self._y < y < self._y + self._h:
+            self.scroll_to(self.offset + scroll_y * self.scroll_step, self.viewport_height())
+            self._scrolled()
+
+    def viewport_height(self) -> int:
+        return self._h
+
+    def _scrolled(self):
+        pass
@@ -1,13 +1,24 @@
-import math
-from typing import Protocol, Any, Collection, Optional
+import weakref
+from functools import partial
+from time import perf_counter
+from typing import Protocol, Any, Callable, Collection, Optional
 
+from gluipy.backend import Backend
+from gluipy.base import unmount_tree, walk
+from gluipy.cache import Cache
+from gluipy.idle import IdleScheduler
 from gluipy.interface import UIElement, ViewModel
 from gluipy.container import VContainer
 from gluipy.layout import Space
 from gluipy.modifier import Border
+from gluipy.profiler import Profiler
+from gluipy.rendercontext import RenderContext
+from gluipy.scroll import Scrollable
+from gluipy.text import Label
 
 
 class TableCell(UIElement, Protocol):
+    __slots__ = ()
     model: Any
     index: int
 
@@ -15,6 +26,7 @@ class TableCell(UIElement, Protocol):
         pass
 
 class TableDelegate(Protocol):
+    __slots__ = ()
 
     def current_item(self) -> int:
         pass
@@ -34,9 +46,27 @@ class TableModel(ViewModel, Collection, Protocol):
         pass
 
 
-class Table(Border, TableDelegate):
-    offsets: {str: int} = {}
+class Table(Scrollable, Border, TableDelegate):
+    __slots__ = ("cell_class", "model", "num_elems", "cell_height", "table_id", "scroll_id", "offset", "placeholder")
+    # the sample cell is part of the table's tree, the cache only refers to it while that tree is alive
     cell_cache: {str: {int: TableCell}} = {}
+    # the rows drawn by the last frame, they are built while drawing and never part of the view's tree
+    drawn: {str: [TableCell]} = {}
+    # rows beyond the viewport are rendered into the cache while the main loop is idle, most of them ahead in the
+    # direction of the last scroll. The offset of the last drawn frame tells the direction
+    prerender_ahead = 4
+    prerender_behind = 1
+    # offset, time and direction of the last drawn frame
+    scroll_states: {str: (int, float, int)} = {}
+    # above this speed in rows per second rows are drawn as placeholders, the bars stand in for the labels of a row
+    # drawn before and the stripes for its background. Full rows are drawn once scrolling settles
+    placeholder_velocity = 10
+    placeholder_settle = 0.12
+    placeholder_bar_color = (200, 206, 214)
+    placeholder_color = (240, 240, 240)
+    # (table id, width): label rects relative to the row and the background of even and odd rows
+    placeholders: {(str, int): ([tuple], {int: tuple})} = {}
+    settle_callbacks: {str: Callable} = {}
     v_hugging_force = 200
     v_compression_resistance = 200
     h_hugging_force = 400
@@ -48,6 +78,8 @@ class Table(Border, TableDelegate):
         self.model = model
         self.model.set_table_delegate(self)
         self.num_elems = len(model)
+        self.cell_height = 0
+        self.placeholder = None
         if self.num_elems > 0:
             sample_model = model[0]
             sample_cell = cell_class(sample_model, 0)
@@ -55,14 +87,33 @@ class Table(Border, TableDelegate):
         else:
             sample_cell = Space()
 
-        self.offset = Table.offsets.get(table_id, 0)
         self.table_id = table_id
-        Table.cell_cache[table_id] = {0: sample_cell}
+        self.scroll_id = table_id
+        self.restore_offset()
         super(Table, self).__init__(VContainer([sample_cell, Space()], f"{self.cache_id}-container"), thickness=0, radius=0, color=(255, 255, 255))
 
-    def _state_hash(self) -> Optional[str]:
-        state_dict = super(Table, self)._state_hash() + f"|{self.model.model_state()}|{self.offset}"
-        return state_dict
+    def _own_state(self) -> tuple:
+        # the model state is read when the hash is computed, model changes rebuild the tree through need_redraw
+        return super(Table, self)._own_state() + (self.model.model_state(), self.offset)
+
+    def invalidate_hash(self):
+        self.placeholder = None
+        super(Table, self).invalidate_hash()
+
+    def _state_hash(self) -> Optional[int]:
+        # placeholders are never cached, neither are the containers around them
+        if self._placeholder():
+            return None
+        return super(Table, self)._state_hash()
+
+    def _placeholder(self) -> bool:
+        # decided from the speed since the last drawn frame, again whenever the offset changes
+        if self.placeholder is None:
+            last_offset, last_time, _ = Table.scroll_states.get(self.table_id, (self.offset, 0.0, 1))
+            rows = abs(self.offset - last_offset) / (self.cell_height + self.row_gap)
+            velocity = rows / max(perf_counter() - last_time, 0.001)
+            self.placeholder = velocity > self.placeholder_velocity
+        return self.placeholder
 
     def draw(self, x: int, y: int, w: int, h: int, batch, cached=True) -> bool:
         return super(Table, self).draw(x, y, w, h, batch, cached=cached)
@@ -71,39 +122,158 @@ class Table(Border, TableDelegate):
         if self.num_elems > 0:
             eff_height = self.cell_height
             model_index = self.model.get_scroll()
-            if model_index is not None:
-                self.offset = (eff_height + 8) * model_index
-            eff_offset = self.offset
-            #print(eff_offset, self.offset)
-            first_element = min(math.floor((eff_offset + 8) / (eff_height + 8)), self.num_elems)
-            last_element = min(math.ceil((eff_offset + h + 8) / (eff_height + 8)), self.num_elems)
-            content_h = (eff_height + 8) * (last_element - first_element) - 8
-            content_y = y + h + eff_offset - last_element * (eff_height + 8)
-            #print(content_y, content_h)
+            if model_index is not None and self.offset != (eff_height + self.row_gap) * model_index:
+                self.offset = (eff_height + self.row_gap) * model_index
+                self.invalidate_hash()
+                # a jump to a row is not scrolling
+                self.placeholder = False
+            first_element, last_element = self.visible_rows(h)
+            last_offset, _, direction = Table.scroll_states.get(self.table_id, (self.offset, 0.0, 1))
+            if self.offset != last_offset:
+                direction = 1 if self.offset > last_offset else -1
+            Table.scroll_states[self.table_id] = (self.offset, perf_counter(), direction)
+            if self._placeholder():
+                self._draw_placeholders(x, y, w, h, first_element, last_element)
+                return
+            content_h = (eff_height + self.row_gap) * (last_element - first_element) - self.row_gap
+            content_y = self.row_top(y, h, last_element)
+            # the sample cell of the drawn tree, registered here on the main thread because constructors may run on
+            # a layout worker
+            sample_cell = self.elements[0].elements[0]
+            cells = Table.cell_cache.get(self.table_id)
+            if cells is None or cells.get(0) is not sample_cell:
+                cells = Table.cell_cache[self.table_id] = weakref.WeakValueDictionary({0: sample_cell})
             elements = []
             for i in range(first_element, last_element):
-                if i in Table.cell_cache[self.table_id]:
-                    elements.append(Table.cell_cache[self.table_id][i])
+                if i in cells:
+                    elements.append(cells[i])
                 else:
                     elements.append(self.cell_class(self.model[i], i))
 
+            drawn = set(map(id, elements))
+            for cell in Table.drawn.get(self.table_id, ()):
+                if id(cell) not in drawn:
+                    unmount_tree(cell, True)
+            Table.drawn[self.table_id] = elements
+
             content = VContainer(elements + [Space()], f"{self.cache_id}-container")
+            measure_started = Profiler.enabled and perf_counter()
             content.size_requested()
-            content.draw(x, content_y, w, content_h, batch, True)
+            if measure_started:
+                Profiler.record("measure", measure_started, self.cache_id)
+            # rows partially scrolled out of view are clipped to the table, the local batch makes sure their
+            # text is drawn while the clip is active
+            backend = Backend.current()
+            backend.push_clip_rect(x, y, w, h)
+            content_batch = backend.new_batch()
+            content.draw(x, content_y, w, content_h, content_batch, True)
+            backend.draw_batch(content_batch)
+            backend.pop_clip_rect()
+            if (self.table_id, w) not in Table.placeholders:
+                self._record_placeholder(elements, first_element, w)
+            self._schedule_prerender(first_element, last_element, w, direction)
         else:
             Space().draw(x, y, w, h, batch)
 
-    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
-        if self._x < x < self._x + self._w and self._y < y < self._y + self._h:
-            self.offset += scroll_y * 8
-            self.offset = max(self.offset, 0)
-            self.offset = min(self.offset, self.num_elems * self.cell_height / 2)
-            Table.offsets[self.table_id] = self.offset
-            self.model.invalidate_scroll()
-            self.model.request_update()
+    def unmount(self, replaced: bool):
+        super(Table, self).unmount(replaced)
+        if not replaced:
+            for cell in Table.drawn.pop(self.table_id, ()):
+                unmount_tree(cell, False)
+            Table.cell_cache.pop(self.table_id, None)
+            Table.scroll_states.pop(self.table_id, None)
+            for key in [key for key in Table.placeholders if key[0] == self.table_id]:
+                del Table.placeholders[key]
+            settle = Table.settle_callbacks.pop(self.table_id, None)
+            if settle is not None:
+                Backend.current().unschedule(settle)
+            Scrollable.offsets.pop(self.scroll_id, None)
+            IdleScheduler.cancel(self.table_id)
 
-    def current_item(self):
-        return min(math.floor((self.offset + 8) / (self.cell_height + 8)), self.num_elems)
+    def _draw_placeholders(self, x, y, w, h, first, last):
+        # a stripe per row and a bar per label in a single draw, no cells are built. The rows of the last full frame
+        # are unmounted and a full frame is requested once no faster frame followed for a while
+        for cell in Table.drawn.pop(self.table_id, ()):
+            unmount_tree(cell, True)
+        IdleScheduler.cancel(self.table_id)
+        bars, backgrounds = Table.placeholders.get((self.table_id, w), ((), {}))
+        rects = []
+        for row in range(first, last):
+            row_y = self.row_top(y, h, row) - self.row_gap - self.cell_height
+            rects.append((x, row_y, w, self.cell_height, backgrounds.get(row % 2, self.placeholder_color)))
+            rects += [(x + bx, row_y + by, bw, bh, self.placeholder_bar_color) for bx, by, bw, bh in bars]
+        backend = Backend.current()
+        backend.push_clip_rect(x, y, w, h)
+        backend.draw_rects(rects)
+        backend.pop_clip_rect()
+        settle = Table.settle_callbacks.pop(self.table_id, None)
+        if settle is not None:
+            backend.unschedule(settle)
+        model = self.model
+        settle = Table.settle_callbacks[self.table_id] = lambda dt: model.request_update()
+        backend.schedule_once(settle, self.placeholder_settle)
+
+    def _record_placeholder(self, cells: [TableCell], first, w):
+        # taken from the first row drawn without the cache, its labels have a position then
+        for cell in cells:
+            labels = [node for node in walk(cell) if isinstance(node, Label)]
+            if cell._x is None or any(label._x is None for label in labels):
+                continue
+            bars = [(label._x + label.padding[0] - cell._x, label._y + label.padding[1] - cell._y,
+                     label._w - label.padding[0] - label.padding[2], label._h - label.padding[1] - label.padding[3])
+                    for label in labels]
+            backgrounds = {}
+            for row, other in enumerate(cells, first):
+                background = next((layer[1] for node in walk(other) for layer in getattr(node, "layers", ())
+                                   if layer[0] == "background"), None)
+                if background is not None:
+                    backgrounds.setdefault(row % 2, background)
+            Table.placeholders[(self.table_id, w)] = (bars, backgrounds)
+            return
+
+    def _schedule_prerender(self, first, last, w, direction):
+        # rows are prioritized by their distance from the viewport, the ones behind it count three times as far.
+        # Tasks of the previous viewport that were not run yet are dropped
+        IdleScheduler.cancel(self.table_id)
+        below = range(last, min(last + self.prerender_ahead, self.num_elems))
+        above = range(first - 1, max(first - 1 - self.prerender_behind, -1), -1)
+        if direction < 0:
+            below = range(last, min(last + self.prerender_behind, self.num_elems))
+            above = range(first - 1, max(first - 1 - self.prerender_ahead, -1), -1)
+        for rows, ahead in ((below, direction > 0), (above, direction < 0)):
+            for distance, row in enumerate(rows):
+                IdleScheduler.submit(self.table_id, row, distance if ahead else 3 * distance + 1,
+                                     partial(self._prerender, row, w))
 
+    def _prerender(self, row, w):
+        # drawn outside of a frame into the back buffer, the next frame clears it. The capture is stored under the
+        # row's cache id and state, the row is drawn from it once it scrolls into view at the same size
+        if row >= len(self.model):
+            return
+        cell = self.cell_class(self.model[row], row)
+        cell.size_requested()
+        if Cache.get_cached_uielement(cell.cache_id, cell._state_hash()) is None:
+            backend = Backend.current()
+            batch = backend.new_batch()
+            cell.draw(0, 0, w, self.cell_height, batch)
+            backend.draw_batch(batch)
+        unmount_tree(cell, True)
+
+    def row_height(self) -> int:
+        return self.cell_height
+
+    def row_count(self) -> int:
+        return self.num_elems
+
+    def max_offset(self, h) -> float:
+        return self.num_elems * self.cell_height / 2
+
+    def _scrolled(self):
+        self.model.invalidate_scroll()
+        self.model.request_update()
+
+    def current_item(self):
+        return self.visible_rows(0)[0]
 
 
+RenderContext.pool(Table, cell_cache=dict, drawn=dict)
@@ -0,0 +1,248 @@
+import zlib
+from array import array
+from itertools import compress
+from operator import ne
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from gluipy.backend import Backend
+from gluipy.pipeline import Job, Pipeline
+from gluipy.table import TableModel, TableDelegate
+
+
+class SortFilterTableModel(TableModel):
+    # rows are never copied or reordered, sorting and filtering only compose index arrays. Every column is sorted at
+    # most once, the descending order and the ranks are derived from the ascending permutation and later sorts reuse
+    # them. A filter is a mask of one byte per row, the masks of all filters are combined before they are applied to
+    # the sort order
+    _redraw = False
+    # columns with fewer distinct values in a sample of their first rows rank only the distinct values
+    rank_sample = 4096
+    rank_distinct = 1024
+
+    def __init__(self, rows: Sequence[Any], columns: {str: Callable[[Any], Any]}):
+        self.columns = columns
+        self.table_delegate: Optional[TableDelegate] = None
+        self.index = 0
+        self.version = 0
+        self.generation = 0
+        self.sort_keys: ((str, bool),) = ()
+        self._filters: {str: bytes} = {}
+        self._sort_job: Optional[Job] = None
+        self._sort_pipeline: Optional[Pipeline] = None
+        self.set_rows(rows)
+
+    def set_rows(self, rows: Sequence[Any]):
+        if self._sort_job is not None:
+            self._sort_job.cancel()
+            self._sort_job = None
+        self.rows = rows
+        self.generation += 1
+        self._values: {str: list} = {}
+        self._orders: {tuple: array} = {}
+        self._ranks: {str: array} = {}
+        self._starts: {str: list} = {}
+        self._filters = {}
+        self._mask: Optional[bytes] = None
+        self._mask_digest = 0
+        self._views: {tuple: array} = {}
+        self._update_view()
+
+    def column_values(self, column: str) -> list:
+        values = self._values.get(column)
+        if values is None:
+            key = self.columns[column]
+            values = self._values[column] = [key(row) for row in self.rows]
+        return values
+
+    def argsort(self, column: str, descending=False) -> array:
+        # the stable permutation that sorts the rows by a single column
+        order = self._orders.get(((column, descending),))
+        if order is None:
+            if descending:
+                order = self._descending(column)
+            else:
+                values = self.column_values(column)
+                order = array('l', sorted(range(len(values)), key=values.__getitem__))
+            self._orders[((column, descending),)] = order
+        return order
+
+    def _run_starts(self, column: str) -> [int]:
+        # positions in the ascending order at which a new value begins
+        starts = self._starts.get(column)
+        if starts is None:
+            ordered = list(map(self.column_values(column).__getitem__, self.argsort(column)))
+            starts = [0, *compress(range(1, len(ordered)), map(ne, ordered[1:], ordered[:-1]))] if ordered else []
+            self._starts[column] = starts
+        return starts
+
+    def _descending(self, column: str) -> array:
+        # the ascending order reversed, every run of equal values is put back into row order to keep the sort stable
+        order = self.argsort(column)
+        n = len(order)
+        descending = array('l', reversed(order))
+        starts = self._run_starts(column)
+        if len(starts) < n:
+            for start, stop in zip(starts, starts[1:] + [n]):
+                if stop - start > 1:
+                    descending[n - stop:n - start] = order[start:stop]
+        return descending
+
+    def ranks(self, column: str) -> array:
+        # position of every row in the ascending order of the column, equal values share their rank
+        ranks = self._ranks.get(column)
+        if ranks is None:
+            values = self.column_values(column)
+            if len(set(values[:self.rank_sample])) < self.rank_distinct:
+                # only the distinct values are sorted, the rows are not
+                distinct = sorted(set(values))
+                ranks = array('l', map(dict(zip(distinct, range(len(distinct)))).__getitem__, values))
+            else:
+                ranks = array('l', [0]) * len(values)
+                rank, previous = -1, object()
+                for i in self.argsort(column):
+                    value = values[i]
+                    if rank < 0 or value != previous:
+                        rank += 1
+                        previous = value
+                    ranks[i] = rank
+            self._ranks[column] = ranks
+        return ranks
+
+    def order(self, keys: ((str, bool),), job: Optional[Job] = None) -> Optional[array]:
+        # may run on a pipeline worker, a newer sort stops it between two steps
+        if not keys:
+            return None
+        order = self._orders.get(keys)
+        if order is None:
+            # the least significant key is sorted first, every more significant key is a stable sort on integer ranks
+            order = self.order(keys[1:], job) if len(keys) > 1 else None
+            if job is not None:
+                job.check()
+            column, descending = keys[0]
+            if order is None:
+                order = self.argsort(column, descending)
+            else:
+                order = array('l', sorted(order, key=self.ranks(column).__getitem__, reverse=descending))
+                self._orders[keys] = order
+        return order
+
+    def sort(self, *keys, pipeline: Optional[Pipeline] = None):
+        # columns sort ascending, a (column, True) tuple sorts descending, the first key is the most significant. With a
+        # pipeline an order that was not sorted before is computed on a worker, the view keeps the previous order until
+        # it is done
+        keys = tuple((key, False) if isinstance(key, str) else tuple(key) for key in keys)
+        if self._sort_job is not None:
+            self._sort_job.cancel()
+            self._sort_job = None
+        if pipeline is None or not keys or keys in self._orders:
+            self.sort_keys = keys
+            self._update_view()
+            return
+        generation = self.generation
+
+        def done(order):
+            self._sort_job = None
+            if generation == self.generation:
+                self.sort_keys = keys
+                self._update_view()
+
+        self._sort_job = pipeline.submit(f"sort|{id(self)}", lambda job: self.order(keys, job), done)
+        if self._sort_pipeline is None:
+            Backend.current().schedule_interval(self._poll_sort, 1 / 60)
+        self._sort_pipeline = pipeline
+
+    def _poll_sort(self, dt):
+        try:
+            self._sort_pipeline.poll()
+        finally:
+            # a failed sort is raised by the poll, it is not polled again
+            if self._sort_job is None or not self._sort_pipeline.pending:
+                Backend.current().unschedule(self._poll_sort)
+                self._sort_pipeline = None
+
+    def filter_mask(self, predicate: Callable[[Any], bool], job: Optional[Job] = None) -> bytes:
+        # may run on a pipeline worker, a newer request stops it early
+        mask = bytearray(len(self.rows))
+        for i, row in enumerate(self.rows):
+            if job is not None and not i & 1023:
+                job.check()
+            if predicate(row):
+                mask[i] = 1
+        return bytes(mask)
+
+    def set_filter(self, name: str, predicate: Optional[Callable[[Any], bool]] = None, mask: Optional[bytes] = None):
+        if predicate is None and mask is None:
+            self._filters.pop(name, None)
+        else:
+            self._filters[name] = mask if mask is not None else self.filter_mask(predicate)
+        combined = None
+        # one byte per row, the masks are combined as big integers
+        for filter_mask in self._filters.values():
+            value = int.from_bytes(filter_mask, 'little')
+            combined = value if combined is None else combined & value
+        self._mask = None if combined is None else combined.to_bytes(len(self.rows), 'little')
+        self._mask_digest = 0 if self._mask is None else zlib.crc32(self._mask)
+        self._views = {}
+        self._update_view()
+
+    def remove_filter(self, name: str):
+        self.set_filter(name)
+
+    def _update_view(self):
+        order = self.order(self.sort_keys)
+        mask = self._mask
+        if mask is None:
+            self.view = order
+        else:
+            # filtered views are kept per sort order until the filters change, switching back and forth is free
+            view = self._views.get(self.sort_keys)
+            if view is None:
+                if order is None:
+                    view = array('l', compress(range(len(self.rows)), mask))
+                else:
+                    view = array('l', compress(order, map(mask.__getitem__, order)))
+                self._views[self.sort_keys] = view
+            self.view = view
+        self.version += 1
+        self.request_update()
+
+    def source_index(self, item: int) -> int:
+        return item if self.view is None else self.view[item]
+
+    def __len__(self) -> int:
+        return len(self.rows) if self.view is None else len(self.view)
+
+    def __getitem__(self, item):
+        return self.rows[item if self.view is None else self.view[item]]
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.view is None:
+            yield from self.rows
+        else:
+            for i in self.view:
+                yield self.rows[i]
+
+    def __contains__(self, __x: object) -> bool:
+        return any(__x == row for row in self)
+
+    def need_redraw(self) -> bool:
+        if self._redraw:
+            self._redraw = False
+            return True
+        return False
+
+    def request_update(self):
+        self._redraw = True
+
+    def model_state(self) -> str:
+        # describes the view instead of counting changes, so that it is the same in a restarted process
+        return f"{self.generation}|{len(self.rows)}|{self.sort_keys}|{self._mask_digest:08x}|{self.index}"
+
+    def get_scroll(self) -> Optional[int]:
+        return self.index
+
+    def invalidate_scroll(self):
+        self.index = None
+
+    def set_table_delegate(self, table: TableDelegate):
+        self.table_delegate = table
@@ -0,0 +1,102 @@
+from typing import Any, Callable, Hashable, Optional
+
+from gluipy.base import walk
+from gluipy.interface import UIElement
+
+
+def _attribute_names(node) -> [str]:
+    names = []
+    for cls in type(node).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__weakref__", "__dict__") and name not in names and hasattr(node, name):
+                names.append(name)
+    return names + [name for name in getattr(node, "__dict__", ()) if name not in names]
+
+
+class CellTemplate:
+    # rows stamped from a prototype instead of running the cell's constructors. The prototype of every variant is
+    # built and measured once from the first row of that variant and compiled into a function that creates the
+    # row's nodes and assigns their attributes, then sets the bound fields. Only the nodes above a bound field measure
+    # and hash again, the others keep the prototype's sizes and hashes. Cache ids of the prototype that end with
+    # "|<index>" (plus modifier suffixes) are renumbered per row.
+    #
+    # fields: "<cache id prefix>.<attribute>" -> value(item, index), e.g. {"name.text": lambda p, i: p.name}
+    # variant: key(item, index) of rows that differ in more than their fields, e.g. alternating backgrounds
+
+    def __init__(self, build: Callable[[Any, int], UIElement], fields: {str: Callable[[Any, int], Any]},
+                 variant: Optional[Callable[[Any, int], Hashable]] = None):
+        self.build = build
+        self.fields = [(*key.split(".", 1), value) for key, value in fields.items()]
+        self.variant = variant
+        self.stamps: {Hashable: Callable[[Any, int], UIElement]} = {}
+
+    def __call__(self, item: Any, index: int) -> UIElement:
+        key = None if self.variant is None else self.variant(item, index)
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            stamp = self.stamps[key] = self._compile(item, index)
+        return stamp(item, index)
+
+    def _compile(self, item: Any, index: int) -> Callable[[Any, int], UIElement]:
+        prototype = self.build(item, index)
+        prototype.size_requested()
+        prototype._state_hash()
+        nodes = list(walk(prototype))
+        position = {id(node): i for i, node in enumerate(nodes)}
+        number = str(index)
+
+        def prefix(node) -> Optional[str]:
+            head, separator, tail = (node.cache_id or "").rpartition("|")
+            if separator and tail.startswith(number) and not tail[len(number):len(number) + 1].isdigit():
+                return head
+            return None
+
+        bound, dirty = [], set()
+        for field_prefix, name, value in self.fields:
+            for i, node in enumerate(nodes):
+                if prefix(node) == field_prefix:
+                    bound.append((i, name, value))
+                    # the bound node and everything it is part of measure and hash again
+                    while node is not None and id(node) in position:
+                        dirty.add(id(node))
+                        node = node.container
+
+        # values shared by all rows are passed in, nodes are referred to by their position in the prototype
+        shared = []
+
+        def constant(value) -> str:
+            shared.append(value)
+            return f"shared[{len(shared) - 1}]"
+
+        def expression(value) -> str:
+            if id(value) in position:
+                return f"n{position[id(value)]}"
+            if isinstance(value, list):
+                return "[" + ", ".join(map(expression, value)) + "]"
+            return constant(value)
+
+        lines = ["def stamp(item, index):", "    number = str(index)"]
+        lines += [f"    n{i} = new({constant(type(node))})" for i, node in enumerate(nodes)]
+        for i, node in enumerate(nodes):
+            for name in _attribute_names(node):
+                value = getattr(node, name)
+                if name == "container" and id(value) not in position:
+                    source = "None"
+                elif name in ("_w", "_h", "_structural_hash") and id(node) in dirty:
+                    source = "None"
+                elif name == "cache_id" and prefix(node) is not None:
+                    head, _, tail = value.rpartition("|")
+                    source = f"{constant(head + '|')} + number + {constant(tail[len(number):])}"
+                else:
+                    source = expression(value)
+                if name.isidentifier():
+                    lines.append(f"    n{i}.{name} = {source}")
+                else:
+                    lines.append(f"    setattr(n{i}, {name!r}, {source})")
+        for i, name, value in bound:
+            lines.append(f"    n{i}.{name} = {constant(value)}(item, index)")
+        lines.append("    return n0")
+        namespace = {"new": object.__new__, "shared": shared}
+        exec("\n".join(lines), namespace)
+        return namespace["stamp"]
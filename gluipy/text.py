@@ -1,13 +1,15 @@
-import math
-import time
 from typing import Any, Optional
 
+from gluipy.backend import Backend
 from gluipy.base import BaseUIElement
-from gluipy.interface import TextInputProtocol, AbstractDynamicCaret
-import pyglet
+from gluipy.binding import Binding
+from gluipy.fonts import Fonts
+from gluipy.interface import TextInputProtocol, TextField
+from gluipy.resources import Resources
 
 
 class Label(BaseUIElement):
+    __slots__ = ("padding", "color", "font_size", "font_name", "_text", "label")
     h_compression_resistance = 500
     h_hugging_force = 500
     v_compression_resistance = 500
@@ -19,14 +21,14 @@ class Label(BaseUIElement):
         self.padding = (padding[0], padding[1], padding[2], padding[3] + int(font_size/4))
         self.color = color
         self.font_size = font_size
+        Fonts.declare(font_name, font_size)
         self.font_name = font_name
         self._text = text
-        self.label = pyglet.text.Label(text, font_name=self.font_name, font_size=self.font_size, x=0, y=0,
-                                       anchor_x='left', anchor_y='bottom', align='left', color=self.color, dpi=96)
+        # created on first draw, measuring only needs the shared text metrics and may run on a layout worker
+        self.label = None
 
-    def _state_hash(self) -> Optional[str]:
-        state_dict = f"{self.color}|{self._text}"
-        return state_dict
+    def _own_state(self) -> tuple:
+        return self.color, self._text
 
     @property
     def text(self):
@@ -35,30 +37,38 @@ class Label(BaseUIElement):
     @text.setter
     def text(self, new_value):
         self._text = new_value
-        self.label.text = self._text
+        self.invalidate_hash()
+        if self.label is not None:
+            Backend.current().set_text(self.label, self._text)
 
     def draw_content(self, x, y, w, h, batch):
-        # print("#", end="")
-        self.label.x = x + self.padding[0] + (w - self.label.content_width - (self.padding[0] + self.padding[2])) / 2
-        self.label.y = y + self.padding[1] + (h - self.label.content_height - (self.padding[1] + self.padding[3])) / 2
-        self.label.batch = batch
+        backend = Backend.current()
+        if self.label is None:
+            self.label = backend.text(self._text, self.font_name, self.font_size, self.color)
+            Resources.created(self)
+        content_width, content_height = backend.measure_text(self._text, self.font_name, self.font_size)
+        backend.place_text(self.label,
+                           x + self.padding[0] + (w - content_width - (self.padding[0] + self.padding[2])) / 2,
+                           y + self.padding[1] + (h - content_height - (self.padding[1] + self.padding[3])) / 2,
+                           batch)
         self._x, self._y, self._w, self._h = x, y, w, h
 
+    def unmount(self, replaced: bool):
+        if self.label is not None:
+            Backend.current().release(self.label)
+            Resources.released(self)
+            self.label = None
+
     def size_requested(self) -> (int, int):
-        self._w = self.label.content_width + self.padding[0] + self.padding[2]
-        self._h = self.label.content_height + self.padding[1] + self.padding[3]
+        content_width, content_height = Backend.current().measure_text(self._text, self.font_name, self.font_size)
+        self._w = content_width + self.padding[0] + self.padding[2]
+        self._h = content_height + self.padding[1] + self.padding[3]
         return self._w, self._h
 
 
-class DynamicCaret(AbstractDynamicCaret):
-
-    def update_batch(self, batch: pyglet.graphics.Batch, color: (int, int, int)):
-        r, g, b = color
-        colors = (r, g, b, 255, r, g, b, 255)
-        self._list = batch.add(2, pyglet.gl.GL_LINES, self._layout.background_group, 'v2f', ('c4B', colors))
-
-
 class TextInput(BaseUIElement, TextInputProtocol):
+    __slots__ = ("_active", "color", "model", "model_attribute", "font_size", "font_name", "length", "binding",
+                 "_field")
     caching = False
     h_compression_resistance = 700
     h_hugging_force = 400
@@ -72,7 +82,8 @@ class TextInput(BaseUIElement, TextInputProtocol):
                  font_name='San Francisco, Hevetica Neue, Helvetica, Sans Serif',
                  font_size=24,
                  length=30,
-                 color=(40, 60, 60, 255)
+                 color=(40, 60, 60, 255),
+                 binding: Optional[Binding] = None
                  ):
         self.cache_id = cache_id
         self._active = False
@@ -80,47 +91,51 @@ class TextInput(BaseUIElement, TextInputProtocol):
         self.model = model
         self.model_attribute = model_attribute
         self.font_size = font_size
+        Fonts.declare(font_name, font_size)
         self.font_name = font_name
         self.length = length
-        self.document = pyglet.text.document.UnformattedDocument(getattr(model, model_attribute, ""))
-        self.document.styles.setdefault("font_size", font_size)
-        self.document.styles.setdefault("font_name", font_name)
-        self.document.styles.setdefault("color", color)
-        self.layout = pyglet.text.layout.IncrementalTextLayout(self.document, 100, 20, wrap_lines=False)
-        self.caret = DynamicCaret(self.layout, color=color[:3])
-        self.caret.visible = True
-        self._ref_label = pyglet.text.Label(
-            "M"*self.length,
-            font_name=self.font_name,
-            font_size=self.font_size,
-            x=0,
-            y=0,
-            anchor_x='left',
-            anchor_y='bottom',
-            align='left',
-            color=self.color,
-            dpi=96
-        )
-
-    def _state_hash(self) -> Optional[str]:
-        return self.document.text
+        self.binding = binding if binding is not None else Binding.of(model, model_attribute)
+        self._field = None
+
+    @property
+    def field(self) -> TextField:
+        # the document and caret hold GL resources, they are created on the main thread when first used
+        if self._field is None:
+            self._field = Backend.current().text_field(self.binding.value, self.font_name, self.font_size, self.color)
+            Resources.created(self)
+        return self._field
+
+    def unmount(self, replaced: bool):
+        if self._field is not None:
+            Backend.current().release(self._field)
+            Resources.released(self)
+            self._field = None
+
+    def adopt(self, old: "TextInput"):
+        # the focused input replaced by a layout hands over its field, text typed since the layout started stays
+        self.unmount(True)
+        self._field, old._field = old._field, None
+        self.invalidate_hash()
+
+    @property
+    def document(self):
+        return self.field.document
+
+    @property
+    def layout(self):
+        return self.field.layout
+
+    @property
+    def caret(self):
+        return self.field.caret
+
+    def _own_state(self) -> tuple:
+        if self._field is None:
+            return self.binding.value or "",
+        return self.document.text,
 
     def draw_content(self, x, y, w, h, batch):
-        self.caret.update_batch(batch, self.color[:3])
-        self.layout.batch = batch
-        self.layout.x = x
-        self.layout.y = y
-        self.layout.width = w
-        self.layout.height = h
-        # drawing the caret
-        # This is a quick hack, should really fix the pyglet caret drawing or reimplement text layouts from scratch
-        if self._active:
-            ts = time.time_ns() / (10 ** 9)
-            ts = ts - math.floor(ts)
-            cx, cy = self.layout.get_point_from_position(self.caret.position)
-            pyglet.gl.glColor4f(self.color[0]/255, self.color[1]/255, self.color[2]/255, ts)
-            font = self.document.get_font(max(0, self.caret._position - 1))
-            batch.add(2, pyglet.gl.GL_LINES, None, ('v2f/dynamic', [cx + x, y - font.descent, cx + x, y + h]))
+        self.field.draw(x, y, w, h, batch, self._active)
         self._x, self._y, self._w, self._h = x, y, w, h
 
     @property
@@ -132,8 +147,7 @@ class TextInput(BaseUIElement, TextInputProtocol):
         self._active = new_value
 
     def size_requested(self) -> (int, int):
-        self._w = self._ref_label.content_width
-        self._h = self._ref_label.content_height
+        self._w, self._h = Backend.current().measure_text("M"*self.length, self.font_name, self.font_size)
         return self._w, self._h
 
     def _click(self, view):
@@ -142,4 +156,6 @@ class TextInput(BaseUIElement, TextInputProtocol):
         self._active = True
 
     def text_changed(self):
-        setattr(self.model, self.model_attribute, self.document.text)
+        # caret motion calls this as well, the binding skips values that did not change
+        self.invalidate_hash()
+        self.binding.set(self.document.text)
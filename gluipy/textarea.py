@@ -0,0 +1,472 @@
+import bisect
+import math
+import re
+from typing import Any, Optional
+
+from gluipy.backend import Backend
+from gluipy.base import BaseUIElement
+from gluipy.fonts import Fonts
+from gluipy.interface import TextInputProtocol, AbstractDynamicCaret, ViewModel
+from gluipy.rendercontext import RenderContext
+from gluipy.resources import Resources
+from gluipy.scroll import Scrollable
+
+# the values of pyglet.window.key, the layout core does not import pyglet
+MOTION_UP = 0xff52
+MOTION_RIGHT = 0xff53
+MOTION_DOWN = 0xff54
+MOTION_LEFT = 0xff51
+MOTION_NEXT_WORD = 1
+MOTION_PREVIOUS_WORD = 2
+MOTION_BEGINNING_OF_LINE = 3
+MOTION_END_OF_LINE = 4
+MOTION_NEXT_PAGE = 0xff56
+MOTION_PREVIOUS_PAGE = 0xff55
+MOTION_BEGINNING_OF_FILE = 5
+MOTION_END_OF_FILE = 6
+MOTION_BACKSPACE = 0xff08
+MOTION_DELETE = 0xffff
+
+# a word character that follows a non-word character or starts the line
+WORD_START = re.compile(r"\b\w")
+
+
+class LineDocument(ViewModel):
+    # lines are kept in chunks of bounded size, an edit only rewrites the chunk holding the edited lines. The
+    # line-start and character-start index over the chunks is rebuilt lazily, its size is lines / chunk_size
+    chunk_size = 512
+
+    def __init__(self, text=""):
+        lines = text.split("\n")
+        self.chunks: [[str]] = [lines[i:i + self.chunk_size] for i in range(0, len(lines), self.chunk_size)]
+        self._chunk_chars = [self._count_chars(chunk) for chunk in self.chunks]
+        self._starts: Optional[list] = None
+        self._chars: Optional[list] = None
+        self._line_count = len(lines)
+        self.version = 0
+        self._redraw = False
+
+    @staticmethod
+    def _count_chars(chunk: [str]) -> int:
+        # newlines are counted with the line they end
+        return sum(len(line) for line in chunk) + len(chunk)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(line for chunk in self.chunks for line in chunk)
+
+    def __len__(self) -> int:
+        return self._line_count
+
+    def _index(self):
+        if self._starts is None:
+            starts, chars = [], []
+            line = char = 0
+            for chunk, chunk_chars in zip(self.chunks, self._chunk_chars):
+                starts.append(line)
+                chars.append(char)
+                line += len(chunk)
+                char += chunk_chars
+            self._starts, self._chars, self._line_count = starts, chars, line
+
+    def _locate(self, line: int) -> (int, int):
+        self._index()
+        c = bisect.bisect_right(self._starts, line) - 1
+        return c, line - self._starts[c]
+
+    def line(self, line: int) -> str:
+        c, j = self._locate(line)
+        return self.chunks[c][j]
+
+    def lines(self, start: int, stop: int) -> [str]:
+        if start >= stop:
+            return []
+        c, j = self._locate(start)
+        result = []
+        while len(result) < stop - start and c < len(self.chunks):
+            result += self.chunks[c][j:j + stop - start - len(result)]
+            c, j = c + 1, 0
+        return result
+
+    def offset(self, line: int, column: int) -> int:
+        c, j = self._locate(line)
+        return self._chars[c] + self._count_chars(self.chunks[c][:j]) + column
+
+    def position(self, offset: int) -> (int, int):
+        self._index()
+        c = max(bisect.bisect_right(self._chars, offset) - 1, 0)
+        offset -= self._chars[c]
+        for j, text in enumerate(self.chunks[c]):
+            if offset <= len(text):
+                return self._starts[c] + j, offset
+            offset -= len(text) + 1
+        return self._line_count - 1, len(self.line(self._line_count - 1))
+
+    def insert(self, line: int, column: int, text: str) -> (int, int):
+        # returns the position right after the inserted text
+        c, j = self._locate(line)
+        chunk = self.chunks[c]
+        current = chunk[j]
+        new_lines = (current[:column] + text + current[column:]).split("\n")
+        chunk[j:j + 1] = new_lines
+        self._chunk_chars[c] += len(text)
+        self._changed(c)
+        return line + len(new_lines) - 1, len(new_lines[-1]) - (len(current) - column)
+
+    def append(self, text: str):
+        last = len(self) - 1
+        self.insert(last, len(self.line(last)), text)
+
+    def delete(self, line: int, column: int, end_line: int, end_column: int):
+        if (line, column) >= (end_line, end_column):
+            return
+        c0, j0 = self._locate(line)
+        c1, j1 = self._locate(end_line)
+        joined = self.chunks[c0][j0][:column] + self.chunks[c1][j1][end_column:]
+        if c0 == c1:
+            self.chunks[c0][j0:j1 + 1] = [joined]
+        else:
+            self.chunks[c0][j0:] = [joined]
+            del self.chunks[c1][:j1 + 1]
+            del self.chunks[c0 + 1:c1]
+            del self._chunk_chars[c0 + 1:c1]
+            self._chunk_chars[c0 + 1] = self._count_chars(self.chunks[c0 + 1])
+        self._chunk_chars[c0] = self._count_chars(self.chunks[c0])
+        self._changed(c0)
+
+    def _changed(self, c: int):
+        chunk = self.chunks[c]
+        if len(chunk) > 2 * self.chunk_size:
+            parts = [chunk[i:i + self.chunk_size] for i in range(0, len(chunk), self.chunk_size)]
+            self.chunks[c:c + 1] = parts
+            self._chunk_chars[c:c + 1] = [self._count_chars(part) for part in parts]
+        for i in (c + 1, c):
+            if i < len(self.chunks) and not self.chunks[i] and len(self.chunks) > 1:
+                del self.chunks[i]
+                del self._chunk_chars[i]
+        self._starts = None
+        self._index()
+        self.version += 1
+        self.request_update()
+
+    def request_update(self):
+        self._redraw = True
+
+    def need_redraw(self) -> bool:
+        if self._redraw:
+            self._redraw = False
+            return True
+        return False
+
+
+class TextAreaCaret(AbstractDynamicCaret):
+
+    def __init__(self, document: LineDocument):
+        self.document = document
+        self.line = 0
+        self.column = 0
+        # the other end of the selection, (line, column), None without a selection
+        self.anchor: Optional[tuple] = None
+        self.active = False
+        # lines moved by page up and down, set by the text area from its visible height
+        self.page_lines = 20
+
+    @property
+    def position(self) -> int:
+        return self.document.offset(self.line, self.column)
+
+    @position.setter
+    def position(self, value: int):
+        self.line, self.column = self.document.position(value)
+
+    def update_batch(self, batch: Any, color: (int, int, int)):
+        pass
+
+    def selection(self) -> Optional[tuple]:
+        # (line, column, end line, end column) in document order
+        if self.anchor is None or self.anchor == (self.line, self.column):
+            return None
+        start, end = sorted((self.anchor, (self.line, self.column)))
+        return (*start, *end)
+
+    def _delete_selection(self) -> bool:
+        selection = self.selection()
+        self.anchor = None
+        if selection is None:
+            return False
+        self.document.delete(*selection)
+        self.line, self.column = selection[:2]
+        return True
+
+    def on_text(self, text: str):
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self._delete_selection()
+        self.line, self.column = self.document.insert(self.line, self.column, text)
+
+    def _next_word(self) -> (int, int):
+        # the start of the next word, the start of a line counts as a word boundary
+        document = self.document
+        for match in WORD_START.finditer(document.line(self.line)):
+            if match.start() > self.column:
+                return self.line, match.start()
+        for line in range(self.line + 1, len(document)):
+            match = WORD_START.search(document.line(line))
+            if match is not None:
+                return line, match.start()
+        last = len(document) - 1
+        return last, len(document.line(last))
+
+    def _previous_word(self) -> (int, int):
+        document = self.document
+        starts = [m.start() for m in WORD_START.finditer(document.line(self.line)) if m.start() < self.column]
+        if starts:
+            return self.line, starts[-1]
+        for line in range(self.line - 1, -1, -1):
+            starts = [m.start() for m in WORD_START.finditer(document.line(line))]
+            if starts:
+                return line, starts[-1]
+        return 0, 0
+
+    def _move(self, motion) -> bool:
+        document = self.document
+        length = len(document.line(self.line))
+        last = len(document) - 1
+        if motion == MOTION_LEFT:
+            if self.column > 0:
+                self.column -= 1
+            elif self.line > 0:
+                self.line -= 1
+                self.column = len(document.line(self.line))
+        elif motion == MOTION_RIGHT:
+            if self.column < length:
+                self.column += 1
+            elif self.line < last:
+                self.line += 1
+                self.column = 0
+        elif motion == MOTION_PREVIOUS_WORD:
+            self.line, self.column = self._previous_word()
+        elif motion == MOTION_NEXT_WORD:
+            self.line, self.column = self._next_word()
+        elif motion in (MOTION_UP, MOTION_DOWN, MOTION_PREVIOUS_PAGE, MOTION_NEXT_PAGE):
+            step = {MOTION_UP: -1, MOTION_DOWN: 1, MOTION_PREVIOUS_PAGE: -self.page_lines,
+                    MOTION_NEXT_PAGE: self.page_lines}[motion]
+            self.line = min(max(self.line + step, 0), last)
+            self.column = min(self.column, len(document.line(self.line)))
+        elif motion == MOTION_BEGINNING_OF_LINE:
+            self.column = 0
+        elif motion == MOTION_END_OF_LINE:
+            self.column = length
+        elif motion == MOTION_BEGINNING_OF_FILE:
+            self.line, self.column = 0, 0
+        elif motion == MOTION_END_OF_FILE:
+            self.line, self.column = last, len(document.line(last))
+        else:
+            return False
+        return True
+
+    def on_text_motion(self, motion):
+        document = self.document
+        if motion in (MOTION_BACKSPACE, MOTION_DELETE):
+            if self._delete_selection():
+                return
+            length = len(document.line(self.line))
+            last = len(document) - 1
+            if motion == MOTION_BACKSPACE:
+                if self.column > 0:
+                    document.delete(self.line, self.column - 1, self.line, self.column)
+                    self.column -= 1
+                elif self.line > 0:
+                    column = len(document.line(self.line - 1))
+                    document.delete(self.line - 1, column, self.line, 0)
+                    self.line, self.column = self.line - 1, column
+            elif self.column < length:
+                document.delete(self.line, self.column, self.line, self.column + 1)
+            elif self.line < last:
+                document.delete(self.line, self.column, self.line + 1, 0)
+            return
+        selection = self.selection()
+        if selection is not None and motion in (MOTION_LEFT, MOTION_RIGHT):
+            # the selection collapses to the side the caret moves to
+            self.line, self.column = selection[:2] if motion == MOTION_LEFT else selection[2:]
+            self.anchor = None
+        elif self._move(motion):
+            self.anchor = None
+
+    def on_text_motion_select(self, motion):
+        # the selection grows from where the caret was when it started
+        if motion in (MOTION_BACKSPACE, MOTION_DELETE):
+            self.on_text_motion(motion)
+            return
+        position = (self.line, self.column)
+        if self._move(motion) and self.anchor is None:
+            self.anchor = position
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        pass
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        pass
+
+
+class TextArea(Scrollable, BaseUIElement, TextInputProtocol):
+    __slots__ = ("scroll_id", "document", "model", "model_attribute", "layout", "font_name", "font_size", "length",
+                 "lines", "color", "padding", "caret", "line_height", "offset")
+    caching = False
+    row_gap = 0
+    h_compression_resistance = 700
+    h_hugging_force = 400
+    v_compression_resistance = 300
+    v_hugging_force = 300
+    selection_color = (180, 205, 240)
+    # the caret and the text handles of the visible rows outlive the element, it is rebuilt with every layout
+    carets: {str: TextAreaCaret} = {}
+    rows: {str: [list]} = {}
+
+    def __init__(self, *,
+                 document: LineDocument,
+                 cache_id,
+                 font_name='San Francisco, Hevetica Neue, Helvetica, Sans Serif',
+                 font_size=20,
+                 length=60,
+                 lines=20,
+                 color=(40, 60, 60, 255),
+                 padding=(8, 4, 8, 4)
+                 ):
+        self.cache_id = cache_id
+        self.scroll_id = cache_id
+        self.document = document
+        self.model = document
+        self.model_attribute = "text"
+        self.layout = None
+        self.font_name = font_name
+        self.font_size = font_size
+        Fonts.declare(font_name, font_size)
+        self.length = length
+        self.lines = lines
+        self.color = color
+        self.padding = padding
+        caret = TextArea.carets.get(cache_id)
+        if caret is None or caret.document is not document:
+            caret = TextArea.carets[cache_id] = TextAreaCaret(document)
+        self.caret = caret
+        self.line_height = Backend.current().measure_text("Mg", font_name, font_size)[1]
+        self.restore_offset()
+
+    def row_height(self) -> int:
+        return self.line_height
+
+    def row_count(self) -> int:
+        return len(self.document)
+
+    def _own_state(self) -> tuple:
+        return self.document.version, self.offset, self.color
+
+    @property
+    def active(self) -> bool:
+        return self.caret.active
+
+    @active.setter
+    def active(self, new_value: bool):
+        self.caret.active = new_value
+
+    def _inner(self, x, y, w, h) -> (int, int, int, int):
+        return (x + self.padding[0], y + self.padding[1],
+                w - self.padding[0] - self.padding[2], h - self.padding[1] - self.padding[3])
+
+    def size_requested(self) -> (int, int):
+        w, _ = Backend.current().measure_text("M" * self.length, self.font_name, self.font_size)
+        self._w = w + self.padding[0] + self.padding[2]
+        self._h = self.lines * self.line_height + self.padding[1] + self.padding[3]
+        return self._w, self._h
+
+    def draw_content(self, x, y, w, h, batch):
+        backend = Backend.current()
+        ix, iy, iw, ih = self._inner(x, y, w, h)
+        self.caret.page_lines = max(ih // self.line_height, 1)
+        first, last = self.visible_rows(ih)
+        rows = TextArea.rows.setdefault(self.cache_id, [])
+        # only the visible window is laid out, the handles of the row slots are reused while scrolling
+        backend.push_clip_rect(ix, iy, iw, ih)
+        selection = self.caret.selection()
+        if selection is not None:
+            self._draw_selection(selection, ix, iy, ih, first, last)
+        rows_batch = backend.new_batch()
+        for slot, text in enumerate(self.document.lines(first, last)):
+            if slot == len(rows):
+                rows.append([backend.text(text, self.font_name, self.font_size, self.color), text])
+                Resources.created(self)
+            row = rows[slot]
+            if row[1] != text:
+                backend.set_text(row[0], text)
+                row[1] = text
+            backend.place_text(row[0], ix, self.row_top(iy, ih, first + slot) - self.line_height, rows_batch)
+        backend.draw_batch(rows_batch)
+        backend.pop_clip_rect()
+        if self.active and first <= self.caret.line < last:
+            text = self.document.line(self.caret.line)[:self.caret.column]
+            cx = ix + backend.measure_text(text, self.font_name, self.font_size)[0]
+            top = self.row_top(iy, ih, self.caret.line)
+            backend.draw_caret(cx, top - self.line_height, top, self.color)
+        self._x, self._y, self._w, self._h = x, y, w, h
+
+    def _draw_selection(self, selection: tuple, ix, iy, ih, first: int, last: int):
+        # behind the text, a selected line end is shown as the width of a space
+        backend = Backend.current()
+        line0, column0, line1, column1 = selection
+        space = backend.measure_text(" ", self.font_name, self.font_size)[0]
+        for line in range(max(line0, first), min(line1 + 1, last)):
+            text = self.document.line(line)
+            start = column0 if line == line0 else 0
+            end = column1 if line == line1 else len(text)
+            x0 = backend.measure_text(text[:start], self.font_name, self.font_size)[0] if start else 0
+            x1 = backend.measure_text(text[:end], self.font_name, self.font_size)[0] if end else 0
+            if line < line1:
+                x1 += space
+            if x1 > x0:
+                top = self.row_top(iy, ih, line)
+                backend.draw_rect(ix + x0, top - self.line_height, x1 - x0, self.line_height, self.selection_color)
+
+    def click(self, x, y, button, modifiers, view):
+        if self._x is None or not (self._x < x < self._x + self._w and self._y < y < self._y + self._h):
+            return False
+        view.focus = self
+        self.active = True
+        ix, iy, iw, ih = self._inner(self._x, self._y, self._w, self._h)
+        line = math.floor((iy + ih + self.offset - y) / self.line_height)
+        self.caret.line = min(max(line, 0), len(self.document) - 1)
+        self.caret.column = self._column_at(self.document.line(self.caret.line), x - ix)
+        self.caret.anchor = None
+        self.invalidate_hash()
+        return True
+
+    def _column_at(self, text: str, dx) -> int:
+        # the widths of the prefixes grow with their length, so the column is found with O(log n) measurements
+        measure = Backend.current().measure_text
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if measure(text[:mid], self.font_name, self.font_size)[0] <= dx:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def viewport_height(self) -> int:
+        return self._h - self.padding[1] - self.padding[3]
+
+    def unmount(self, replaced: bool):
+        if not replaced:
+            backend = Backend.current()
+            for row in TextArea.rows.pop(self.cache_id, ()):
+                backend.release(row[0])
+                Resources.released(self)
+            TextArea.carets.pop(self.cache_id, None)
+            Scrollable.offsets.pop(self.scroll_id, None)
+
+    def text_changed(self):
+        self.invalidate_hash()
+        if self._h is not None:
+            self.scroll_to_row(self.caret.line, self.viewport_height())
+
+
+RenderContext.pool(TextArea, carets=dict, rows=dict)
@@ -0,0 +1,48 @@
+import gluipy.modifier
+from gluipy.backend import RecordingBackend
+from gluipy.base import BaseView
+from gluipy.container import HContainer
+from gluipy.text import Label
+
+
+class CapturingBackend(RecordingBackend):
+    # captures stand in for textures, elements with one are drawn from the cache
+
+    def capture(self, x, y, w, h):
+        return "capture", x, y, w, h
+
+
+class ButtonsView(BaseView):
+
+    def __init__(self, clicks: [str]):
+        super().__init__(backend=CapturingBackend())
+        self.clicks = clicks
+
+    def content(self):
+        # the row has no cache id and draws its buttons every frame, from their captures once they have one
+        return HContainer([Label(name, f"click-{name}", padding=(4, 4, 4, 4)).onclick(
+            lambda view, name=name: view.clicks.append(name)) for name in ("first", "second")], None)
+
+
+def test_click_cached_sibling():
+    clicks = []
+    view = ButtonsView(clicks)
+    view.draw(0, 0, 400, 100)
+    view.redraw = True
+    view.draw(0, 0, 400, 100)
+    first, second = view.root.elements
+    assert isinstance(second, gluipy.modifier.Decorated)
+    view.click(second._x + second._w // 2, second._y + second._h // 2, 1, 0)
+    view.click(first._x + first._w // 2, first._y + first._h // 2, 1, 0)
+    assert clicks == ["second", "first"]
+
+
+def test_click_outside_buttons():
+    clicks = []
+    view = ButtonsView(clicks)
+    view.draw(0, 0, 400, 100)
+    view.redraw = True
+    view.draw(0, 0, 400, 100)
+    second = view.root.elements[1]
+    view.click(second._x + second._w + 20, second._y + second._h // 2, 1, 0)
+    assert clicks == []
@@ -0,0 +1,49 @@
+from gluipy.backend import NullBackend
+from gluipy.base import BaseView, walk
+from gluipy.container import VContainer
+from gluipy.text import Label, TextInput
+
+
+class SearchModel:
+
+    def __init__(self):
+        self.search = ""
+        self.version = 0
+
+    def need_redraw(self) -> bool:
+        return False
+
+
+class SearchView(BaseView):
+
+    def __init__(self, model: SearchModel):
+        super().__init__(backend=NullBackend())
+        self.model = model
+
+    def content(self):
+        return VContainer([TextInput(model=self.model, model_attribute="search", cache_id="search"),
+                           Label(f"results for {self.model.search}", "results")], "search-view")
+
+
+def test_focus_moves_to_rebuilt_input():
+    view = SearchView(SearchModel())
+    view.draw(0, 0, 800, 600)
+    view.click(*_center(_search_input(view)), 1, 0)
+    view.on_text("S")
+    # a layout built from the model state before the next key arrives
+    view.redraw = True
+    view.draw(0, 0, 800, 600)
+    view.on_text("a")
+    view.draw(0, 0, 800, 600)
+    field = _search_input(view)
+    assert view.focus is field
+    assert field.active
+    assert field.document.text == "Sa"
+
+
+def _search_input(view: BaseView) -> TextInput:
+    return next(node for node in walk(view.root) if isinstance(node, TextInput))
+
+
+def _center(element) -> (int, int):
+    return element._x + element._w // 2, element._y + element._h // 2
@@ -0,0 +1,36 @@
+from gluipy.backend import RecordingBackend
+from gluipy.base import BaseView
+from gluipy.container import VContainer
+from gluipy.text import Label
+
+
+class LabelsView(BaseView):
+    size = (200, 100)
+
+    def __init__(self):
+        self.recording = RecordingBackend()
+        super().__init__(backend=self.recording)
+
+    def content(self):
+        return VContainer([Label("top", "rec-top"), Label("bottom", "rec-bottom")], "rec-labels")
+
+
+def test_draw_without_window():
+    view = LabelsView()
+    view.draw()
+    texts = {command[1]: command for command in view.recording.commands if command[0] == "text"}
+    assert set(texts) == {"top", "bottom"}
+    # both fit into the configured size, in layout units, one above the other
+    u = view.recording.units_per_point
+    for _, _, x, y, _, _ in texts.values():
+        assert 0 <= x < 200 * u and 0 <= y < 100 * u
+    assert texts["top"][3] > texts["bottom"][3]
+
+
+def test_same_commands_every_frame():
+    view = LabelsView()
+    view.draw()
+    first = list(view.recording.commands)
+    view.redraw = True
+    view.draw()
+    assert view.recording.commands == first